@@ -0,0 +1,158 @@
+"""
+`api/adaptive.py`
+
+Adaptive limit on the number of requests in flight (AIMD: additive increase, multiplicative decrease).
+
+The limit grows by a fixed step each time a window of requests completes at full concurrency without
+its p95 latency rising above the best seen so far, and is cut by a factor when a request times out,
+gets an HTTP 5xx or an enteliWEB error payload. The client then settles close to what the server can
+actually handle, without a hand-tuned worker count per site.
+"""
+import time
+import threading
+from typing import Callable
+
+
+
+class AdaptiveLimit:
+    """
+    A concurrency limit adjusted from the latency and errors of the requests it admits.
+
+    ## Init Parameters
+    - *(Optional)* `initial`: The starting limit (defaults to `8`).
+    - *(Optional)* `minimum`: The lowest the limit goes (defaults to `1`).
+    - *(Optional)* `maximum`: The highest the limit goes (defaults to `64`).
+    - *(Optional)* `increase`: Added to the limit after a steady window (defaults to `1`).
+    - *(Optional)* `decrease`: Factor applied to the limit on a failure (defaults to `0.5`).
+    - *(Optional)* `window`: The number of successful requests per latency window (defaults to `20`).
+    - *(Optional)* `tolerance`: A window is steady while its p95 latency is at most `tolerance` times the lowest p95 seen (defaults to `1.5`).
+    - *(Optional)* `on_change`: Called with the new limit and the reason whenever the limit changes.
+
+    Only one decrease is made per congestion event: failures of requests admitted before the last
+    decrease do not cut the limit again. Every change is recorded in `history`.
+
+    ## Usage
+    ```python
+    limit = AdaptiveLimit()
+    token = limit.acquire()
+    start = time.monotonic()
+    ok = send_request()
+    limit.release(token, time.monotonic() - start, ok)
+    ```
+    """
+    def __init__(
+        self,
+        initial: int = 8,
+        minimum: int = 1,
+        maximum: int = 64,
+        increase: int = 1,
+        decrease: float = 0.5,
+        window: int = 20,
+        tolerance: float = 1.5,
+        on_change: Callable[[int, str], None] | None = None,
+    ) -> None:
+        """
+        """
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(self.maximum, max(self.minimum, initial))
+        self.increase = increase
+        self.decrease = decrease
+        self.window = max(1, window)
+        self.tolerance = tolerance
+        self.on_change = on_change
+        self.in_flight = 0
+        self.started = time.monotonic()
+        self.history: list[tuple[float, int, str]] = [(0.0, self.limit, "initial")]
+        self._baseline: float | None = None
+        self._samples: list[float] = []
+        self._saturated = False
+        self._generation = 0
+        self._condition = threading.Condition()
+
+
+
+    def acquire(self, timeout: float | None = None) -> int | None:
+        """
+        Blocks until a request may be sent.
+
+        ## Parameters
+        - *(Optional)* `timeout`: The most seconds to wait, or `None` to wait as long as it takes.
+
+        ## Returns
+        - A token to pass to `release`, or `None` if `timeout` passed first.
+        """
+        with self._condition:
+            if (not self._condition.wait_for(lambda: self.in_flight < self.limit, timeout)):
+                return None
+            self.in_flight += 1
+            if (self.in_flight >= self.limit):
+                self._saturated = True
+            return self._generation
+
+
+
+    def release(self, token: int, seconds: float, ok: bool | None) -> None:
+        """
+        Records the outcome of a request admitted by `acquire`.
+
+        ## Parameters
+        - `token`: The token returned by `acquire`.
+        - `seconds`: How long the request took.
+        - `ok`: `False` if the request timed out or the server reported an overload or error,
+        or `None` if the outcome says nothing about the server (e.g. the request was cancelled).
+        """
+        with self._condition:
+            self.in_flight -= 1
+            if (ok is False):
+                self._failed(token, "failure")
+            elif (ok):
+                self._succeeded(seconds)
+            self._condition.notify_all()
+
+
+
+    def failed(self, token: int, reason: str = "failure") -> None:
+        """
+        Records a failure found after the request was released, e.g. an error payload in a response body.
+        """
+        with self._condition:
+            self._failed(token, reason)
+            self._condition.notify_all()
+
+
+
+    def _failed(self, token: int, reason: str) -> None:
+        # Requests admitted before the last decrease belong to the congestion event already handled
+        if (token != self._generation):
+            return
+        self._generation += 1
+        self._samples = []
+        self._saturated = False
+        self._set(max(self.minimum, int(self.limit * self.decrease)), reason)
+
+
+
+    def _succeeded(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        if (len(self._samples) < self.window):
+            return
+
+        ordered = sorted(self._samples)
+        p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+        steady = (self._baseline is None or p95 <= self._baseline * self.tolerance)
+        self._baseline = p95 if (self._baseline is None) else min(self._baseline, p95)
+        if (steady and self._saturated and self.limit < self.maximum):
+            self._set(min(self.maximum, self.limit + self.increase), f"p95 {p95 * 1000:.0f} ms steady")
+        self._samples = []
+        self._saturated = self.in_flight >= self.limit
+
+
+
+    def _set(self, limit: int, reason: str) -> None:
+        if (limit == self.limit):
+            return
+        self.limit = limit
+        self.history.append((time.monotonic() - self.started, limit, reason))
+        if (self.on_change is not None):
+            self.on_change(limit, reason)
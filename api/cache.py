@@ -0,0 +1,135 @@
+"""
+`api/cache.py`
+
+TTL cache for the site → device → object hierarchy of an enteliWEB server.
+"""
+import time
+import bisect
+import threading
+from typing import Hashable
+
+
+
+class HierarchyCache:
+    """
+    Caches site, device and object listings, each level with its own time-to-live.
+
+    Entries are keyed by a tuple whose elements follow the hierarchy (e.g. `(site,)` for a
+    device listing, `(site, device)` for an object listing), so invalidating a prefix drops
+    everything below it. All methods are thread-safe.
+
+    ## Init Parameters
+    - *(Optional)* `sites_ttl`: Seconds a site listing stays valid (defaults to `300`).
+    - *(Optional)* `devices_ttl`: Seconds a device listing stays valid (defaults to `60`).
+    - *(Optional)* `objects_ttl`: Seconds an object listing stays valid (defaults to `30`).
+
+    A TTL of `0` disables caching for that level.
+    """
+    LEVELS = ("sites", "devices", "objects")
+
+    def __init__(self, sites_ttl: float = 300, devices_ttl: float = 60, objects_ttl: float = 30) -> None:
+        """
+        """
+        self.ttl = {"sites": sites_ttl, "devices": devices_ttl, "objects": objects_ttl}
+        self.hits = dict.fromkeys(self.LEVELS, 0)
+        self.misses = dict.fromkeys(self.LEVELS, 0)
+        self._entries: dict[tuple[str, tuple], tuple[float, list]] = {}
+        self._lock = threading.Lock()
+
+
+
+    def get(self, level: str, key: tuple[Hashable, ...]) -> list | None:
+        """
+        Looks up a listing.
+
+        ## Parameters
+        - `level`: One of `sites`, `devices` or `objects`.
+        - `key`: The position of the listing in the hierarchy, e.g. `(site, device)`.
+
+        ## Returns
+        - A copy of the cached listing, or `None` if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get((level, key))
+            if (entry is None or entry[0] < time.monotonic()):
+                self._entries.pop((level, key), None)
+                self.misses[level] += 1
+                return None
+            self.hits[level] += 1
+            return list(entry[1])
+
+
+
+    def put(self, level: str, key: tuple[Hashable, ...], value: list) -> None:
+        """
+        Stores a listing, unless caching is disabled for its level.
+
+        ## Parameters
+        - `level`: One of `sites`, `devices` or `objects`.
+        - `key`: The position of the listing in the hierarchy, e.g. `(site, device)`.
+        - `value`: The listing to store. A copy is kept.
+        """
+        if (not self.ttl[level]):
+            return
+        with self._lock:
+            self._entries[(level, key)] = (time.monotonic() + self.ttl[level], list(value))
+
+
+
+    def add_object(self, key: tuple[Hashable, ...], object_id: str) -> None:
+        """
+        Adds an object to a cached object listing, keeping it sorted. Does nothing if the listing is not cached.
+
+        ## Parameters
+        - `key`: The `(site, device)` position of the object listing.
+        - `object_id`: The object id as listed by the server (e.g. `analog-value,1`).
+        """
+        with self._lock:
+            entry = self._entries.get(("objects", key))
+            if (entry is not None and object_id not in entry[1]):
+                bisect.insort(entry[1], object_id)
+
+
+
+    def remove_object(self, key: tuple[Hashable, ...], object_id: str) -> None:
+        """
+        Removes an object from a cached object listing. Does nothing if the listing is not cached.
+
+        ## Parameters
+        - `key`: The `(site, device)` position of the object listing.
+        - `object_id`: The object id as listed by the server (e.g. `analog-value,1`).
+        """
+        with self._lock:
+            entry = self._entries.get(("objects", key))
+            if (entry is not None and object_id in entry[1]):
+                entry[1].remove(object_id)
+
+
+
+    def invalidate(self, prefix: tuple[Hashable, ...] = ()) -> None:
+        """
+        Drops every listing at or below `prefix` in the hierarchy.
+
+        ## Parameters
+        - *(Optional)* `prefix`: E.g. `(site,)` drops the device listing of `site` and all of its object listings.
+        The default, `()`, clears the whole cache.
+        """
+        with self._lock:
+            for entry_key in [entry_key for entry_key in self._entries if (entry_key[1][:len(prefix)] == prefix)]:
+                del self._entries[entry_key]
+
+
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """
+        Returns the hit and miss counters and the number of cached listings per level.
+        """
+        with self._lock:
+            return {
+                level: {
+                    "hits": self.hits[level],
+                    "misses": self.misses[level],
+                    "entries": sum(1 for entry_level, _ in self._entries if (entry_level == level)),
+                }
+                for level in self.LEVELS
+            }
@@ -0,0 +1,204 @@
+"""
+`api/deadline.py`
+
+Per-endpoint timeouts and per-job deadlines for enteliWEB requests.
+
+Every request gets a connect and a read timeout chosen by the kind of endpoint it calls, so a hung
+controller or server fails the one request instead of stalling its caller forever. A `Deadline`
+bounds a whole job: while it is active, every request made by that job (including from worker
+threads started with `submit`) has its timeouts cut to the time left, and fails at once with
+`DeadlineExceeded` once the deadline passes or the job is cancelled.
+"""
+import time
+import contextvars
+from dataclasses import dataclass
+from typing import Any, Callable
+from concurrent.futures import Executor, Future
+
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Raised instead of sending a request once its job's deadline has passed or the job was cancelled.
+    """
+
+
+
+@dataclass(slots=True)
+class Timeout:
+    """
+    Connect and read timeouts of one kind of endpoint.
+
+    ### Attributes
+        - `connect` ( *float* ) -- Seconds to wait for the TCP connection.
+        - `read` ( *float* ) -- Seconds to wait for each read of the response.
+    """
+    connect: float
+    read: float
+
+
+
+TIMEOUTS: dict[str, Timeout] = {
+    # Object and property requests, listings
+    "default": Timeout(3.05, 30),
+    "login": Timeout(3.05, 15),
+    # `.multi` reads and writes wait on every device in the request
+    "multi": Timeout(3.05, 60),
+    # Starting and checking server tasks (database saves, object backups, copy/paste)
+    "task": Timeout(3.05, 30),
+    # Uploading, downloading and restoring database and object files
+    "transfer": Timeout(3.05, 300),
+    # `waitfordeviceonline` only answers once the devices have restarted
+    "wait": Timeout(3.05, 600),
+}
+
+
+
+_current: contextvars.ContextVar["Deadline | None"] = contextvars.ContextVar("deadline", default=None)
+
+
+
+class Deadline:
+    """
+    A time limit and cancellation flag for one job and all the requests it makes.
+
+    ## Init Parameters
+    - *(Optional)* `seconds`: Seconds from now until the deadline, or `None` for a job that can only be cancelled.
+
+    Entering the deadline makes it the current one for the calling thread (and for worker threads
+    started with `submit` inside it). A deadline entered inside another never outlasts it, and is
+    cancelled along with it.
+
+    ## Usage
+    ```python
+    with Deadline(60) as deadline:
+        for ref, value in api.read_properties(refs):
+            ...
+    # From another thread: deadline.cancel()
+    ```
+    """
+    def __init__(self, seconds: float | None = None) -> None:
+        """
+        """
+        self.at = None if (seconds is None) else time.monotonic() + seconds
+        self.parent: Deadline | None = None
+        self._cancelled = False
+        self._token: contextvars.Token | None = None
+
+
+
+    def __enter__(self) -> "Deadline":
+        self.parent = _current.get()
+        self._token = _current.set(self)
+        return self
+
+
+
+    def __exit__(self, *exc_info) -> None:
+        _current.reset(self._token)
+        self._token = None
+
+
+
+    def cancel(self) -> None:
+        """
+        Cancels the job: requests it has not sent yet fail with `DeadlineExceeded`.
+        """
+        self._cancelled = True
+
+
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled or (self.parent is not None and self.parent.cancelled)
+
+
+
+    def remaining(self) -> float | None:
+        """
+        Returns the seconds left (`0` once cancelled), or `None` if neither this deadline nor an enclosing one has a time limit.
+        """
+        if (self.cancelled):
+            return 0.0
+        remaining = None if (self.at is None) else max(0.0, self.at - time.monotonic())
+        outer = None if (self.parent is None) else self.parent.remaining()
+        if (remaining is None or outer is None):
+            return outer if (remaining is None) else remaining
+        return min(remaining, outer)
+
+
+
+    def check(self) -> None:
+        """
+        Raises `DeadlineExceeded` if the deadline has passed or the job was cancelled.
+        """
+        if (self.cancelled):
+            raise DeadlineExceeded("Job cancelled")
+        if (self.remaining() == 0):
+            raise DeadlineExceeded("Job deadline passed")
+
+
+
+def current() -> Deadline | None:
+    """
+    Returns the deadline of the job running in this context, or `None` if there is none.
+    """
+    return _current.get()
+
+
+
+def check() -> None:
+    """
+    Raises `DeadlineExceeded` if the current job's deadline has passed or the job was cancelled.
+    """
+    deadline = _current.get()
+    if (deadline is not None):
+        deadline.check()
+
+
+
+def remaining() -> float | None:
+    """
+    Returns the seconds left to the current job, or `None` if it has no time limit.
+    """
+    deadline = _current.get()
+    return None if (deadline is None) else deadline.remaining()
+
+
+
+def clamp(at: float) -> float:
+    """
+    Returns the earlier of a `time.monotonic()` value and the current job's deadline, e.g. to bound polling.
+    """
+    left = remaining()
+    return at if (left is None) else min(at, time.monotonic() + left)
+
+
+
+def request_timeout(endpoint: str = "default") -> tuple[float, float]:
+    """
+    Returns the `(connect, read)` timeouts for a request to a kind of endpoint, cut to the time left to the current job.
+
+    ## Parameters
+    - *(Optional)* `endpoint`: A key of `TIMEOUTS` (defaults to `"default"`).
+
+    ## Returns
+    - The timeouts, as accepted by `requests`.
+
+    ## Raises
+    - `DeadlineExceeded` if the current job's deadline has passed or the job was cancelled.
+    """
+    check()
+    timeout = TIMEOUTS.get(endpoint, TIMEOUTS["default"])
+    left = remaining()
+    if (left is None):
+        return (timeout.connect, timeout.read)
+    return (min(timeout.connect, left), min(timeout.read, left))
+
+
+
+def submit(executor: Executor, function: Callable[..., Any], *args) -> Future:
+    """
+    Submits `function(*args)` to an executor so that it runs under the caller's current deadline.
+    """
+    return executor.submit(contextvars.copy_context().run, function, *args)
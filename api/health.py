@@ -0,0 +1,224 @@
+"""
+`api/health.py`
+
+Negative cache of offline devices.
+
+A request to a controller that is offline only fails after the server's own BACnet timeout, so
+bulk work for that device would pay that timeout batch after batch. `DeviceHealth` counts each
+device's consecutive failures, marks it offline after a few, and from then on lets callers fail
+or set aside its work at once. A background thread rechecks offline devices with one cheap probe
+each per interval (more often for devices that parked work is waiting for), and marks them online
+again as soon as they answer.
+
+Only failures that show the device itself did not answer count: a request that failed in transit
+or timed out, or `.multi` items that all failed with one of `NO_RESPONSE_ERRORS`. An unknown object
+or property is an answer from an online device.
+"""
+import time
+import threading
+from collections import Counter
+from typing import Any, Callable, Hashable, Iterable
+
+
+
+# enteliWEB error codes meaning the device did not answer: "Request timed out" and "Device not responding"
+NO_RESPONSE_ERRORS = frozenset({"49", "50"})
+
+
+
+class DeviceHealth:
+    """
+    Tracks which devices are answering.
+
+    ## Init Parameters
+    - *(Optional)* `failures`: Consecutive failures after which a device is marked offline (defaults to `3`).
+    - *(Optional)* `interval`: Seconds between two probes of the same offline device (defaults to `10`).
+    - *(Optional)* `wait_interval`: Seconds between two probes of an offline device while a caller of `wait` is waiting for it (defaults to `1`).
+    - *(Optional)* `probe`: Checks one device with a cheap request, returning `True` if it answered.
+    Without it, devices stay offline until `record` or `reset` marks them online.
+    - *(Optional)* `on_change`: Called with the device and `True` (back online) or `False` (offline) when its state changes.
+
+    The first probe of a device is made as soon as it is marked offline, so a device marked offline
+    by mistake (e.g. a batch of writes to objects that do not exist) is back within one probe.
+    The background thread runs only while at least one device is offline.
+
+    ## Usage
+    ```python
+    health = DeviceHealth(probe=lambda device: ping(device))
+    if (health.online(device)):
+        ok = send(device)
+        health.record(device, ok)
+    ```
+    """
+    def __init__(
+        self,
+        failures: int = 3,
+        interval: float = 10.0,
+        wait_interval: float = 1.0,
+        probe: Callable[[Hashable], bool] | None = None,
+        on_change: Callable[[Hashable, bool], None] | None = None,
+    ) -> None:
+        """
+        """
+        self.failures = max(1, failures)
+        self.interval = interval
+        self.wait_interval = min(wait_interval, interval)
+        self.probe = probe
+        self.on_change = on_change
+        self.probes = 0
+        self._failures: dict[Hashable, int] = {}
+        # device -> time.monotonic() of its next probe
+        self._offline: dict[Hashable, float] = {}
+        # device -> number of `wait` calls waiting for it
+        self._waiting: Counter = Counter()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+        self._condition = threading.Condition()
+
+
+
+    def online(self, device: Hashable) -> bool:
+        """
+        Returns `False` if the device is marked offline.
+        """
+        with self._condition:
+            return device not in self._offline
+
+
+
+    def offline(self) -> list[Hashable]:
+        """
+        Returns the devices currently marked offline.
+        """
+        with self._condition:
+            return list(self._offline)
+
+
+
+    def record(self, device: Hashable, ok: bool) -> None:
+        """
+        Records the outcome of a request to a device.
+
+        ## Parameters
+        - `device`: The device.
+        - `ok`: `True` if the device answered, `False` if the request failed or the device did not respond.
+        """
+        with self._condition:
+            if (ok):
+                self._failures.pop(device, None)
+                changed = self._offline.pop(device, None) is not None
+            else:
+                self._failures[device] = self._failures.get(device, 0) + 1
+                changed = (device not in self._offline and self._failures[device] >= self.failures)
+                if (changed):
+                    self._offline[device] = time.monotonic()
+                    self._start()
+            self._condition.notify_all()
+        if (changed and self.on_change is not None):
+            self.on_change(device, ok)
+
+
+
+    def reset(self, device: Hashable | None = None) -> None:
+        """
+        Forgets the failures of one device, or of every device, marking them online.
+        """
+        with self._condition:
+            devices = list(self._offline) if (device is None) else [device]
+            for each in devices:
+                self._failures.pop(each, None)
+                self._offline.pop(each, None)
+            self._condition.notify_all()
+
+
+
+    def wait(self, devices: Iterable[Hashable], timeout: float | None = None) -> bool:
+        """
+        Blocks until any of the devices is online. While waiting, the devices are probed every `wait_interval`
+        seconds instead of every `interval`, so the wait ends soon after one of them is back.
+
+        ## Parameters
+        - `devices`: The devices to wait for.
+        - *(Optional)* `timeout`: The most seconds to wait, or `None` to wait as long as it takes.
+
+        ## Returns
+        - `True` if one of the devices is online, `False` if `timeout` passed first.
+        """
+        devices = list(devices)
+        with self._condition:
+            self._waiting.update(devices)
+            soon = time.monotonic() + self.wait_interval
+            for device in devices:
+                if (device in self._offline):
+                    self._offline[device] = min(self._offline[device], soon)
+            self._condition.notify_all()
+            try:
+                return self._condition.wait_for(lambda: any(device not in self._offline for device in devices), timeout)
+            finally:
+                self._waiting.subtract(devices)
+                self._waiting += Counter()
+
+
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns the devices marked offline, the devices with failures not yet enough to mark them offline, and the number of probes made.
+        """
+        with self._condition:
+            return {
+                "offline": list(self._offline),
+                "failing": {device: count for device, count in self._failures.items() if (device not in self._offline)},
+                "probes": self.probes,
+            }
+
+
+
+    def close(self) -> None:
+        """
+        Stops probing. Offline devices stay offline.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+
+    def _start(self) -> None:
+        if (self.probe is not None and self._thread is None and not self._closed):
+            self._thread = threading.Thread(target=self._run, name="DeviceHealth", daemon=True)
+            self._thread.start()
+
+
+
+    def _run(self) -> None:
+        """
+        Probes each offline device once per interval until none is left, marking those that answer online.
+        """
+        while (True):
+            with self._condition:
+                if (not self._offline or self._closed):
+                    self._thread = None
+                    return
+                now = time.monotonic()
+                due = [device for device, at in self._offline.items() if (at <= now)]
+                if (not due):
+                    self._condition.wait(min(self._offline.values()) - now)
+                    continue
+                for device in due:
+                    self._offline[device] = now + (self.wait_interval if (self._waiting[device]) else self.interval)
+
+            for device in due:
+                try:
+                    ok = bool(self.probe(device))
+                except Exception:
+                    ok = False
+                with self._condition:
+                    self.probes += 1
+                    if (ok and device in self._offline):
+                        self._failures.pop(device, None)
+                        del self._offline[device]
+                        self._condition.notify_all()
+                    else:
+                        ok = False
+                if (ok and self.on_change is not None):
+                    self.on_change(device, True)
@@ -0,0 +1,166 @@
+"""
+`api/limits.py`
+
+Per-device and per-network concurrency caps for bulk operations.
+
+Controllers behind MS/TP routers answer far slower than IP controllers, and every request to one
+MS/TP trunk shares its bandwidth. Bulk engines ask `ConcurrencyLimits` before sending work to a
+device, so each device and each BACnet network only ever has its own cap of requests in flight.
+Caps come from configuration, or are lowered automatically for devices and networks whose observed
+latency shows they are slow, so fast IP devices keep running at full speed.
+"""
+import threading
+from collections import Counter
+from typing import Any, Hashable
+
+
+
+class ConcurrencyLimits:
+    """
+    Tracks requests in flight per device and per network against their caps.
+
+    ## Init Parameters
+    - *(Optional)* `per_device`: The cap for a device that is not configured or slow (defaults to `2`),
+    or `None` to leave such devices uncapped, bounded only by the caller's own concurrency.
+    - *(Optional)* `per_network`: The cap for a network that is not configured or slow (defaults to `4`).
+    - *(Optional)* `networks`: Device address -> BACnet network number. Devices not in it have no network cap.
+    - *(Optional)* `device_caps`: Device address -> cap, overriding the default and any learned cap.
+    - *(Optional)* `network_caps`: Network number -> cap, overriding the default and any learned cap.
+    - *(Optional)* `slow`: Seconds of smoothed latency per request item (e.g. per property of a `.multi` read)
+    above which a device or network counts as slow (defaults to `0.1`), or `None` to never learn caps from latency.
+    - *(Optional)* `slow_cap`: The cap for a slow device or network (defaults to `1`).
+
+    Latency is smoothed per device and per network with an exponentially weighted moving average of
+    the durations passed to `release`. All methods are thread-safe.
+    """
+    def __init__(
+        self,
+        per_device: int | None = 2,
+        per_network: int = 4,
+        networks: dict[str, Hashable] | None = None,
+        device_caps: dict[str, int] | None = None,
+        network_caps: dict[Hashable, int] | None = None,
+        slow: float | None = 0.1,
+        slow_cap: int = 1,
+    ) -> None:
+        """
+        """
+        self.per_device = None if (per_device is None) else max(1, per_device)
+        self.per_network = max(1, per_network)
+        self.networks = {str(device): network for device, network in (networks or {}).items()}
+        self.device_caps = {str(device): max(1, cap) for device, cap in (device_caps or {}).items()}
+        self.network_caps = {network: max(1, cap) for network, cap in (network_caps or {}).items()}
+        self.slow = slow
+        self.slow_cap = max(1, slow_cap)
+        self._device_counts: Counter = Counter()
+        self._network_counts: Counter = Counter()
+        self._device_latency: dict[str, float] = {}
+        self._network_latency: dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+
+
+
+    def network(self, device: str) -> Hashable:
+        """
+        Returns the configured network of a device, or `None` if it has none.
+        """
+        return self.networks.get(str(device))
+
+
+
+    def device_cap(self, device: str) -> int | None:
+        """
+        Returns the current cap of a device: its configured cap, else `slow_cap` if it is slow, else `per_device` (`None` for no cap).
+        """
+        device = str(device)
+        if (device in self.device_caps):
+            return self.device_caps[device]
+        if (self.slow is not None and self._device_latency.get(device, 0.0) > self.slow):
+            return self.slow_cap if (self.per_device is None) else min(self.slow_cap, self.per_device)
+        return self.per_device
+
+
+
+    def network_cap(self, network: Hashable) -> int:
+        """
+        Returns the current cap of a network: its configured cap, else `slow_cap` if it is slow, else `per_network`.
+        """
+        if (network in self.network_caps):
+            return self.network_caps[network]
+        if (self.slow is not None and self._network_latency.get(network, 0.0) > self.slow):
+            return min(self.slow_cap, self.per_network)
+        return self.per_network
+
+
+
+    def acquire(self, device: str | None, network: Hashable = None) -> bool:
+        """
+        Takes a slot on a device and its network if both are below their caps. Never blocks.
+
+        ## Parameters
+        - `device`: The device address, or `None` for work that is not tied to one device.
+        - *(Optional)* `network`: The device's network. Defaults to the configured network of the device.
+
+        ## Returns
+        - `True` if the slot was taken and must be given back with `release`, `False` if either cap is reached.
+        """
+        device = None if (device is None) else str(device)
+        network = self.network(device) if (network is None and device is not None) else network
+        with self._lock:
+            cap = None if (device is None) else self.device_cap(device)
+            if (cap is not None and self._device_counts[device] >= cap):
+                return False
+            if (network is not None and self._network_counts[network] >= self.network_cap(network)):
+                return False
+            self._device_counts[device] += 1
+            self._network_counts[network] += 1
+            return True
+
+
+
+    def release(self, device: str | None, network: Hashable = None, seconds: float | None = None) -> None:
+        """
+        Gives back a slot taken with `acquire`.
+
+        ## Parameters
+        - `device`: The device address passed to `acquire`.
+        - *(Optional)* `network`: The network passed to `acquire`, if any.
+        - *(Optional)* `seconds`: How long the device took per item of the request, to learn its latency.
+        Leave it out for work whose duration does not reflect the device's speed (e.g. a database backup).
+        """
+        device = None if (device is None) else str(device)
+        network = self.network(device) if (network is None and device is not None) else network
+        with self._lock:
+            self._device_counts[device] -= 1
+            self._network_counts[network] -= 1
+            if (seconds is not None):
+                if (device is not None):
+                    self._device_latency[device] = self._smooth(self._device_latency.get(device), seconds)
+                if (network is not None):
+                    self._network_latency[network] = self._smooth(self._network_latency.get(network), seconds)
+
+
+
+    @staticmethod
+    def _smooth(average: float | None, sample: float, weight: float = 0.3) -> float:
+        return sample if (average is None) else average + weight * (sample - average)
+
+
+
+    def stats(self) -> dict[str, dict[Any, dict[str, Any]]]:
+        """
+        Returns the requests in flight, current cap and smoothed latency of every device and network seen so far.
+        """
+        with self._lock:
+            devices = set(self._device_latency) | {device for device in self._device_counts if (device is not None)}
+            networks = set(self._network_latency) | {network for network in self._network_counts if (network is not None)}
+            return {
+                "devices": {
+                    device: {"in_flight": self._device_counts[device], "cap": self.device_cap(device), "latency": self._device_latency.get(device)}
+                    for device in sorted(devices)
+                },
+                "networks": {
+                    network: {"in_flight": self._network_counts[network], "cap": self.network_cap(network), "latency": self._network_latency.get(network)}
+                    for network in sorted(networks, key=str)
+                },
+            }
@@ -0,0 +1,163 @@
+"""
+`api/manifest.py`
+
+Per-object index of object backups (`.zob` files and `.zip` archives of them).
+
+A bulk object backup is spread over many archives. The manifest records which archive, and which
+entry inside it, holds each object, so a single object can be found and extracted without opening
+every archive.
+"""
+import os
+import json
+import zipfile
+from dataclasses import asdict, dataclass
+from api.transfer import CHUNK_SIZE
+
+
+
+@dataclass(slots=True)
+class ManifestEntry:
+    """
+    Where one object is stored.
+
+    ### Attributes
+        - `file` ( *string* ) -- The `.zob` or `.zip` file, relative to the manifest's folder.
+        - `entry` ( *string* ) -- The entry inside a `.zip` file, or `None` if `file` is the object's `.zob` file.
+        - `size` ( *int* ) -- The uncompressed size of the object's `.zob` data.
+    """
+    file: str
+    entry: str | None
+    size: int
+
+
+
+def archive_entries(path: str, objects: list[str]) -> dict[str, ManifestEntry]:
+    """
+    Finds the entries of an object backup file that hold each object.
+
+    Zip entries are matched to objects by name only (`AV1.zob` holds `AV1`, case-insensitively):
+    assigning the rest by position could point an object at another object's data.
+
+    ## Parameters
+    - `path`: A `.zob` file holding one object, or a `.zip` archive of `.zob` files, told apart by extension.
+    - `objects`: The objects saved in the file, as type abbreviation and instance (e.g. `AV1`), in request order.
+
+    ## Returns
+    - Object -> `ManifestEntry`, for every object. `file` is the base name of `path`.
+
+    ## Raises
+    - `ValueError` if a `.zip` archive holds no entry named after one of the objects.
+    """
+    file = os.path.basename(path)
+    if (not file.lower().endswith(".zip")):
+        return {objects[0]: ManifestEntry(file, None, os.path.getsize(path))} if (len(objects) == 1) else {}
+
+    with zipfile.ZipFile(path) as archive:
+        infos = [info for info in archive.infolist() if (not info.is_dir())]
+    stems = {os.path.splitext(os.path.basename(info.filename))[0].upper(): info for info in infos}
+    found = {
+        obj: ManifestEntry(file, stems[obj.upper()].filename, stems[obj.upper()].file_size)
+        for obj in objects
+        if (obj.upper() in stems)
+    }
+    if (len(found) < len(objects)):
+        claimed = {entry.entry for entry in found.values()}
+        raise ValueError(
+            f"{file}: no entry for {', '.join(obj for obj in objects if (obj not in found))} "
+            f"(unmatched entries: {', '.join(info.filename for info in infos if (info.filename not in claimed)) or 'none'})"
+        )
+    return found
+
+
+
+class ObjectManifest:
+    """
+    Index of object references to the backup files holding them, stored as JSON.
+
+    ## Init Parameters
+    - `path`: The manifest file. It is loaded if it exists; backup files are looked up in its folder.
+
+    ## Usage
+    ```python
+    manifest = ObjectManifest("backups/manifest.json")
+    manifest.extract("//MainSite/100.AV1", "AV1.zob")
+    ```
+    """
+    def __init__(self, path: str) -> None:
+        """
+        """
+        self.path = path
+        self.folder = os.path.dirname(os.path.abspath(path))
+        self.objects: dict[str, ManifestEntry] = {}
+        if (os.path.exists(path)):
+            with open(path, "r") as f:
+                self.objects = {ref: ManifestEntry(**entry) for ref, entry in json.load(f)["objects"].items()}
+
+
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+
+
+    def add(self, ref: str, entry: ManifestEntry) -> None:
+        """
+        Records where an object is stored, replacing any earlier entry for it.
+        """
+        self.objects[ref] = entry
+
+
+
+    def discard(self, files: set[str]) -> None:
+        """
+        Forgets every object stored in one of `files` (base names, as in `ManifestEntry.file`), e.g. before they are rewritten.
+        """
+        self.objects = {ref: entry for ref, entry in self.objects.items() if (entry.file not in files)}
+
+
+
+    def find(self, ref: str) -> ManifestEntry | None:
+        """
+        Returns where an object is stored, or `None` if the manifest does not list it.
+        """
+        return self.objects.get(ref)
+
+
+
+    def extract(self, ref: str, path: str) -> str | None:
+        """
+        Writes one object out as a `.zob` file, reading only its own entry from its archive.
+
+        ## Parameters
+        - `ref`: The object's `wsbac` reference (e.g. `//MainSite/100.AV1`).
+        - `path`: The `.zob` file to write.
+
+        ## Returns
+        - `path`, or `None` if the manifest does not list the object.
+        """
+        entry = self.objects.get(ref)
+        if (entry is None):
+            return None
+
+        source = os.path.join(self.folder, entry.file)
+        with open(path, "wb") as out:
+            if (entry.entry is None):
+                with open(source, "rb") as f:
+                    while (chunk := f.read(CHUNK_SIZE)):
+                        out.write(chunk)
+            else:
+                with zipfile.ZipFile(source) as archive, archive.open(entry.entry) as f:
+                    while (chunk := f.read(CHUNK_SIZE)):
+                        out.write(chunk)
+        return path
+
+
+
+    def save(self) -> None:
+        """
+        Writes the manifest, replacing the file only once it is complete.
+        """
+        partial = self.path + ".part"
+        with open(partial, "w") as f:
+            json.dump({"objects": {ref: asdict(entry) for ref, entry in sorted(self.objects.items())}}, f, indent=1)
+        os.replace(partial, self.path)
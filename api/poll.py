@@ -0,0 +1,102 @@
+"""
+`api/poll.py`
+
+Adaptive polling for long-running server tasks (database saves, copy/paste tasks).
+
+Checks start fast and back off exponentially with jitter up to a ceiling, so short tasks
+finish close to their real duration while long ones do not flood the server.
+"""
+import time
+import random
+import threading
+from typing import Any, Callable, Iterator
+from api.deadline import clamp
+
+
+
+class Poller:
+    """
+    Polls a check function with exponential backoff and jitter until it succeeds or a deadline passes.
+
+    ## Init Parameters
+    - *(Optional)* `initial`: Seconds to wait before the second check (defaults to `0.1`).
+    - *(Optional)* `factor`: Multiplier applied to the wait after every check (defaults to `1.5`).
+    - *(Optional)* `maximum`: Longest wait between two checks, in seconds (defaults to `5`).
+    - *(Optional)* `jitter`: Fraction by which each wait is randomly shortened or lengthened (defaults to `0.2`),
+    so that many pollers started together do not check in lockstep.
+    - *(Optional)* `timeout`: Seconds to keep polling when `poll` is not given a deadline (defaults to `500`).
+
+    The `polls`, `checks` and `waited` counters accumulate over every call and are thread-safe,
+    so one poller can be shared by concurrent callers.
+    """
+    def __init__(self, initial: float = 0.1, factor: float = 1.5, maximum: float = 5, jitter: float = 0.2, timeout: float = 500) -> None:
+        """
+        """
+        self.initial = initial
+        self.factor = factor
+        self.maximum = maximum
+        self.jitter = jitter
+        self.timeout = timeout
+        self.polls = 0
+        self.checks = 0
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+
+
+    def delays(self) -> Iterator[float]:
+        """
+        Yields the successive waits between checks, without a deadline.
+        """
+        delay = self.initial
+        while (True):
+            yield max(0.0, delay * random.uniform(1 - self.jitter, 1 + self.jitter))
+            delay = min(self.maximum, delay * self.factor)
+
+
+
+    def poll(self, check: Callable[[], Any], deadline: float | None = None, timeout: float | None = None) -> Any:
+        """
+        Calls `check` until it returns something other than `None`.
+
+        ## Parameters
+        - `check`: A function returning `None` while the task is still running, and its result once it is done.
+        - *(Optional)* `deadline`: A `time.monotonic()` value after which polling stops.
+        - *(Optional)* `timeout`: Seconds from now after which polling stops. Ignored if `deadline` is given,
+        and defaults to the poller's `timeout`.
+
+        Polling never outlasts the current job's `api.deadline.Deadline`, if there is one.
+
+        ## Returns
+        - The first result of `check` that is not `None`, or `None` if the deadline passed first.
+        A last check is always made at the deadline.
+        """
+        if (deadline is None):
+            deadline = time.monotonic() + (self.timeout if (timeout is None) else timeout)
+        deadline = clamp(deadline)
+
+        checks, waited = 0, 0.0
+        try:
+            for delay in self.delays():
+                checks += 1
+                result = check()
+                remaining = deadline - time.monotonic()
+                if (result is not None or remaining <= 0):
+                    return result
+                delay = min(delay, remaining)
+                time.sleep(delay)
+                waited += delay
+        finally:
+            with self._lock:
+                self.polls += 1
+                self.checks += checks
+                self.waited += waited
+
+
+
+    def stats(self) -> dict[str, float]:
+        """
+        Returns the number of `poll` calls, the checks they made and the seconds they spent waiting.
+        """
+        with self._lock:
+            return {"polls": self.polls, "checks": self.checks, "waited": self.waited}
@@ -0,0 +1,204 @@
+"""
+`api/refs.py`
+
+Compact BACnet object references and the object type registry.
+
+The registry is built once from `og/common.OBJECT_NAME_MAP` and maps both ways between
+abbreviations (`AI`), full type names (`analog-input`) and small integer type codes.
+"""
+import sys
+from og.common import OBJECT_NAME_MAP
+
+
+
+# Type code -> abbreviation / full name, in `OBJECT_NAME_MAP` order
+ABBREVIATIONS: tuple[str, ...] = tuple(OBJECT_NAME_MAP)
+TYPE_NAMES: tuple[str, ...] = tuple(OBJECT_NAME_MAP.values())
+
+# Abbreviation or full name -> type code
+_CODES: dict[str, int] = {
+    **{name: code for code, name in enumerate(TYPE_NAMES)},
+    **{abbreviation: code for code, abbreviation in enumerate(ABBREVIATIONS)},
+    **{abbreviation.upper(): code for code, abbreviation in enumerate(ABBREVIATIONS)},
+}
+
+
+
+def type_code(object_type: str | int) -> int:
+    """
+    Resolves an object type to its integer code.
+
+    ## Parameters
+    - `object_type`: An abbreviation (`AI`, case-insensitive), a full type name (`analog-input`) or a type code.
+
+    ## Returns
+    - The type code.
+
+    ## Raises
+    - `ValueError` if the type is not in the registry.
+    """
+    if (isinstance(object_type, int)):
+        if (0 <= object_type < len(ABBREVIATIONS)):
+            return object_type
+    else:
+        code = _CODES.get(object_type)
+        if (code is None):
+            code = _CODES.get(object_type.upper())
+        if (code is not None):
+            return code
+    raise ValueError(f"Unknown BACnet object type: {object_type!r}")
+
+
+
+def abbreviation(object_type: str) -> str:
+    """
+    Resolves an object type (e.g. `analog-input`) to its abbreviation (e.g. `AI`).
+
+    ## Returns
+    - The abbreviation, or an empty string if the type is unknown.
+    """
+    code = _CODES.get(object_type)
+    return "" if (code is None) else ABBREVIATIONS[code]
+
+
+
+def type_name(object_type: str) -> str:
+    """
+    Resolves an object type (e.g. `AI`) to its full name (e.g. `analog-input`).
+
+    ## Returns
+    - The full type name, or `object_type` unchanged if the type is unknown.
+    """
+    code = _CODES.get(object_type)
+    return object_type if (code is None) else TYPE_NAMES[code]
+
+
+
+class ObjectRef:
+    """
+    Hashable reference to one BACnet object.
+
+    Site and device strings are interned and the type is stored as an integer code, so large
+    indexes of references stay small. The REST path and the `wsbac` reference are rendered on
+    first use and cached. Instances should be treated as immutable.
+
+    ## Init Parameters
+    - `site`: The site that contains the device.
+    - `device`: The device address.
+    - `object_type`: An abbreviation, full type name or type code (see `type_code`).
+    - `instance`: The object instance.
+    """
+    __slots__ = ("site", "device", "code", "instance", "_hash", "_path", "_wsbac")
+
+    def __init__(self, site: str, device: str | int, object_type: str | int, instance: str | int) -> None:
+        """
+        """
+        self.site = sys.intern(site)
+        self.device = sys.intern(str(device))
+        self.code = type_code(object_type)
+        self.instance = int(instance)
+        self._hash = hash((self.site, self.device, self.code, self.instance))
+        self._path: str | None = None
+        self._wsbac: str | None = None
+
+
+
+    @classmethod
+    def from_object_id(cls, site: str, device: str | int, object_id: str) -> "ObjectRef":
+        """
+        Builds a reference from an object id as listed by the REST API (e.g. `analog-input,1`).
+        """
+        object_type, instance = object_id.split(",", 1)
+        return cls(site, device, object_type, instance)
+
+
+
+    @classmethod
+    def from_wsbac(cls, ref: str) -> "ObjectRef":
+        """
+        Builds a reference from a `wsbac` reference (e.g. `//MainSite/100.AI1`).
+        """
+        site, rest = ref.lstrip("/").split("/", 1)
+        device, obj = rest.split(".", 1)
+        split = len(obj.rstrip("0123456789"))
+        return cls(site, device, obj[:split], obj[split:])
+
+
+
+    @classmethod
+    def device_ref(cls, site: str, device: str | int) -> "ObjectRef":
+        """
+        Builds a reference to the device object of a device (e.g. `//MainSite/100.DEV100`).
+        """
+        return cls(site, device, "DEV", device)
+
+
+
+    @property
+    def type_name(self) -> str:
+        return TYPE_NAMES[self.code]
+
+
+
+    @property
+    def abbreviation(self) -> str:
+        return ABBREVIATIONS[self.code]
+
+
+
+    @property
+    def object_id(self) -> str:
+        """
+        The object id as used by the REST API, e.g. `analog-input,1`.
+        """
+        return f"{TYPE_NAMES[self.code]},{self.instance}"
+
+
+
+    @property
+    def path(self) -> str:
+        """
+        The REST path below `/api/.bacnet/`, e.g. `MainSite/100/analog-input,1`.
+        """
+        if (self._path is None):
+            self._path = f"{self.site}/{self.device}/{TYPE_NAMES[self.code]},{self.instance}"
+        return self._path
+
+
+
+    @property
+    def wsbac(self) -> str:
+        """
+        The reference as used by the `/wsbac` endpoints, e.g. `//MainSite/100.AI1`.
+        """
+        if (self._wsbac is None):
+            self._wsbac = f"//{self.site}/{self.device}.{ABBREVIATIONS[self.code]}{self.instance}"
+        return self._wsbac
+
+
+
+    def __eq__(self, other: object) -> bool:
+        if (not isinstance(other, ObjectRef)):
+            return NotImplemented
+        return (
+            self._hash == other._hash
+            and self.instance == other.instance
+            and self.code == other.code
+            and self.device is other.device
+            and self.site is other.site
+        )
+
+
+
+    def __hash__(self) -> int:
+        return self._hash
+
+
+
+    def __lt__(self, other: "ObjectRef") -> bool:
+        return (self.site, self.device, self.code, self.instance) < (other.site, other.device, other.code, other.instance)
+
+
+
+    def __repr__(self) -> str:
+        return f"ObjectRef({self.wsbac!r})"
@@ -0,0 +1,122 @@
+"""
+`api/response.py`
+
+Single-parse handling of enteliWEB responses.
+
+Each response body is decoded once, with `orjson` if it is installed and the standard `json`
+module otherwise, and turned into a `Result` carrying the status, the enteliWEB error code and
+the decoded payload. Decode time and volume are counted in `PARSE_STATS`.
+"""
+import json
+import time
+import threading
+from typing import Any
+from dataclasses import dataclass
+
+try:
+    import orjson
+    CODEC = "orjson"
+    _loads = orjson.loads
+except ImportError:
+    CODEC = "json"
+    _loads = json.loads
+
+
+
+class ParseStats:
+    """
+    Thread-safe counters for response decoding.
+
+    ### Attributes
+        - `parses` ( *int* ) -- Number of bodies decoded.
+        - `bytes` ( *int* ) -- Total size of the decoded bodies.
+        - `seconds` ( *float* ) -- Total time spent decoding.
+    """
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+
+
+    def reset(self) -> None:
+        with self._lock:
+            self.parses = 0
+            self.bytes = 0
+            self.seconds = 0.0
+
+
+
+    def add(self, size: int, seconds: float) -> None:
+        with self._lock:
+            self.parses += 1
+            self.bytes += size
+            self.seconds += seconds
+
+
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {"codec": CODEC, "parses": self.parses, "bytes": self.bytes, "seconds": self.seconds}
+
+
+
+PARSE_STATS = ParseStats()
+
+
+
+def loads(body: bytes | str) -> Any:
+    """
+    Decodes a JSON body with the fastest available codec, counting it in `PARSE_STATS`.
+    """
+    start = time.perf_counter()
+    payload = _loads(body)
+    PARSE_STATS.add(len(body), time.perf_counter() - start)
+    return payload
+
+
+
+@dataclass(slots=True)
+class Result:
+    """
+    Outcome of one enteliWEB request.
+
+    ### Attributes
+        - `ok` ( *bool* ) -- `True` if the HTTP status is 2xx and the body carries no enteliWEB error.
+        - `status` ( *int* ) -- The HTTP status code.
+        - `code` ( *string* ) -- The enteliWEB error code if there is one, else the HTTP status code (`203` is reported as `200`).
+        - `message` ( *string* ) -- The enteliWEB error text if there is one, else the HTTP reason phrase.
+        - `payload` ( *Any* ) -- The decoded JSON body, or `None` if the body is empty or not JSON.
+    """
+    ok: bool
+    status: int
+    code: str
+    message: str
+    payload: Any = None
+
+
+
+def parse(status: int, reason: str, body: bytes | str) -> Result:
+    """
+    Decodes a response body once and checks it for errors.
+
+    ## Parameters
+    - `status`: The HTTP status code.
+    - `reason`: The HTTP reason phrase.
+    - `body`: The raw response body.
+
+    ## Returns
+    - The `Result` of the request.
+    """
+    payload = None
+    if (body and 200 <= status < 300):
+        try:
+            payload = loads(body)
+        except ValueError:
+            payload = None
+
+    if (isinstance(payload, dict) and "error" in payload and str(payload["error"]) != "-1"):
+        return Result(False, status, str(payload["error"]), payload.get("errorText", ""), payload)
+
+    if (status == 203):
+        return Result(True, status, "200", "OK", payload)
+    return Result(200 <= status < 300, status, str(status), reason, payload)
@@ -0,0 +1,193 @@
+"""
+`api/scheduler.py`
+
+Bounded parallel execution of per-device jobs (database backups, loads, object saves).
+
+Jobs run on a thread pool, with separate caps on how many run at once in total, against one
+server, on one device and on one BACnet network, so a fleet operation can go as fast as the slowest
+shared resource allows without flooding any single server or MS/TP trunk.
+"""
+import time
+import statistics
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Generator, Hashable, Iterable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from api.limits import ConcurrencyLimits
+from api.deadline import Deadline, check, submit
+
+
+
+@dataclass(slots=True)
+class Job:
+    """
+    One unit of work, usually for one device.
+
+    ### Attributes
+        - `key` ( *Hashable* ) -- Identifies the job in results and progress, e.g. the device address.
+        - `function` ( *Callable* ) -- Called with `args` to do the work. A falsy return value or an exception marks the job as failed.
+        - `args` ( *tuple* ) -- Positional arguments for `function`.
+        - `server` ( *Hashable* ) -- The server the job talks to, or `None` for no per-server cap.
+        - `network` ( *Hashable* ) -- The BACnet network the job talks to, or `None` for the device's network in the scheduler's `limits`.
+        - `device` ( *Hashable* ) -- The device the job talks to, or `None` for no per-device cap.
+        - `timeout` ( *float* ) -- Seconds the job may run, across all the requests it makes, or `None` for the scheduler's `job_timeout`.
+    """
+    key: Hashable
+    function: Callable[..., Any]
+    args: tuple = ()
+    server: Hashable = None
+    network: Hashable = None
+    device: Hashable = None
+    timeout: float | None = None
+
+
+
+@dataclass(slots=True)
+class JobResult:
+    """
+    Outcome of one `Job`.
+
+    ### Attributes
+        - `job` ( *Job* ) -- The job.
+        - `ok` ( *bool* ) -- `True` if the job returned a truthy value without raising.
+        - `value` ( *Any* ) -- The return value of the job's function.
+        - `error` ( *BaseException* ) -- The exception raised by the job, if any.
+        - `seconds` ( *float* ) -- How long the job ran.
+    """
+    job: Job
+    ok: bool
+    value: Any = None
+    error: BaseException | None = None
+    seconds: float = 0.0
+
+
+
+@dataclass(slots=True)
+class Summary:
+    """
+    Running totals over the results of a scheduler run.
+
+    `skipped` holds jobs that were never run, e.g. because a rollout stopped early.
+    """
+    total: int = 0
+    ok: int = 0
+    failed: list[Hashable] = field(default_factory=list)
+    skipped: list[Hashable] = field(default_factory=list)
+    durations: list[float] = field(default_factory=list)
+    started: float = field(default_factory=time.monotonic)
+
+    def add(self, result: JobResult) -> None:
+        self.durations.append(result.seconds)
+        if (result.ok):
+            self.ok += 1
+        else:
+            self.failed.append(result.job.key)
+
+    def __str__(self) -> str:
+        elapsed = time.monotonic() - self.started
+        text = f"{len(self.durations)}/{self.total} jobs: {self.ok} OK, {len(self.failed)} failed"
+        if (self.skipped):
+            text += f", {len(self.skipped)} skipped"
+        text += f" in {elapsed:.1f} s"
+        if (self.durations):
+            text += f" (per job p50 {statistics.median(self.durations):.1f} s, max {max(self.durations):.1f} s)"
+        return text
+
+
+
+class JobScheduler:
+    """
+    Runs jobs in parallel under total, per-server, per-device and per-network concurrency caps.
+
+    ## Init Parameters
+    - *(Optional)* `workers`: The maximum number of jobs running at once (defaults to `16`).
+    - *(Optional)* `per_server`: The maximum number of jobs running at once against one server (defaults to `8`).
+    - *(Optional)* `per_network`: The maximum number of jobs running at once on one BACnet network (defaults to `2`).
+    Ignored if `limits` is given.
+    - *(Optional)* `limits`: The per-device and per-network caps, e.g. shared with other bulk operations.
+    Defaults to `ConcurrencyLimits` with no per-device cap and `per_network` jobs per network.
+    - *(Optional)* `job_timeout`: Seconds each job may run, for jobs without their own `timeout`, or `None` for no limit.
+
+    Jobs start in the order given, except that a job whose server, device or network is at its cap is
+    passed over until a slot frees up, so one busy network does not hold up the others.
+
+    Each job runs under its own `api.deadline.Deadline`, within the caller's current one, so every request it
+    makes is cut to the time it has left. A job that runs out of time fails with `DeadlineExceeded`.
+    """
+    def __init__(self, workers: int = 16, per_server: int = 8, per_network: int = 2, limits: ConcurrencyLimits | None = None, job_timeout: float | None = None) -> None:
+        """
+        """
+        self.workers = max(1, workers)
+        self.per_server = max(1, per_server)
+        self.per_network = max(1, per_network)
+        self.limits = ConcurrencyLimits(per_device=self.workers, per_network=per_network, slow=None) if (limits is None) else limits
+        self.job_timeout = job_timeout
+        self.summary = Summary()
+
+
+
+    def run(self, jobs: Iterable[Job], progress: Callable[[JobResult, Summary], None] | None = None) -> Generator[JobResult, None, None]:
+        """
+        Runs the jobs and yields their results as they complete.
+
+        ## Parameters
+        - `jobs`: The jobs to run.
+        - *(Optional)* `progress`: Called in the caller's thread after each job completes, with its result and the running `summary`.
+
+        ## Yields
+        - A `JobResult` per job, in completion order. The totals are kept in `summary`.
+
+        If the caller's deadline passes or is cancelled, no more jobs start and `DeadlineExceeded` is raised
+        once the running ones have stopped. Their slots are given back however the run ends.
+        """
+        queue = deque(jobs)
+        self.summary = Summary(total=len(queue))
+        servers: Counter = Counter()
+        running: dict[Future, tuple[Job, float]] = {}
+
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            while (queue or running):
+                check()
+                waiting: deque[Job] = deque()
+                while (queue and len(running) < self.workers):
+                    job = queue.popleft()
+                    if ((job.server is not None and servers[job.server] >= self.per_server)
+                        or not self.limits.acquire(job.device, job.network)):
+                        waiting.append(job)
+                        continue
+                    servers[job.server] += 1
+                    running[submit(executor, self._call, job)] = (job, time.monotonic())
+                waiting.extend(queue)
+                queue = waiting
+
+                if (not running):
+                    # Every queued job is held at its cap by other operations sharing `limits`
+                    time.sleep(0.01)
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job, start = running.pop(future)
+                    servers[job.server] -= 1
+                    self.limits.release(job.device, job.network)
+                    try:
+                        value = future.result()
+                        result = JobResult(job, bool(value), value, seconds=time.monotonic() - start)
+                    except Exception as e:
+                        result = JobResult(job, False, error=e, seconds=time.monotonic() - start)
+                    self.summary.add(result)
+                    if (progress is not None):
+                        progress(result, self.summary)
+                    yield result
+        finally:
+            # Drop jobs not started yet and let running ones stop within their timeouts before giving back their slots
+            executor.shutdown(wait=True, cancel_futures=True)
+            for job, _ in running.values():
+                self.limits.release(job.device, job.network)
+
+
+
+    def _call(self, job: Job) -> Any:
+        with Deadline(self.job_timeout if (job.timeout is None) else job.timeout):
+            return job.function(*job.args)
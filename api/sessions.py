@@ -0,0 +1,177 @@
+"""
+`api/sessions.py`
+
+Pool of logged-in HTTP sessions to one enteliWEB server.
+
+enteliWEB processes the requests of one `enteliWebID` session one at a time, so concurrent requests
+over a single login queue up on the server. The pool logs in several times with the same credentials
+and hands each request the session with the fewest requests in flight, so throughput grows with the
+number of sessions. A session whose login expires is logged in again when a request is refused.
+"""
+import threading
+import requests
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Generator
+from concurrent.futures import ThreadPoolExecutor
+
+
+
+@dataclass(slots=True)
+class SessionLogin:
+    """
+    The outcome of one successful login.
+
+    ### Attributes
+        - `session_id` ( *string* ) -- The session ID.
+        - `csrf_token` ( *string* ) -- The CSRF token.
+        - `cookies` ( *requests.cookies.RequestsCookieJar* ) -- The cookies to send with the session's requests.
+        - `params` ( *dict* ) -- The query parameters to send with the session's requests (the CSRF token).
+    """
+    session_id: str
+    csrf_token: str
+    cookies: requests.cookies.RequestsCookieJar
+    params: dict[str, str]
+
+
+
+@dataclass(slots=True)
+class PooledSession:
+    """
+    One login in a `SessionPool`.
+
+    ### Attributes
+        - `index` ( *int* ) -- The position of the session in the pool.
+        - `session` ( *requests.Session* ) -- The HTTP session carrying the login's cookie and CSRF token.
+        - `session_id` ( *string* ) -- The session ID, or an empty string if not logged in.
+        - `csrf_token` ( *string* ) -- The CSRF token of the login.
+        - `in_flight` ( *int* ) -- The number of requests currently using the session.
+        - `requests` ( *int* ) -- The number of requests sent over the session.
+        - `logins` ( *int* ) -- The number of times the session has logged in.
+        - `lock` ( *threading.Lock* ) -- Held while the session logs in.
+    """
+    index: int
+    session: requests.Session
+    session_id: str = ""
+    csrf_token: str = ""
+    in_flight: int = 0
+    requests: int = 0
+    logins: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+
+class SessionPool:
+    """
+    Hands out logged-in sessions, least loaded first.
+
+    ## Init Parameters
+    - `size`: The number of sessions (logins) in the pool.
+    - `factory`: Creates a new `requests.Session`, e.g. with its connection pool mounted.
+    - `login`: Logs in once, returning a `SessionLogin`, or `None` if the login failed. It must not touch the
+    pooled sessions: their cookies and query parameters are swapped for the new ones under the pool lock,
+    so requests other threads are sending over a session never see it half logged in.
+
+    ## Usage
+    ```python
+    pool = SessionPool(4, requests.Session, login)
+    pool.login()
+    with pool.acquire() as pooled:
+        r = pooled.session.get(url)
+    ```
+    """
+    def __init__(self, size: int, factory: Callable[[], requests.Session], login: Callable[[], SessionLogin | None]) -> None:
+        """
+        """
+        self.sessions = [PooledSession(i, factory()) for i in range(max(1, size))]
+        self._login = login
+        self._lock = threading.Lock()
+
+
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+
+
+    def login(self) -> int:
+        """
+        Logs every session in, in parallel.
+
+        ## Returns
+        - The number of sessions that logged in.
+        """
+        with ThreadPoolExecutor(max_workers=len(self.sessions)) as executor:
+            return sum(executor.map(self._relogin, self.sessions))
+
+
+
+    @contextmanager
+    def acquire(self) -> Generator[PooledSession, None, None]:
+        """
+        Takes the logged-in session with the fewest requests in flight for the duration of a request.
+        If no session is logged in, the first one is used.
+        """
+        with self._lock:
+            candidates = [pooled for pooled in self.sessions if (pooled.session_id)] or self.sessions[:1]
+            pooled = min(candidates, key=lambda each: (each.in_flight, each.requests))
+            pooled.in_flight += 1
+            pooled.requests += 1
+        try:
+            yield pooled
+        finally:
+            with self._lock:
+                pooled.in_flight -= 1
+
+
+
+    def refresh(self, pooled: PooledSession, csrf_token: str) -> bool:
+        """
+        Logs a session in again after the server refused a request sent with `csrf_token`.
+
+        If another request has already refreshed the session since `csrf_token` was sent, the session
+        is not logged in again.
+
+        ## Returns
+        - `True` if the session is logged in with a newer token, `False` if the login failed.
+        """
+        return self._relogin(pooled, csrf_token)
+
+
+
+    def _relogin(self, pooled: PooledSession, csrf_token: str | None = None) -> bool:
+        with pooled.lock:
+            if (csrf_token is not None and pooled.session_id and pooled.csrf_token != csrf_token):
+                return True
+            login = self._login()
+            with self._lock:
+                pooled.session.cookies = requests.cookies.RequestsCookieJar() if (login is None) else login.cookies
+                pooled.session.params = {} if (login is None) else dict(login.params)
+                pooled.session_id, pooled.csrf_token = ("", "") if (login is None) else (login.session_id, login.csrf_token)
+                pooled.logins += 1
+            return login is not None
+
+
+
+    def stats(self) -> list[dict[str, Any]]:
+        """
+        Returns each session's index, login state, requests in flight (its queue depth), requests sent and logins.
+        """
+        with self._lock:
+            return [
+                {"session": pooled.index, "logged_in": bool(pooled.session_id), "in_flight": pooled.in_flight, "requests": pooled.requests, "logins": pooled.logins}
+                for pooled in self.sessions
+            ]
+
+
+
+    def close(self) -> None:
+        """
+        Closes every session and forgets their logins.
+        """
+        for pooled in self.sessions:
+            pooled.session.close()
+            pooled.session.cookies.clear()
+            pooled.session.params = {}
+            pooled.session_id = ""
+            pooled.csrf_token = ""
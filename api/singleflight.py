@@ -0,0 +1,134 @@
+"""
+`api/singleflight.py`
+
+Coalescing of identical concurrent reads.
+
+When several callers (the TUI, a watch list, a discovery job) ask for the same object list or the
+same properties at the same time, only the first request goes to the server. The others wait for
+it and share its result. Nothing is cached: a call made after the request completes sends a new one.
+
+Each caller still waits under its own `api.deadline.Deadline`. A caller whose shared call was cut
+short by the deadline of the caller that sent it makes the call again instead of failing with it.
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Hashable
+from concurrent.futures import Future, TimeoutError
+from api.deadline import DeadlineExceeded, check, remaining
+
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time, sharing its result with every caller that asks while it runs.
+
+    Works both from threads (`do`) and from coroutines (`do_async`); the two keep separate calls in flight.
+
+    ### Attributes
+        - `calls` ( *int* ) -- The number of calls asked for.
+        - `sent` ( *int* ) -- The number of calls made.
+        - `shared` ( *int* ) -- The number of calls answered with the result of another caller's call,
+        i.e. the number of requests saved.
+
+    ## Usage
+    ```python
+    flight = SingleFlight()
+    r = flight.do(url, lambda: session.get(url))
+    ```
+    """
+    def __init__(self) -> None:
+        """
+        """
+        self.calls = 0
+        self.sent = 0
+        self.shared = 0
+        self._futures: dict[Hashable, Future] = {}
+        self._tasks: dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        """
+        Calls `function()`, unless a call with the same key is already running, in which case its result is shared.
+
+        ## Parameters
+        - `key`: Identifies the call, e.g. the URL of a GET or the body of a `.multi` read.
+        - `function`: Makes the call.
+
+        ## Returns
+        - The result of the call. If it raised, every caller sharing it gets the exception.
+        """
+        with self._lock:
+            self.calls += 1
+        while (True):
+            check()
+            with self._lock:
+                future = self._futures.get(key)
+                leader = (future is None)
+                if (leader):
+                    future = self._futures[key] = Future()
+                    self.sent += 1
+
+            if (leader):
+                try:
+                    future.set_result(function())
+                except BaseException as e:
+                    future.set_exception(e)
+                finally:
+                    with self._lock:
+                        del self._futures[key]
+                return future.result()
+
+            try:
+                error = future.exception(timeout=remaining())
+            except TimeoutError:
+                raise DeadlineExceeded("Job deadline passed while waiting for a shared request") from None
+            if (isinstance(error, DeadlineExceeded)):
+                # Cut short by the deadline of the caller that sent it, not ours
+                continue
+            with self._lock:
+                self.shared += 1
+            return future.result()
+
+
+
+    async def do_async(self, key: Hashable, function: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Awaits `function()`, unless a call with the same key is already running, in which case its result is shared.
+
+        ## Parameters
+        - `key`: Identifies the call.
+        - `function`: Returns the coroutine making the call.
+
+        ## Returns
+        - The result of the call. If it raised, every caller sharing it gets the exception.
+        """
+        self.calls += 1
+        while (True):
+            check()
+            task = self._tasks.get(key)
+            if (task is None):
+                task = self._tasks[key] = asyncio.ensure_future(function())
+                self.sent += 1
+                task.add_done_callback(lambda done, key=key: self._tasks.pop(key, None) if (self._tasks.get(key) is done) else None)
+                # Shielded, so the caller that sent it giving up does not cancel it for the others
+                return await asyncio.shield(task)
+
+            # `asyncio.wait` neither raises the task's error nor cancels it on a timeout
+            await asyncio.wait((task,), timeout=remaining())
+            if (not task.done()):
+                raise DeadlineExceeded("Job deadline passed while waiting for a shared request")
+            if (not task.cancelled() and isinstance(task.exception(), DeadlineExceeded)):
+                continue
+            self.shared += 1
+            return task.result()
+
+
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns the number of calls asked for, how many were sent and how many shared another's result (requests saved).
+        """
+        with self._lock:
+            return {"calls": self.calls, "sent": self.sent, "saved": self.shared}
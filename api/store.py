@@ -0,0 +1,330 @@
+"""
+`api/store.py`
+
+Content-addressed, deduplicated store for device database backups.
+
+Each image is compressed and stored once under its SHA-256, and an index records which site and
+device it came from and when. Backing up an unchanged device adds an index row but writes no new
+data, so disk use and I/O grow with what changed rather than with the number of runs.
+
+Layout under the store root:
+    - `objects/ab/cdef...` -- zlib-compressed images, named by the SHA-256 of the uncompressed content
+    - `index.sqlite` -- one row per backup: site, device, time taken, digest and size
+"""
+import os
+import time
+import uuid
+import zlib
+import shutil
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+
+
+CHUNK_SIZE = 256 * 1024
+# Compressed images up to this size are held in memory until their digest is known
+SPOOL_SIZE = 64 * 1024 * 1024
+
+
+
+@dataclass(slots=True)
+class Backup:
+    """
+    One backup in the index.
+
+    ### Attributes
+        - `site` ( *string* ) -- The site of the device.
+        - `device` ( *string* ) -- The device address.
+        - `taken` ( *float* ) -- When the backup was taken, as a Unix timestamp.
+        - `sha256` ( *string* ) -- The hex SHA-256 digest of the image.
+        - `size` ( *int* ) -- The uncompressed size of the image.
+        - `new` ( *bool* ) -- `True` if adding this backup stored new content, `False` if it was deduplicated.
+    """
+    site: str
+    device: str
+    taken: float
+    sha256: str
+    size: int
+    new: bool = False
+
+
+
+class BackupStore:
+    """
+    Content-addressed store of device backups with a site/device/time index and a retention policy.
+
+    ## Init Parameters
+    - `root`: The directory holding the store. It is created if it does not exist.
+    - *(Optional)* `level`: The zlib compression level (defaults to `6`).
+
+    All methods are thread-safe, so parallel backups can share one store.
+    """
+    def __init__(self, root: str, level: int = 6) -> None:
+        """
+        """
+        self.root = root
+        self.level = level
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS backups (
+                site TEXT NOT NULL,
+                device TEXT NOT NULL,
+                taken REAL NOT NULL,
+                sha256 TEXT NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS backups_device ON backups (site, device, taken)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS backups_sha256 ON backups (sha256)")
+        self._db.commit()
+
+
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+
+    def __enter__(self) -> "BackupStore":
+        return self
+
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+
+    def _object_path(self, sha256: str) -> str:
+        return os.path.join(self.root, "objects", sha256[:2], sha256[2:])
+
+
+
+    def ingest(self, site: str, device: str, chunks: Iterable[bytes], taken: float | None = None) -> Backup:
+        """
+        Adds a backup from a stream of chunks, e.g. a download in progress.
+
+        The chunks are hashed and compressed in memory as they arrive (spilling to a temporary file
+        past `SPOOL_SIZE`). If the store already holds the same content, nothing is written to the
+        store and only an index row is added. If `chunks` raises, nothing is added.
+
+        ## Parameters
+        - `site`: The site of the device.
+        - `device`: The device address.
+        - `chunks`: The image content.
+        - *(Optional)* `taken`: When the backup was taken, as a Unix timestamp (defaults to now).
+
+        ## Returns
+        - The new `Backup` entry.
+        """
+        taken = time.time() if (taken is None) else taken
+        digest = hashlib.sha256()
+        compressor = zlib.compressobj(self.level)
+        size = 0
+        with tempfile.SpooledTemporaryFile(SPOOL_SIZE) as spool:
+            for chunk in chunks:
+                digest.update(chunk)
+                size += len(chunk)
+                spool.write(compressor.compress(chunk))
+            spool.write(compressor.flush())
+
+            backup = Backup(str(site), str(device), taken, digest.hexdigest(), size)
+            if (os.path.exists(self._object_path(backup.sha256))):
+                # Unchanged: index it without writing the image again
+                indexed = self._commit(backup, None)
+                if (indexed is not None):
+                    return indexed
+
+            temporary = os.path.join(self.root, "objects", f".{uuid.uuid4().hex}.tmp")
+            try:
+                spool.seek(0)
+                with open(temporary, "wb") as f:
+                    shutil.copyfileobj(spool, f, CHUNK_SIZE)
+                return self._commit(backup, temporary)
+            finally:
+                if (os.path.exists(temporary)):
+                    os.remove(temporary)
+
+
+
+    def add_file(self, site: str, device: str, path: str, sha256: str | None = None, taken: float | None = None) -> Backup:
+        """
+        Adds a backup from a file on disk, such as a `.zdd` saved by `SaveDB`.
+
+        ## Parameters
+        - `site`: The site of the device.
+        - `device`: The device address.
+        - `path`: The image file.
+        - *(Optional)* `sha256`: The digest of the file, if already known. When the store already holds
+        that content, the file is not read at all.
+        - *(Optional)* `taken`: When the backup was taken, as a Unix timestamp (defaults to the file's modification time).
+
+        ## Returns
+        - The new `Backup` entry.
+        """
+        taken = os.path.getmtime(path) if (taken is None) else taken
+        if (sha256 is not None):
+            backup = self._commit(Backup(str(site), str(device), taken, sha256, os.path.getsize(path)), None)
+            if (backup is not None):
+                return backup
+
+        with open(path, "rb") as f:
+            return self.ingest(site, device, iter(lambda: f.read(CHUNK_SIZE), b""), taken)
+
+
+
+    def _commit(self, backup: Backup, temporary: str | None) -> Backup | None:
+        """
+        Moves a compressed image into place unless the store already holds it, and indexes the backup.
+        Runs under the lock, so `prune` cannot delete the image between the two steps.
+
+        ## Returns
+        - The `Backup`, or `None` if `temporary` is `None` and the store does not hold the image.
+        """
+        path = self._object_path(backup.sha256)
+        with self._lock:
+            if (not os.path.exists(path)):
+                if (temporary is None):
+                    return None
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temporary, path)
+                backup.new = True
+            self._db.execute(
+                "INSERT INTO backups (site, device, taken, sha256, size) VALUES (?, ?, ?, ?, ?)",
+                (backup.site, backup.device, backup.taken, backup.sha256, backup.size),
+            )
+            self._db.commit()
+        return backup
+
+
+
+    def read(self, sha256: str) -> Iterator[bytes]:
+        """
+        Streams the uncompressed content of an image.
+
+        ## Raises
+        - `FileNotFoundError` if the store does not hold the image.
+        """
+        decompressor = zlib.decompressobj()
+        with open(self._object_path(sha256), "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                yield decompressor.decompress(chunk)
+            yield decompressor.flush()
+
+
+
+    def export(self, backup: Backup, path: str) -> str:
+        """
+        Writes a backup out as a plain image file, e.g. to load it with `LoadDB`.
+
+        ## Returns
+        - `path`.
+        """
+        with open(path, "wb") as f:
+            for chunk in self.read(backup.sha256):
+                f.write(chunk)
+        return path
+
+
+
+    def history(self, site: str | None = None, device: str | None = None) -> list[Backup]:
+        """
+        Lists backups, newest first.
+
+        ## Parameters
+        - *(Optional)* `site`: Only list backups of this site.
+        - *(Optional)* `device`: Only list backups of this device address.
+        """
+        query, params = "SELECT site, device, taken, sha256, size FROM backups WHERE 1", []
+        if (site is not None):
+            query, params = query + " AND site = ?", params + [str(site)]
+        if (device is not None):
+            query, params = query + " AND device = ?", params + [str(device)]
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY taken DESC", params).fetchall()
+        return [Backup(*row) for row in rows]
+
+
+
+    def latest(self, site: str, device: str) -> Backup | None:
+        """
+        Returns the newest backup of a device, or `None` if it has none.
+        """
+        history = self.history(site, device)
+        return history[0] if (history) else None
+
+
+
+    def prune(self, keep_last: int = 7, keep_daily: int = 14, keep_weekly: int = 8, keep_monthly: int = 12) -> tuple[int, int]:
+        """
+        Applies the retention policy to every device, then deletes images no backup refers to.
+
+        For each device, the newest `keep_last` backups are kept, plus the newest backup of each of the
+        last `keep_daily` days, `keep_weekly` ISO weeks and `keep_monthly` months that have backups
+        (in local time). Everything else is dropped from the index.
+
+        ## Returns
+        - The number of index rows removed and the number of images deleted.
+        """
+        policies = (
+            (keep_daily, "%Y-%m-%d"),
+            (keep_weekly, "%G-W%V"),
+            (keep_monthly, "%Y-%m"),
+        )
+
+        with self._lock:
+            rows = self._db.execute("SELECT rowid, site, device, taken FROM backups ORDER BY site, device, taken DESC").fetchall()
+
+            drop = []
+            device_rows: dict[tuple[str, str], list[tuple[int, float]]] = {}
+            for rowid, site, device, taken in rows:
+                device_rows.setdefault((site, device), []).append((rowid, taken))
+            for entries in device_rows.values():
+                keep = {rowid for rowid, _ in entries[:keep_last]}
+                for count, pattern in policies:
+                    periods: set[str] = set()
+                    for rowid, taken in entries:
+                        period = time.strftime(pattern, time.localtime(taken))
+                        if (period not in periods and len(periods) < count):
+                            periods.add(period)
+                            keep.add(rowid)
+                drop += [rowid for rowid, _ in entries if (rowid not in keep)]
+
+            self._db.executemany("DELETE FROM backups WHERE rowid = ?", [(rowid,) for rowid in drop])
+            self._db.commit()
+            referenced = {row[0] for row in self._db.execute("SELECT DISTINCT sha256 FROM backups")}
+
+            deleted = 0
+            objects = os.path.join(self.root, "objects")
+            for prefix in os.listdir(objects):
+                directory = os.path.join(objects, prefix)
+                if (not os.path.isdir(directory)):
+                    continue
+                for name in os.listdir(directory):
+                    if (prefix + name not in referenced):
+                        os.remove(os.path.join(directory, name))
+                        deleted += 1
+        return (len(drop), deleted)
+
+
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns the number of backups and stored images, and the logical and on-disk sizes in bytes.
+        """
+        with self._lock:
+            backups, logical = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM backups").fetchone()
+        images, stored = 0, 0
+        for directory, _, names in os.walk(os.path.join(self.root, "objects")):
+            for name in names:
+                if (not name.endswith(".tmp")):
+                    images += 1
+                    stored += os.path.getsize(os.path.join(directory, name))
+        return {"backups": backups, "images": images, "logical_bytes": logical, "stored_bytes": stored}
@@ -0,0 +1,162 @@
+"""
+`api/tasks.py`
+
+Shared watcher for enteliWEB copy/paste task progress.
+
+`/wstaskqueue/getcopypastetaskprogress` reports the progress of every task at once, so one
+background thread fetches it on an adaptive interval and completes the waiter of each task that
+reaches 100%. Any number of concurrent callers then cost one progress request per interval.
+"""
+import time
+import threading
+from typing import Any, Callable
+from concurrent.futures import Future, TimeoutError
+from api.poll import Poller
+from api.deadline import clamp
+
+
+
+class TaskWatcher:
+    """
+    Watches server-side tasks through a single shared progress poll.
+
+    ## Init Parameters
+    - `fetch`: A function returning the current progress list, as `[{"taskID": ..., "progress": ...}, ...]`.
+    - *(Optional)* `poller`: Sets the interval between fetches. Defaults to a `Poller` starting at `0.1`
+    seconds and backing off to at most `1` second. The schedule restarts from its first, short
+    interval whenever a new task is watched.
+
+    The background thread runs only while at least one task is being watched.
+    """
+    def __init__(self, fetch: Callable[[], list[dict[str, Any]]], poller: Poller | None = None) -> None:
+        """
+        """
+        self.fetch = fetch
+        self.poller = Poller(maximum=1) if (poller is None) else poller
+        self.fetches = 0
+        self.errors = 0
+        self.completed = 0
+        self._waiters: dict[str, list[Future]] = {}
+        self._restart = False
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+
+
+    def watch(self, task_id: str | int) -> Future:
+        """
+        Starts watching a task without blocking.
+
+        ## Parameters
+        - `task_id`: The task id returned by `createpasteobjecttask`.
+
+        ## Returns
+        - A `Future` that resolves to the task's progress entry once its progress reaches 100.
+        """
+        future: Future = Future()
+        with self._lock:
+            self._waiters.setdefault(str(task_id), []).append(future)
+            self._restart = True
+            if (self._thread is None):
+                self._thread = threading.Thread(target=self._run, name="TaskWatcher", daemon=True)
+                self._thread.start()
+        return future
+
+
+
+    def wait(self, task_id: str | int, deadline: float | None = None, timeout: float | None = None) -> dict[str, Any] | None:
+        """
+        Blocks until a task reaches 100% progress.
+
+        ## Parameters
+        - `task_id`: The task id returned by `createpasteobjecttask`.
+        - *(Optional)* `deadline`: A `time.monotonic()` value after which to stop waiting.
+        - *(Optional)* `timeout`: Seconds to wait. Ignored if `deadline` is given; defaults to the poller's `timeout`.
+        The wait never outlasts the current job's `api.deadline.Deadline`, if there is one.
+
+        ## Returns
+        - The task's progress entry, or `None` if the deadline passed first.
+        """
+        if (deadline is None):
+            deadline = time.monotonic() + (self.poller.timeout if (timeout is None) else timeout)
+        deadline = clamp(deadline)
+
+        future = self.watch(task_id)
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except TimeoutError:
+            self.unwatch(task_id, future)
+            return None
+
+
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns the number of progress fetches, failed fetches, completed waits and tasks still being watched.
+        """
+        with self._lock:
+            return {"fetches": self.fetches, "errors": self.errors, "completed": self.completed, "watching": len(self._waiters)}
+
+
+
+    def unwatch(self, task_id: str | int, future: Future) -> None:
+        """
+        Stops watching a task for the waiter holding `future`, e.g. after giving up on it.
+        """
+        task_id = str(task_id)
+        with self._lock:
+            futures = self._waiters.get(task_id, [])
+            if (future in futures):
+                futures.remove(future)
+            if (not futures):
+                self._waiters.pop(task_id, None)
+
+
+
+    def _run(self) -> None:
+        """
+        Fetches progress until no task is left to watch, completing waiters as their tasks finish.
+        """
+        try:
+            self._poll()
+        finally:
+            # Should the thread die, the next `watch` starts another one
+            with self._lock:
+                if (self._thread is threading.current_thread()):
+                    self._thread = None
+
+
+
+    def _poll(self) -> None:
+        delays = self.poller.delays()
+        while (True):
+            with self._lock:
+                if (not self._waiters):
+                    self._thread = None
+                    return
+                if (self._restart):
+                    delays = self.poller.delays()
+                    self._restart = False
+
+            try:
+                entries = self.fetch()
+                if (not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries)):
+                    raise TypeError(f"Malformed task progress: {entries!r:.200}")
+            except Exception:
+                entries = []
+                with self._lock:
+                    self.errors += 1
+
+            done: list[tuple[list[Future], dict[str, Any]]] = []
+            with self._lock:
+                self.fetches += 1
+                for entry in entries:
+                    if (entry.get("progress", 0) >= 100 and str(entry.get("taskID")) in self._waiters):
+                        done.append((self._waiters.pop(str(entry["taskID"])), entry))
+                        self.completed += 1
+            for futures, entry in done:
+                for future in futures:
+                    if (not future.done()):
+                        future.set_result(entry)
+
+            time.sleep(next(delays))
@@ -0,0 +1,216 @@
+"""
+`api/transfer.py`
+
+Streaming file transfers for database images (`.zdd`) and object backups (`.zob`).
+
+Downloads are written to disk chunk by chunk while their checksum is computed, and uploads are
+sent as a `multipart/form-data` body read straight from the file (or a memory map of it), so
+memory use stays flat however large the files are and however many transfers run at once.
+"""
+import io
+import os
+import mmap
+import uuid
+import hashlib
+import requests
+from dataclasses import dataclass
+from typing import Iterator
+
+
+
+CHUNK_SIZE = 256 * 1024
+
+
+
+class TransferError(IOError):
+    """
+    Raised by `stream` when the server refuses a download or its body ends early.
+    """
+
+
+
+@dataclass(slots=True)
+class Transfer:
+    """
+    A file written by `download`.
+
+    ### Attributes
+        - `path` ( *string* ) -- Where the file was written.
+        - `size` ( *int* ) -- The number of bytes written.
+        - `sha256` ( *string* ) -- The hex SHA-256 digest of the content.
+    """
+    path: str
+    size: int
+    sha256: str
+
+
+
+def stream(response: requests.Response, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Yields a response body chunk by chunk, checking that it is complete.
+
+    ## Parameters
+    - `response`: A response requested with `stream=True`. It is closed once the body is consumed.
+    - *(Optional)* `chunk_size`: Bytes read at a time (defaults to `256 KiB`).
+
+    ## Raises
+    - `TransferError` if the response is not `200 OK`, or its body is shorter than its `Content-Length`.
+    """
+    try:
+        if (response.status_code != requests.codes.ok):
+            raise TransferError(f"{response.status_code} {response.reason}")
+        size = 0
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            size += len(chunk)
+            yield chunk
+
+        expected = response.headers.get("Content-Length")
+        if (expected is not None and "Content-Encoding" not in response.headers and int(expected) != size):
+            raise TransferError(f"Body is {size} bytes, expected {expected}")
+    finally:
+        response.close()
+
+
+
+def download(response: requests.Response, path: str, chunk_size: int = CHUNK_SIZE) -> Transfer | None:
+    """
+    Streams a response body to a file, computing its SHA-256 on the way.
+
+    The body is written to `path + ".part"` and renamed to `path` only once it is complete, so an
+    interrupted or truncated download never leaves a partial file under the final name.
+
+    ## Parameters
+    - `response`: A response requested with `stream=True`. It is closed when this returns.
+    - `path`: The file to write.
+    - *(Optional)* `chunk_size`: Bytes read and written at a time (defaults to `256 KiB`).
+
+    ## Returns
+    - The `Transfer`, or `None` if the response is not `200 OK`, or its body is shorter than its `Content-Length`.
+    """
+    partial = path + ".part"
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(partial, "wb") as f:
+            for chunk in stream(response, chunk_size):
+                digest.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+
+        os.replace(partial, path)
+        return Transfer(path, size, digest.hexdigest())
+    except TransferError:
+        if (os.path.exists(partial)):
+            os.remove(partial)
+        return None
+    except BaseException:
+        if (os.path.exists(partial)):
+            os.remove(partial)
+        raise
+    finally:
+        response.close()
+
+
+
+class MultipartFile:
+    """
+    A `multipart/form-data` request body that is read lazily from its files.
+
+    Pass it as `data` with its `content_type` as the `Content-Type` header. `requests` sends it with
+    a `Content-Length` and reads it in blocks, so only one block of each file is in memory at a time.
+
+    ## Init Parameters
+    - `fields`: Plain form fields, e.g. the CSRF token and device reference.
+    - `files`: Form field name -> file path, or bytes for content already in memory.
+    - *(Optional)* `memory_map`: If `True`, files are memory-mapped rather than read through a file buffer.
+
+    Use it as a context manager (or call `close()`) to close the files.
+
+    ## Usage
+    ```python
+    with MultipartFile({"_csrfToken": token}, {"loadDBFromFile": "device.zdd"}) as body:
+        r = requests.post(url, data=body, headers={"Content-Type": body.content_type})
+    ```
+    """
+    def __init__(self, fields: dict[str, str], files: dict[str, str | bytes], memory_map: bool = False) -> None:
+        """
+        """
+        self.boundary = uuid.uuid4().hex
+        self._open: list = []
+        self._parts: list = []
+        self._length = 0
+
+        for name, value in fields.items():
+            self._add(io.BytesIO(f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()))
+
+        for name, source in files.items():
+            if (isinstance(source, (bytes, bytearray, memoryview))):
+                filename, stream = name, io.BytesIO(source)
+            else:
+                filename, stream = os.path.basename(source), open(source, "rb")
+                self._open.append(stream)
+                if (memory_map and os.fstat(stream.fileno()).st_size):
+                    stream = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+                    self._open.append(stream)
+            self._add(io.BytesIO(
+                f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                f'Content-Type: application/octet-stream\r\n\r\n'.encode()
+            ))
+            self._add(stream)
+            self._add(io.BytesIO(b"\r\n"))
+
+        self._add(io.BytesIO(f"--{self.boundary}--\r\n".encode()))
+
+
+
+    def _add(self, stream) -> None:
+        stream.seek(0, os.SEEK_END)
+        self._length += stream.tell()
+        stream.seek(0)
+        self._parts.append(stream)
+
+
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+
+
+    def __len__(self) -> int:
+        return self._length
+
+
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Reads the next `size` bytes of the body (all of the rest if `size` is negative).
+        """
+        chunks = []
+        wanted = self._length if (size is None or size < 0) else size
+        while (wanted > 0 and self._parts):
+            chunk = self._parts[0].read(wanted)
+            if (not chunk):
+                self._parts.pop(0)
+                continue
+            chunks.append(chunk)
+            wanted -= len(chunk)
+        return b"".join(chunks)
+
+
+
+    def close(self) -> None:
+        for stream in reversed(self._open):
+            stream.close()
+        self._open = []
+        self._parts = []
+
+
+
+    def __enter__(self) -> "MultipartFile":
+        return self
+
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
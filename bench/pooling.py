@@ -0,0 +1,98 @@
+"""
+`bench/pooling.py`
+
+Measures requests per second for per-call `requests.*` versus the pooled `EnteliWEB.session`.
+
+By default a small keep-alive HTTP server is started on localhost so the numbers only reflect
+client-side connection handling. Pass `--server` to point the benchmark at a real enteliWEB host.
+
+## Usage
+```bash
+>>> python -m bench.pooling
+>>> python -m bench.pooling --requests 2000 --server 192.168.1.100 --username admin --password password
+```
+"""
+import time
+import argparse
+import threading
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from enteliweb import EnteliWEB
+
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    """
+    Answers every request with a small enteliWEB-like JSON body over HTTP/1.1.
+    """
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    body = b'{"$base": "String", "value": "72.5", "_csrfToken": "bench"}'
+
+    def _reply(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        if (length):
+            self.rfile.read(length)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.send_header("Set-Cookie", "enteliWebID=bench; Path=/")
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    do_GET = do_PUT = do_POST = _reply
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+
+def _rate(label: str, count: int, call) -> float:
+    """
+    Runs `call` `count` times and prints the achieved requests per second.
+    """
+    start = time.perf_counter()
+    for _ in range(count):
+        call()
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed
+    print(f"{label:<28} {count:>6} requests  {elapsed:8.3f} s  {rate:10.1f} req/s")
+    return rate
+
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[2])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--server", default=None, help="enteliWEB host; a local keep-alive server is used if omitted")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="password")
+    args = parser.parse_args()
+
+    httpd = None
+    server = args.server
+    if (server is None):
+        httpd = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        server = f"127.0.0.1:{httpd.server_address[1]}"
+
+    with EnteliWEB(args.username, args.password, server_ip=server) as api:
+        if (not api.login()):
+            raise SystemExit("Unable to log in.")
+
+        url = f"http://{server}{api.base_url}?alt=JSON&{api.csrf_token_key}={api.csrf_token}"
+        cookies = {api.session_key: api.session_id}
+
+        before = _rate("per-call requests.get", args.requests, lambda: requests.get(url, cookies=cookies))
+        after = _rate("pooled EnteliWEB.session", args.requests, lambda: api.session.get(f"http://{server}{api.base_url}?alt=JSON"))
+        print(f"speedup: {after / before:.2f}x")
+
+    if (httpd is not None):
+        httpd.shutdown()
+
+
+
+
+
+if __name__ == "__main__":
+    main()
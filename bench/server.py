@@ -0,0 +1,821 @@
+"""
+`bench/server.py`
+
+Local stand-in for an `enteliWEB` server, built on `aiohttp`.
+
+Implements the endpoints used by `enteliweb.EnteliWEB`, `enteliweb_async.AsyncEnteliWEB` and
+`og/eweb_api.EWEB_API` against an in-memory site → device → object model:
+    - `/api/auth/basiclogin`
+    - `/api/.bacnet/...` (`GET`, `PUT`, `POST`, `DELETE`)
+    - `/api/.multi`
+    - `/wsbac/*` database backup/restore, object backup/restore, program load and copy/paste
+    - `/wstaskqueue/*` copy/paste task progress
+
+Latency, per-session request serialization, error rates and offline devices can be injected,
+so performance work has a repeatable target that behaves like a loaded server.
+
+## Usage
+```bash
+>>> python -m bench.server --port 8080 --devices 50 --objects 500 --latency 0.02
+```
+```python
+server = StandInServer(latency=0.01)
+server.populate("MainSite", devices=10, objects=200)
+with server.running() as address:
+    api = EnteliWEB("admin", "password", server_ip=address)
+```
+"""
+import io
+import re
+import json
+import time
+import uuid
+import random
+import asyncio
+import zipfile
+import argparse
+import threading
+from aiohttp import web, BasicAuth
+from contextlib import contextmanager
+from typing import Any, Generator
+from og.common import OBJECT_NAME_MAP
+
+
+
+# Full BACnet object type name -> abbreviation (e.g. `analog-input` -> `AI`)
+TYPE_ABBREVIATIONS = {name: abbreviation for abbreviation, name in OBJECT_NAME_MAP.items()}
+
+# `//site/device.AV12` style references used by the `/wsbac` endpoints
+WSBAC_REF = re.compile(r"^//(?P<site>[^/]+)/(?P<device>[^.]+)\.(?P<type>[A-Za-z][A-Za-z ]*?)(?P<instance>\d+)$")
+
+# Header of the fake `.zdd` database images
+ZDD_MAGIC = b"ZDD1\n"
+
+
+
+class StandInServer:
+    """
+    In-memory stand-in for an `enteliWEB` server.
+
+    ## Init Parameters
+    - *(Optional)* `username`, `password`: Credentials accepted by `basiclogin`. If `username` is `None`, any credentials are accepted.
+    - *(Optional)* `latency`: Seconds added to every request (defaults to `0`).
+    - *(Optional)* `jitter`: Maximum random seconds added on top of `latency` (defaults to `0`).
+    - *(Optional)* `serialize_sessions`: If `True`, requests from one `enteliWebID` session are processed one at a time,
+    like the real server (defaults to `True`).
+    - *(Optional)* `error_rate`: Probability that a request fails with HTTP `503` (defaults to `0`).
+    - *(Optional)* `capacity`: Requests the server processes at once, or `None` for no limit. Further requests queue,
+    and once `capacity` requests are queued, new ones fail with HTTP `503`.
+    - *(Optional)* `bacnet_error_rate`: Probability that a BACnet request returns an enteliWEB `error` payload (defaults to `0`).
+    - *(Optional)* `offline_delay`: Seconds a request to an offline device takes before it fails (defaults to `1`).
+    - *(Optional)* `image_size`: Size in bytes of generated `.zdd` database images (defaults to `256 KiB`).
+    - *(Optional)* `save_delay`: Seconds before a database backup is ready to download (defaults to `0.5`).
+    - *(Optional)* `restart_delay`: Seconds a device stays offline after a database load (defaults to `1`).
+    - *(Optional)* `copy_delay`: Seconds a copy/paste task takes to reach 100% progress (defaults to `0.5`).
+    - *(Optional)* `session_ttl`: Seconds after which a login session expires, or `None` for no expiry.
+    - *(Optional)* `seed`: Seed for the random number generator, for repeatable error injection.
+    """
+    def __init__(
+        self,
+        username: str | None = None,
+        password: str | None = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        serialize_sessions: bool = True,
+        error_rate: float = 0.0,
+        capacity: int | None = None,
+        bacnet_error_rate: float = 0.0,
+        offline_delay: float = 1.0,
+        image_size: int = 256 * 1024,
+        save_delay: float = 0.5,
+        restart_delay: float = 1.0,
+        copy_delay: float = 0.5,
+        session_ttl: float | None = None,
+        seed: int | None = None,
+    ) -> None:
+        """
+        """
+        self.username = username
+        self.password = password
+        self.latency = latency
+        self.jitter = jitter
+        self.serialize_sessions = serialize_sessions
+        self.error_rate = error_rate
+        self.capacity = capacity
+        self.peak_in_flight = 0
+        self._in_flight = 0
+        self._queued = 0
+        self._slots = asyncio.Semaphore(capacity) if (capacity is not None) else None
+        self.bacnet_error_rate = bacnet_error_rate
+        self.offline_delay = offline_delay
+        self.image_size = image_size
+        self.save_delay = save_delay
+        self.restart_delay = restart_delay
+        self.copy_delay = copy_delay
+        self.session_ttl = session_ttl
+        self.random = random.Random(seed)
+
+        # site -> device -> {"name", "network", "latency", "online_at", "objects": {"analog-input,1": {property: value}}}
+        self.sites: dict[str, dict[str, dict[str, Any]]] = {}
+
+        self.sessions: dict[str, dict[str, Any]] = {}
+        self.saves: dict[str, tuple[float, str, str]] = {}
+        self.object_backups: dict[str, list[tuple[str, str, dict]]] = {}
+        self.uploads: dict[str, dict] = {}
+        self.tasks: dict[int, dict[str, Any]] = {}
+        self.stats: dict[str, dict[str, int]] = {}
+
+        self.address = ""
+        self._runner: web.AppRunner | None = None
+        self._next_task = 1
+
+        self.app = web.Application(middlewares=[self._middleware], client_max_size=1024 ** 3)
+        self.app.router.add_get("/enteliweb/api/auth/basiclogin", self.basiclogin)
+        self.app.router.add_route("*", r"/enteliweb/api/.bacnet{path:.*}", self.bacnet)
+        self.app.router.add_post("/enteliweb/api/.multi", self.multi)
+        self.app.router.add_post("/enteliweb/wsbac/sendstartsavedatabasecurl", self.start_save_database)
+        self.app.router.add_post("/enteliweb/wsbac/checksavedatabase", self.check_save_database)
+        self.app.router.add_post("/enteliweb/wsbac/savedatabasefile", self.save_database_file)
+        self.app.router.add_post("/enteliweb/wsbac/loaddevicedatabasefile", self.load_database_file)
+        self.app.router.add_post("/enteliweb/wsbac/waitfordeviceonline/", self.wait_for_device_online)
+        self.app.router.add_post("/enteliweb/wsbac/saveprogram", self.save_program)
+        self.app.router.add_post("/enteliweb/wsbac/backupobject", self.backup_object)
+        self.app.router.add_post("/enteliweb/wsbac/saveobjectfile", self.save_object_file)
+        self.app.router.add_post("/enteliweb/wsbac/uploadobjectfile", self.upload_object_file)
+        self.app.router.add_post("/enteliweb/wsbac/restoreobject", self.restore_object)
+        self.app.router.add_post("/enteliweb/wsbac/getsuggestedpastedata", self.get_suggested_paste_data)
+        self.app.router.add_post("/enteliweb/wsbac/createpasteobjecttask", self.create_paste_object_task)
+        self.app.router.add_post("/enteliweb/wsbac/pasteobject", self.paste_object)
+        self.app.router.add_get("/enteliweb/wstaskqueue/getcopypastetaskprogress", self.get_copy_paste_task_progress)
+        self.app.router.add_post("/enteliweb/wstaskqueue/getmergedtasktargetparamdata", self.get_merged_task_target_param_data)
+
+
+
+    # ------------------------------------------------------------------ model
+
+    def populate(self, site: str = "MainSite", devices: int = 10, objects: int = 100, first_device: int = 100, network: int = 1, device_latency: float = 0.0) -> None:
+        """
+        Adds a site with generated devices and objects to the model.
+
+        ## Parameters
+        - `site`: The site name.
+        - `devices`: The number of devices to add.
+        - `objects`: The number of objects per device, spread over `AI`, `AO`, `AV`, `BI`, `BO` and `BV`.
+        Every device also gets its device object (`device,<address>`).
+        - `first_device`: The address of the first device; the rest are numbered consecutively.
+        - `network`: The BACnet network number of the devices.
+        - `device_latency`: Extra seconds added to every request that touches one of these devices (e.g. to model MS/TP).
+        """
+        types = ["analog-input", "analog-output", "analog-value", "binary-input", "binary-output", "binary-value"]
+        devices_map = self.sites.setdefault(site, {})
+        for address in range(first_device, first_device + devices):
+            object_map = {f"device,{address}": {"object-name": f"Controller {address}", "description": ""}}
+            for i in range(objects):
+                object_type = types[i % len(types)]
+                instance = i // len(types) + 1
+                object_map[f"{object_type},{instance}"] = {
+                    "object-name": f"{TYPE_ABBREVIATIONS[object_type]}{instance} {address}",
+                    "present-value": "0",
+                    "description": "",
+                }
+            devices_map[str(address)] = {
+                "name": f"Controller {address}",
+                "network": network,
+                "latency": device_latency,
+                "online_at": 0.0,
+                "objects": object_map,
+            }
+
+
+
+    def set_online(self, site: str, device: str, online: bool) -> None:
+        """
+        Takes a device offline indefinitely, or brings it back online.
+        """
+        self.sites[site][device]["online_at"] = 0.0 if (online) else float("inf")
+
+
+
+    def _device(self, site: str, device: str) -> dict[str, Any] | None:
+        return self.sites.get(site, {}).get(device)
+
+
+
+    def _online(self, device: dict[str, Any]) -> bool:
+        return time.monotonic() >= device["online_at"]
+
+
+
+    @staticmethod
+    def _object_key(object_type: str, instance: str | int) -> str:
+        """
+        Normalizes an object id to the `analog-input,1` form, accepting abbreviations such as `AI`.
+        """
+        return f"{OBJECT_NAME_MAP.get(object_type, object_type)},{int(instance)}"
+
+
+
+    @classmethod
+    def _path_key(cls, part: str) -> str:
+        """
+        Normalizes an object id taken from a URL path segment, leaving malformed ids untouched.
+        """
+        try:
+            return cls._object_key(*part.split(",", 1))
+        except (TypeError, ValueError):
+            return part
+
+
+
+    @staticmethod
+    def _property_key(property_name: str) -> str:
+        """
+        Normalizes a property name, so `Present_Value` and `present-value` refer to the same property.
+        """
+        return property_name.strip("/").lower().replace("_", "-")
+
+
+
+    def _error(self, code: str, text: str) -> dict[str, str]:
+        return {"error": code, "errorText": text}
+
+
+
+    async def _touch(self, site: str, device: str) -> dict[str, Any] | dict[str, str]:
+        """
+        Resolves a device for a BACnet request, applying its latency and the injected BACnet errors.
+
+        ## Returns
+        - The device model, or an enteliWEB error payload.
+        """
+        dev = self._device(site, device)
+        if (dev is None):
+            return self._error("31", "Unknown device")
+        if (dev["latency"]):
+            await asyncio.sleep(dev["latency"])
+        if (not self._online(dev)):
+            await asyncio.sleep(self.offline_delay)
+            return self._error("50", "Device not responding")
+        if (self.bacnet_error_rate and self.random.random() < self.bacnet_error_rate):
+            return self._error("49", "Request timed out")
+        return dev
+
+
+
+    async def _read(self, site: str, device: str, object_key: str, property_name: str) -> dict[str, Any]:
+        dev = await self._touch(site, device)
+        if ("error" in dev):
+            return dev
+        obj = dev["objects"].get(object_key)
+        if (obj is None):
+            return self._error("31", "Unknown object")
+        prop = self._property_key(property_name)
+        if (prop not in obj):
+            return self._error("32", "Unknown property")
+        return {"$base": "String", "value": obj[prop]}
+
+
+
+    async def _write(self, site: str, device: str, object_key: str, property_name: str, value: Any) -> dict[str, Any]:
+        dev = await self._touch(site, device)
+        if ("error" in dev):
+            return dev
+        obj = dev["objects"].get(object_key)
+        if (obj is None):
+            return self._error("31", "Unknown object")
+        obj[self._property_key(property_name)] = "" if (value is None) else str(value)
+        return {"$base": "String", "value": obj[self._property_key(property_name)]}
+
+
+
+    def _image(self, site: str, device: str) -> bytes:
+        """
+        Renders a device database as a deterministic `.zdd` image, padded to `image_size`.
+        """
+        dev = self.sites[site][device]
+        header = ZDD_MAGIC + json.dumps({"site": site, "device": device, "objects": dev["objects"]}, sort_keys=True).encode() + b"\n"
+        return header + b"\0" * max(0, self.image_size - len(header))
+
+
+
+    # ------------------------------------------------------------ middleware
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        """
+        Counts traffic, checks the session and CSRF token, and applies latency, serialization and errors.
+        """
+        route = request.match_info.route.resource.canonical if (request.match_info.route.resource) else request.path
+        stats = self.stats.setdefault(f"{request.method} {route}", {"requests": 0, "bytes_in": 0, "bytes_out": 0, "errors": 0})
+        stats["requests"] += 1
+        stats["bytes_in"] += request.content_length or 0
+
+        session_id = request.cookies.get("enteliWebID", "")
+        if (request.path != "/enteliweb/api/auth/basiclogin"):
+            session = self.sessions.get(session_id)
+            if (session is None or (self.session_ttl is not None and time.monotonic() - session["created"] > self.session_ttl)):
+                self.sessions.pop(session_id, None)
+                stats["errors"] += 1
+                return web.Response(status=401, text="Session expired")
+            token = request.query.get("_csrfToken")
+            if (token is None and request.method == "POST" and request.content_type in ("application/x-www-form-urlencoded", "multipart/form-data")):
+                token = (await request.post()).get("_csrfToken")
+            if (token != session["token"] and request.method != "GET"):
+                stats["errors"] += 1
+                return web.Response(status=403, text="Invalid CSRF token")
+
+        if (self._slots is not None):
+            if (self._queued >= self.capacity):
+                stats["errors"] += 1
+                return web.Response(status=503, reason="Service Unavailable")
+            self._queued += 1
+            await self._slots.acquire()
+            self._queued -= 1
+        self._in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self._in_flight)
+
+        lock = self.sessions[session_id]["lock"] if (self.serialize_sessions and session_id in self.sessions) else None
+        if (lock is not None):
+            await lock.acquire()
+        try:
+            delay = self.latency + (self.random.uniform(0, self.jitter) if (self.jitter) else 0)
+            if (delay):
+                await asyncio.sleep(delay)
+            if (self.error_rate and self.random.random() < self.error_rate):
+                stats["errors"] += 1
+                return web.Response(status=503, reason="Service Unavailable")
+            response = await handler(request)
+        finally:
+            if (lock is not None):
+                lock.release()
+            self._in_flight -= 1
+            if (self._slots is not None):
+                self._slots.release()
+
+        if (response.status >= 400):
+            stats["errors"] += 1
+        stats["bytes_out"] += response.content_length or 0
+        return response
+
+
+
+    # ------------------------------------------------------------- REST API
+
+    async def basiclogin(self, request: web.Request) -> web.Response:
+        try:
+            auth = BasicAuth.decode(request.headers.get("Authorization", ""))
+        except ValueError:
+            return web.Response(status=401, reason="Unauthorized")
+        if (self.username is not None and (auth.login, auth.password) != (self.username, self.password)):
+            return web.Response(status=401, reason="Unauthorized")
+
+        session_id = uuid.uuid4().hex
+        token = uuid.uuid4().hex
+        self.sessions[session_id] = {"token": token, "lock": asyncio.Lock(), "created": time.monotonic()}
+        response = web.json_response({"_csrfToken": token})
+        response.set_cookie("enteliWebID", session_id, path="/")
+        return response
+
+
+
+    async def bacnet(self, request: web.Request) -> web.Response:
+        parts = [part for part in request.match_info["path"].split("/") if part]
+        if (len(parts) >= 3):
+            parts[2] = self._path_key(parts[2])
+
+        if (request.method == "GET"):
+            if (len(parts) == 0):
+                body = {"$base": "Collection"}
+                for site in self.sites:
+                    body[site] = {"$base": "Collection", "nodeType": "NETWORK", "displayName": site}
+                return web.json_response(body)
+
+            if (parts[0] not in self.sites):
+                return web.Response(status=404, reason="Not Found")
+
+            if (len(parts) == 1):
+                body = {"$base": "Collection"}
+                for address, dev in self.sites[parts[0]].items():
+                    body[address] = {"$base": "Collection", "nodeType": "DEVICE", "displayName": dev["name"]}
+                return web.json_response(body)
+
+            dev = await self._touch(parts[0], parts[1])
+            if ("error" in dev):
+                return web.json_response(dev)
+
+            if (len(parts) == 2):
+                body = {"$base": "Collection"}
+                for key, obj in dev["objects"].items():
+                    body[key] = {"$base": "Object", "displayName": obj.get("object-name", "")}
+                return web.json_response(body)
+
+            obj = dev["objects"].get(parts[2])
+            if (obj is None):
+                return web.json_response(self._error("31", "Unknown object"))
+
+            if (len(parts) == 3):
+                body = {"$base": "Object"}
+                for prop, value in obj.items():
+                    body[prop] = {"$base": "String", "value": value}
+                return web.json_response(body)
+
+            return web.json_response(await self._read(parts[0], parts[1], parts[2], "/".join(parts[3:])))
+
+        if (request.method == "PUT" and len(parts) >= 4):
+            body = await request.json()
+            return web.json_response(await self._write(parts[0], parts[1], parts[2], "/".join(parts[3:]), body.get("value")))
+
+        if (request.method == "POST" and len(parts) == 2):
+            dev = await self._touch(parts[0], parts[1])
+            if ("error" in dev):
+                return web.json_response(dev)
+            body = await request.json()
+            object_type, instance = body["object-identifier"]["value"].split(",")
+            key = self._object_key(object_type, instance)
+            if (key in dev["objects"]):
+                return web.json_response(self._error("5", "Object already exists"))
+            dev["objects"][key] = {
+                self._property_key(prop): item.get("value", "")
+                for prop, item in body.items()
+                if (isinstance(item, dict) and prop != "object-identifier")
+            }
+            dev["objects"][key].setdefault("present-value", "0")
+            return web.Response(status=201, reason="Created")
+
+        if (request.method == "DELETE" and len(parts) == 3):
+            dev = await self._touch(parts[0], parts[1])
+            if ("error" in dev):
+                return web.json_response(dev)
+            if (dev["objects"].pop(parts[2], None) is None):
+                return web.json_response(self._error("31", "Unknown object"))
+            return web.Response(status=203, reason="Non-Authoritative Information")
+
+        return web.Response(status=405, reason="Method Not Allowed")
+
+
+
+    async def multi(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        values = {}
+        for key, item in body.get("values", {}).items():
+            if (not isinstance(item, dict) or "via" not in item):
+                continue
+            parts = [part for part in item["via"].split("/") if part]
+            if (len(parts) >= 4):
+                parts[3] = self._path_key(parts[3])
+            if (len(parts) < 5 or parts[0] != ".bacnet"):
+                result = self._error("31", "Invalid reference")
+            elif ("value" in item):
+                result = await self._write(parts[1], parts[2], parts[3], "/".join(parts[4:]), item["value"])
+            else:
+                result = await self._read(parts[1], parts[2], parts[3], "/".join(parts[4:]))
+            values[key] = {"via": item["via"], **result}
+        return web.json_response({"$base": "Struct", "values": values})
+
+
+
+    # ---------------------------------------------------------- wsbac: database
+
+    async def start_save_database(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        match = WSBAC_REF.match(form.get("deviceRef", ""))
+        if (match is None or self._device(match["site"], match["device"]) is None):
+            return web.json_response({"success": False, "message": "Unknown device"})
+        if (not self._online(self._device(match["site"], match["device"]))):
+            await asyncio.sleep(self.offline_delay)
+            return web.json_response({"success": False, "message": "Device not responding"})
+        filename = f"{match['site']}_{match['device']}_{uuid.uuid4().hex[:8]}"
+        self.saves[filename] = (time.monotonic() + self.save_delay, match["site"], match["device"])
+        return web.json_response({"success": True, "filepath": "C:/ProgramData/Delta Controls/enteliWEB/tmp", "filename": filename})
+
+
+
+    async def check_save_database(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        save = self.saves.get(form.get("filename", ""))
+        if (save is None):
+            return web.json_response({"status": -1})
+        return web.json_response({"status": 1 if (time.monotonic() >= save[0]) else 0})
+
+
+
+    async def save_database_file(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        filename = form.get("saveDBToken", "").rsplit("/", 1)[-1]
+        save = self.saves.pop(filename, None)
+        if (save is None or time.monotonic() < save[0]):
+            return web.Response(status=404, reason="Not Found")
+        return web.Response(body=self._image(save[1], save[2]), content_type="application/octet-stream")
+
+
+
+    async def load_database_file(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        match = WSBAC_REF.match(form.get("deviceRef", "").strip('"'))
+        upload = form.get("loadDBFromFile")
+        if (match is None or upload is None or self._device(match["site"], match["device"]) is None):
+            return web.json_response({"success": False, "message": "Invalid request"})
+
+        dev = self._device(match["site"], match["device"])
+        image = upload.file.read()
+        if (image.startswith(ZDD_MAGIC)):
+            dev["objects"] = json.loads(image[len(ZDD_MAGIC):image.index(b"\n", len(ZDD_MAGIC))])["objects"]
+        dev["online_at"] = time.monotonic() + self.restart_delay
+        return web.json_response({"success": True})
+
+
+
+    async def wait_for_device_online(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        refs = json.loads(form.get("deviceRef", "[]"))
+        deadline = time.monotonic() + 60
+        status = {}
+        while (True):
+            for ref in refs:
+                match = WSBAC_REF.match(ref)
+                dev = None if (match is None) else self._device(match["site"], match["device"])
+                status[ref] = dev is not None and self._online(dev)
+            if (all(status.values()) or time.monotonic() >= deadline):
+                break
+            await asyncio.sleep(0.05)
+        return web.json_response({"success": all(status.values()), "devices": status})
+
+
+
+    async def save_program(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        match = WSBAC_REF.match(form.get("PGObjRef", ""))
+        if (match is None or self._device(match["site"], match["device"]) is None):
+            return web.Response(text="ERROR")
+        objects = self._device(match["site"], match["device"])["objects"]
+        objects.setdefault(self._object_key(match["type"].upper(), match["instance"]), {})["program-code"] = form.get("ProgramText", "")
+        return web.Response(text="OK")
+
+
+
+    # ----------------------------------------------------------- wsbac: objects
+
+    async def backup_object(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        objects = []
+        for ref in json.loads(form.get("saveObjectRef", "[]")):
+            match = WSBAC_REF.match(ref)
+            dev = None if (match is None) else self._device(match["site"], match["device"])
+            key = None if (match is None) else self._object_key(match["type"].upper(), match["instance"])
+            if (dev is None or key not in dev["objects"]):
+                return web.json_response({"success": False, "result": f"Unknown object {ref}"})
+            objects.append((f"{match['type'].upper()}{match['instance']}", key, dict(dev["objects"][key])))
+        token = uuid.uuid4().hex
+        self.object_backups[token] = objects
+        return web.json_response({"success": True, "file": token, "result": f"{len(objects)} object(s) saved"})
+
+
+
+    async def save_object_file(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        objects = self.object_backups.pop(form.get("file", ""), None)
+        if (not objects):
+            return web.Response(status=404, reason="Not Found")
+        if (len(objects) == 1):
+            return web.Response(body=self._zob(*objects[0]), content_type="application/octet-stream")
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for obj in objects:
+                archive.writestr(f"{obj[0]}.zob", self._zob(*obj))
+        return web.Response(body=buffer.getvalue(), content_type="application/zip")
+
+
+
+    @staticmethod
+    def _zob(name: str, key: str, properties: dict) -> bytes:
+        return json.dumps({"name": name, "key": key, "properties": properties}, sort_keys=True).encode()
+
+
+
+    async def upload_object_file(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        upload = form.get("objectFile-button")
+        if (upload is None):
+            return web.json_response({"success": False})
+        data = upload.file.read()
+        if (zipfile.is_zipfile(io.BytesIO(data))):
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                entries = [archive.read(name) for name in archive.namelist()]
+        else:
+            entries = [data]
+
+        info = []
+        for entry in entries:
+            try:
+                zob = json.loads(entry)
+            except ValueError:
+                return web.json_response({"success": False, "message": "Invalid object file"})
+            object_type, instance = zob["key"].split(",")
+            path = f"C:\\ProgramData\\Delta Controls\\enteliWEB\\tmp\\{uuid.uuid4().hex}.zob"
+            self.uploads[path] = zob
+            info.append({
+                "file": path,
+                "type": TYPE_ABBREVIATIONS.get(object_type, object_type),
+                "instance": instance,
+                "objName": zob["properties"].get("object-name", ""),
+            })
+        return web.json_response({"success": True, "objInfo": info})
+
+
+
+    async def restore_object(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        results = []
+        targets = json.loads(form.get("devices", "[]"))
+        for target in targets:
+            match = WSBAC_REF.match(target)
+            dev = None if (match is None) else self._device(match["site"], match["device"])
+            for item in json.loads(form.get("objList", "[]")):
+                # An entry whose ref names one of the target devices is restored into that device only
+                ref = WSBAC_REF.match(item.get("ref", ""))
+                named = None if (ref is None) else f"//{ref['site']}/{ref['device']}.DEV{ref['device']}"
+                if (named in targets and named != target):
+                    continue
+                zob = self.uploads.get(item.get("file", ""))
+                if (dev is None or zob is None):
+                    results.append({"ref": item.get("ref", ""), "device": target, "status": "ERROR"})
+                    continue
+                if (not self._online(dev)):
+                    await asyncio.sleep(self.offline_delay)
+                    results.append({"ref": item.get("ref", ""), "device": target, "status": "ERROR"})
+                    continue
+                object_type = zob["key"].split(",")[0]
+                instance = item.get("instance") or zob["key"].split(",")[1]
+                properties = dict(zob["properties"])
+                if (item.get("name")):
+                    properties["object-name"] = item["name"]
+                dev["objects"][self._object_key(object_type, instance)] = properties
+                results.append({"ref": item.get("ref", ""), "device": target, "status": "OK"})
+        return web.json_response(results)
+
+
+
+    # ------------------------------------------------------- wsbac: copy/paste
+
+    async def get_suggested_paste_data(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        refs = json.loads(form.get("refs", "[]"))
+        return web.json_response({"success": True, "data": [{"ref": ref} for ref in refs]})
+
+
+
+    async def create_paste_object_task(self, request: web.Request) -> web.Response:
+        task_id = self._next_task
+        self._next_task += 1
+        self.tasks[task_id] = {"started": None, "items": [], "targets": [], "results": []}
+        return web.json_response({"taskid": task_id})
+
+
+
+    async def paste_object(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        task = self.tasks.get(int(form.get("taskID", 0)))
+        if (task is None):
+            return web.json_response({"success": False, "message": "Unknown task"})
+        task["items"] = json.loads(form.get("data", "[]"))
+        task["targets"] = json.loads(form.get("target", "[]"))
+        task["started"] = time.monotonic()
+        return web.json_response({"success": True})
+
+
+
+    def _task_progress(self, task: dict[str, Any]) -> int:
+        """
+        Returns a task's progress, performing the copies once it reaches 100%.
+        """
+        if (task["started"] is None):
+            return 0
+        elapsed = time.monotonic() - task["started"]
+        if (elapsed < self.copy_delay):
+            return int(100 * elapsed / self.copy_delay)
+        if (not task["results"]):
+            for target in task["targets"]:
+                target_match = WSBAC_REF.match(target)
+                target_dev = None if (target_match is None) else self._device(target_match["site"], target_match["device"])
+                for item in task["items"]:
+                    match = WSBAC_REF.match(item.get("ref", ""))
+                    source = None if (match is None) else self._device(match["site"], match["device"])
+                    key = None if (match is None) else self._object_key(match["type"].upper(), match["instance"])
+                    if (target_dev is None or source is None or key not in source["objects"]):
+                        task["results"].append({"ref": item.get("ref", ""), "target": target, "status": "ERROR"})
+                        continue
+                    properties = dict(source["objects"][key])
+                    if (item.get("name")):
+                        properties["object-name"] = item["name"]
+                    target_dev["objects"][self._object_key(key.split(",")[0], item.get("instance") or match["instance"])] = properties
+                    task["results"].append({"ref": item.get("ref", ""), "target": target, "status": "OK"})
+        return 100
+
+
+
+    async def get_copy_paste_task_progress(self, request: web.Request) -> web.Response:
+        return web.json_response([
+            {"taskID": task_id, "progress": self._task_progress(task)}
+            for task_id, task in self.tasks.items()
+        ])
+
+
+
+    async def get_merged_task_target_param_data(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        task = self.tasks.get(int(form.get("taskID", 0)))
+        if (task is None):
+            return web.json_response(self._error("31", "Unknown task"))
+        return web.json_response({"taskID": int(form["taskID"]), "progress": self._task_progress(task), "results": task["results"]})
+
+
+
+    # -------------------------------------------------------------- lifecycle
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """
+        Starts serving on `host:port` in the running event loop.
+
+        ## Returns
+        - The `host:port` address the server is listening on.
+        """
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        self.address = f"{host}:{self._runner.addresses[0][1]}"
+        return self.address
+
+
+
+    async def stop(self) -> None:
+        """
+        Stops serving and closes open connections.
+        """
+        if (self._runner is not None):
+            await self._runner.cleanup()
+            self._runner = None
+
+
+
+    @contextmanager
+    def running(self, host: str = "127.0.0.1", port: int = 0) -> Generator[str, None, None]:
+        """
+        Runs the server on a background thread with its own event loop, for use from synchronous code.
+
+        ## Yields
+        - The `host:port` address the server is listening on.
+        """
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        try:
+            yield asyncio.run_coroutine_threadsafe(self.start(host, port), loop).result()
+        finally:
+            asyncio.run_coroutine_threadsafe(self.stop(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+
+
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in for an enteliWEB server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--site", default="MainSite")
+    parser.add_argument("--devices", type=int, default=10)
+    parser.add_argument("--objects", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--capacity", type=int, default=None, help="Requests processed at once before queueing and 503s")
+    parser.add_argument("--no-serialize", action="store_true", help="Process requests from one session concurrently")
+    args = parser.parse_args()
+
+    server = StandInServer(
+        latency = args.latency,
+        jitter = args.jitter,
+        error_rate = args.error_rate,
+        capacity = args.capacity,
+        serialize_sessions = not args.no_serialize,
+    )
+    server.populate(args.site, devices=args.devices, objects=args.objects)
+
+    async def serve() -> None:
+        print(f"Serving enteliWEB stand-in on http://{await server.start(args.host, args.port)}/enteliweb")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+
+
+
+if __name__ == "__main__":
+    main()
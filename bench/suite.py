@@ -0,0 +1,488 @@
+"""
+`bench/suite.py`
+
+Throughput and latency benchmarks for the API clients, run against the local stand-in server.
+
+Each scenario reports p50/p95/p99 latency per operation, operations and HTTP requests per second,
+requests and bytes on the wire per operation (as counted by the stand-in server), and the time spent
+decoding response bodies per operation. With `--allocations`, each scenario also runs under
+`tracemalloc` and reports its peak traced memory and the number of allocated blocks still held at its end.
+Scenarios that poll server tasks also record the checks made and the seconds spent waiting per operation.
+Results are saved as JSON so runs from different commits can be compared with `--compare`.
+
+## Usage
+```bash
+>>> python -m bench.suite
+>>> python -m bench.suite --only get_objects_10000 csv_import --latency 0.005
+>>> python -m bench.suite --compare bench/results/3f2c1ab.json
+>>> python -m bench.suite --only parse_listing parse_listing_double --allocations
+>>> python -m bench.suite --only savedb copyobject --task-delay 3
+```
+"""
+import io
+import os
+import csv
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+import platform
+import statistics
+import subprocess
+from contextlib import contextmanager, redirect_stdout
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Generator
+from rich.table import Table
+from rich.console import Console
+from enteliweb import EnteliWEB
+from api.cache import HierarchyCache
+from api.response import CODEC, PARSE_STATS, parse
+from og.eweb_api import EWEB_API
+from bench.server import StandInServer
+
+
+
+SITE = "MainSite"
+SIZES_SITE = "Sizes"
+OBJECT_COUNTS = (100, 1000, 10000, 50000)
+
+# name -> (function, description)
+SCENARIOS: dict[str, tuple[Callable[["Bench"], None], str]] = {}
+
+
+
+def scenario(name: str, description: str) -> Callable[[Callable[["Bench"], None]], Callable[["Bench"], None]]:
+    """
+    Registers a benchmark scenario under `name`.
+    """
+    def decorator(function: Callable[["Bench"], None]) -> Callable[["Bench"], None]:
+        SCENARIOS[name] = (function, description)
+        return function
+    return decorator
+
+
+
+class Bench:
+    """
+    Shared state for one benchmark run: the stand-in server, logged-in clients and the latency samples.
+
+    ## Init Parameters
+    - `server`: The stand-in server, already populated.
+    - `address`: The `host:port` the server is listening on.
+    - `scale`: Multiplier applied to the number of operations in each scenario.
+    """
+    def __init__(self, server: StandInServer, address: str, scale: float) -> None:
+        """
+        """
+        self.server = server
+        self.address = address
+        self.scale = scale
+        self.samples: list[float] = []
+        self.operations = 0
+
+        self.api = EnteliWEB("admin", "password", server_ip=address)
+        self.api.login()
+
+        self.og = EWEB_API("enteliWebID", "_csrfToken", "/enteliweb/api/.bacnet/")
+        with redirect_stdout(io.StringIO()):
+            self.og.Login(address, "admin", "password")
+        # Keep the og flows measuring the server round trips they make without the listing cache
+        self.og.cache = HierarchyCache(0, 0, 0)
+        self.og_server = f"http://{address}"
+
+
+
+    def count(self, n: int) -> int:
+        """
+        Scales an operation count, keeping at least one operation.
+        """
+        return max(1, int(n * self.scale))
+
+
+
+    @contextmanager
+    def timed(self, operations: int = 1) -> Generator[None, None, None]:
+        """
+        Times one sample covering `operations` operations. `og` console output is discarded while timing.
+        """
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            yield
+        self.samples.append(time.perf_counter() - start)
+        self.operations += operations
+
+
+
+def _percentile(samples: list[float], percent: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+
+def _traffic(server: StandInServer) -> tuple[int, int]:
+    """
+    Returns the total number of requests and bytes (in and out) seen by the server so far.
+    """
+    requests = sum(stats["requests"] for stats in server.stats.values())
+    wire = sum(stats["bytes_in"] + stats["bytes_out"] for stats in server.stats.values())
+    return (requests, wire)
+
+
+
+# ------------------------------------------------------------------ scenarios
+
+@scenario("login", "basiclogin round trip")
+def bench_login(bench: Bench) -> None:
+    for _ in range(bench.count(50)):
+        with bench.timed():
+            bench.api.login()
+
+
+def _get_objects(size: int) -> Callable[[Bench], None]:
+    def bench_get_objects_size(bench: Bench) -> None:
+        for _ in range(bench.count(max(2, 200000 // (size * 10)))):
+            with bench.timed():
+                bench.api.get_objects(SIZES_SITE, str(size), refresh=True)
+    return bench_get_objects_size
+
+
+for _size in OBJECT_COUNTS:
+    SCENARIOS[f"get_objects_{_size}"] = (_get_objects(_size), f"get_objects on a device with {_size} objects")
+
+
+@scenario("get_objects_concurrent", "get_objects of one 1000-object device by 20 callers at once, sharing requests in flight (per call)")
+def bench_get_objects_concurrent(bench: Bench) -> None:
+    callers = 20
+    for _ in range(bench.count(10)):
+        with bench.timed(operations=callers), ThreadPoolExecutor(max_workers=callers) as executor:
+            list(executor.map(lambda _: bench.api.get_objects(SIZES_SITE, "1000", refresh=True), range(callers)))
+
+
+def _listing_body(bench: Bench, size: int) -> bytes:
+    r = bench.api.session.get(f"http://{bench.address}{bench.api.base_url}{SIZES_SITE}/{size}/?alt=JSON")
+    return r.content
+
+
+@scenario("parse_listing", f"single decode of a 10000-object listing with api.response.parse ({CODEC})")
+def bench_parse_listing(bench: Bench) -> None:
+    body = _listing_body(bench, 10000)
+    for _ in range(bench.count(20)):
+        with bench.timed():
+            parse(200, "OK", body)
+
+
+@scenario("parse_listing_double", "check-then-decode of a 10000-object listing with json (pre-pipeline baseline)")
+def bench_parse_listing_double(bench: Bench) -> None:
+    body = _listing_body(bench, 10000)
+    for _ in range(bench.count(20)):
+        with bench.timed():
+            json.loads(body)
+            json.loads(body)
+
+
+@scenario("write_property", "single property PUT")
+def bench_write_property(bench: Bench) -> None:
+    for i in range(bench.count(200)):
+        with bench.timed():
+            bench.api.write_property(SITE, "100", "analog-value", str(i % 16 + 1), "present-value", str(i))
+
+
+@scenario("write_properties", ".multi write of 10 properties to one object")
+def bench_write_properties(bench: Bench) -> None:
+    properties = {"present-value": "1", "description": "bench"}
+    properties.update({f"description[{i}]": str(i) for i in range(8)})
+    for i in range(bench.count(100)):
+        with bench.timed():
+            bench.api.write_properties(SITE, "100", "analog-value", str(i % 16 + 1), properties)
+
+
+@scenario("read_properties", "chunked .multi read of 2 properties from 1000 objects (per chunk of 500)")
+def bench_read_properties(bench: Bench) -> None:
+    refs = [
+        (SITE, str(device), "analog-input", str(instance), property_name)
+        for device in range(100, 110)
+        for instance in range(1, 101)
+        for property_name in ("present-value", "object-name")
+    ]
+    for _ in range(bench.count(5)):
+        with bench.timed(operations=len(refs) // 500):
+            for _ref in bench.api.read_properties(refs):
+                pass
+
+
+@scenario("read_properties_sessions", "read_properties with 8 chunks of 50 in flight over a pool of 4 logins (per chunk)")
+def bench_read_properties_sessions(bench: Bench) -> None:
+    refs = [
+        (SITE, str(device), "analog-input", str(instance), "present-value")
+        for device in range(100, 110)
+        for instance in range(1, 41)
+    ]
+    with EnteliWEB("admin", "password", server_ip=bench.address, sessions=4) as api:
+        api.console.quiet = True
+        api.login()
+        for _ in range(bench.count(5)):
+            with bench.timed(operations=len(refs) // 50):
+                for _ref in api.read_properties(refs, chunk_size=50, in_flight=8):
+                    pass
+
+
+@scenario("read_properties_one_session", "read_properties with 8 chunks of 50 in flight over one login (per chunk)")
+def bench_read_properties_one_session(bench: Bench) -> None:
+    refs = [
+        (SITE, str(device), "analog-input", str(instance), "present-value")
+        for device in range(100, 110)
+        for instance in range(1, 41)
+    ]
+    for _ in range(bench.count(5)):
+        with bench.timed(operations=len(refs) // 50):
+            for _ref in bench.api.read_properties(refs, chunk_size=50, in_flight=8):
+                pass
+
+
+def _write_csv(path: str, rows: int) -> None:
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["site_name", "device", "object_type", "instance", "property_name", "value"])
+        for i in range(rows):
+            writer.writerow([SITE, str(100 + i // 500), "analog-value", str(i % 100 + 1), "present-value", str(i)])
+
+
+@scenario("csv_import", "write_properties_from_csv, per 5000-row file")
+def bench_csv_import(bench: Bench) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "import.csv")
+        _write_csv(path, 5000)
+        for _ in range(bench.count(3)):
+            with bench.timed():
+                for _row in bench.api.write_properties_from_csv(path):
+                    pass
+
+
+@scenario("csv_import_serial", "one write_property PUT per row, per 500-row file (pre-batching baseline)")
+def bench_csv_import_serial(bench: Bench) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "import.csv")
+        _write_csv(path, 500)
+        for _ in range(bench.count(2)):
+            with bench.timed(), open(path, newline="") as f:
+                for row in csv.DictReader(f):
+                    bench.api.write_property(row["site_name"], row["device"], row["object_type"], row["instance"], row["property_name"], row["value"])
+
+
+@scenario("exportcsv", "og exportcsv flow: GetObjects + GetMultiProperty per AI, per device")
+def bench_exportcsv(bench: Bench) -> None:
+    for _ in range(bench.count(3)):
+        with bench.timed():
+            for key in bench.og.GetObjects(bench.og_server, SITE, "100"):
+                if (key.startswith("analog-input,")):
+                    bench.og.GetMultiProperty(bench.og_server, SITE, "100", "analog-input", key.split(",")[1], ["object-name", "present-value", "description"])
+
+
+@scenario("savedb", "og SaveDB: start, poll, download")
+def bench_savedb(bench: Bench) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        for i in range(bench.count(2)):
+            with bench.timed():
+                bench.og.SaveDB(bench.og_server, SITE, str(100 + i % 10), directory)
+
+
+@scenario("savedb_fleet", "og SaveDBs of all 10 devices on a site, 2 networks with at most 2 saves each (per device)")
+def bench_savedb_fleet(bench: Bench) -> None:
+    networks = {str(device): device % 2 for device in range(100, 110)}
+    with tempfile.TemporaryDirectory() as directory:
+        for _ in range(bench.count(2)):
+            with bench.timed(operations=10):
+                bench.og.SaveDBs(bench.og_server, SITE, "*", directory, networks=networks, progress=lambda result, summary: None)
+
+
+@scenario("copyobject", "og CopyObject: suggest, task, paste, poll, merge")
+def bench_copyobject(bench: Bench) -> None:
+    for i in range(bench.count(2)):
+        with bench.timed():
+            bench.og.CopyObject(bench.og_server, SITE, "100", "event-enrollment", "1", str(1000 + i), f"Copy {i}")
+
+
+@scenario("copyobjects", "og CopyObjects: one template to 3 instances on each of 10 devices, packed into paste tasks (per copy)")
+def bench_copyobjects(bench: Bench) -> None:
+    for i in range(bench.count(2)):
+        copies = [(str(device), str(3000 + i * 3 + n), f"Copy {n}") for device in range(100, 110) for n in range(3)]
+        with bench.timed(operations=len(copies)):
+            bench.og.CopyObjects(bench.og_server, SITE, "100", "event-enrollment", "1", copies)
+
+
+@scenario("copyobject_concurrent", "og CopyObject, 20 at once sharing one task progress poll (per copy)")
+def bench_copyobject_concurrent(bench: Bench) -> None:
+    copies = 20
+    for i in range(bench.count(2)):
+        with bench.timed(operations=copies), ThreadPoolExecutor(max_workers=copies) as executor:
+            list(executor.map(
+                lambda n: bench.og.CopyObject(bench.og_server, SITE, "100", "event-enrollment", "1", str(2000 + i * copies + n), f"Copy {n}"),
+                range(copies),
+            ))
+
+
+
+# ------------------------------------------------------------------ runner
+
+def run(names: list[str], latency: float, scale: float, allocations: bool = False, task_delay: float = 0.5) -> dict:
+    """
+    Runs the named scenarios against a fresh stand-in server.
+
+    If `allocations` is `True`, each scenario runs under `tracemalloc`. This slows every scenario
+    down, so latency figures from such a run should not be compared with untraced runs.
+    `task_delay` is how long the server takes to finish a database save or a copy/paste task.
+
+    ## Returns
+    - A JSON-serializable dictionary with the run metadata and one result per scenario.
+    """
+    server = StandInServer(latency=latency, save_delay=task_delay, copy_delay=task_delay)
+    server.populate(SITE, devices=10, objects=600)
+    server.sites[SITE]["100"]["objects"]["event-enrollment,1"] = {"object-name": "EV1", "present-value": "0"}
+    for size in OBJECT_COUNTS:
+        server.populate(SIZES_SITE, devices=1, objects=size, first_device=size)
+
+    EnteliWEB.console.quiet = True
+    results = {}
+    with server.running() as address:
+        bench = Bench(server, address, scale)
+        for name in names:
+            function, description = SCENARIOS[name]
+            bench.samples, bench.operations = [], 0
+            requests_before, wire_before = _traffic(server)
+            if (allocations):
+                tracemalloc.start()
+                blocks_before = len(tracemalloc.take_snapshot().traces)
+            PARSE_STATS.reset()
+            polls_before = bench.og.poller.stats()
+            start = time.perf_counter()
+            function(bench)
+            elapsed = time.perf_counter() - start
+            parsing = PARSE_STATS.snapshot()
+            polls_after = bench.og.poller.stats()
+            if (allocations):
+                blocks_after = len(tracemalloc.take_snapshot().traces)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            requests_after, wire_after = _traffic(server)
+
+            requests = requests_after - requests_before
+            operations = max(1, bench.operations)
+            results[name] = {
+                "description": description,
+                "operations": operations,
+                "samples": len(bench.samples),
+                "seconds": elapsed,
+                "p50_ms": 1000 * _percentile(bench.samples, 50),
+                "p95_ms": 1000 * _percentile(bench.samples, 95),
+                "p99_ms": 1000 * _percentile(bench.samples, 99),
+                "mean_ms": 1000 * statistics.fmean(bench.samples),
+                "ops_per_s": operations / elapsed,
+                "requests_per_s": requests / elapsed,
+                "requests_per_op": requests / operations,
+                "bytes_per_op": (wire_after - wire_before) / operations,
+                "parses_per_op": parsing["parses"] / operations,
+                "parse_ms_per_op": 1000 * parsing["seconds"] / operations,
+            }
+            if (polls_after["polls"] > polls_before["polls"]):
+                results[name]["poll_checks_per_op"] = (polls_after["checks"] - polls_before["checks"]) / operations
+                results[name]["poll_wait_ms_per_op"] = 1000 * (polls_after["waited"] - polls_before["waited"]) / operations
+            if (allocations):
+                results[name]["peak_kib"] = peak / 1024
+                results[name]["blocks_retained"] = blocks_after - blocks_before
+    EnteliWEB.console.quiet = False
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "latency": latency,
+        "scale": scale,
+        "task_delay": task_delay,
+        "codec": CODEC,
+        "allocations": allocations,
+        "results": results,
+    }
+
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+
+def report(run_result: dict, baseline: dict | None = None) -> None:
+    """
+    Prints a results table, with the change against `baseline` where both runs have a scenario.
+    """
+    table = Table(title=f"enteliWEB client benchmarks @ {run_result['commit']} ({run_result.get('codec', 'json')})")
+    for column in ("scenario", "ops", "p50 ms", "p95 ms", "p99 ms", "ops/s", "req/s", "req/op", "bytes/op", "parse ms/op"):
+        table.add_column(column, justify="left" if (column == "scenario") else "right")
+    if (run_result.get("allocations")):
+        table.add_column("peak KiB", justify="right")
+        table.add_column("blocks kept", justify="right")
+    if (baseline is not None):
+        table.add_column("p50 Δ", justify="right")
+        table.add_column("ops/s Δ", justify="right")
+
+    for name, result in run_result["results"].items():
+        row = [
+            name,
+            str(result["operations"]),
+            f"{result['p50_ms']:.2f}",
+            f"{result['p95_ms']:.2f}",
+            f"{result['p99_ms']:.2f}",
+            f"{result['ops_per_s']:.1f}",
+            f"{result['requests_per_s']:.1f}",
+            f"{result['requests_per_op']:.2f}",
+            f"{result['bytes_per_op']:.0f}",
+            f"{result.get('parse_ms_per_op', 0):.3f}",
+        ]
+        if (run_result.get("allocations")):
+            row += [f"{result['peak_kib']:.0f}", str(result["blocks_retained"])]
+        if (baseline is not None):
+            old = baseline["results"].get(name)
+            row += [
+                f"{100 * (result['p50_ms'] / old['p50_ms'] - 1):+.1f}%" if (old and old["p50_ms"]) else "",
+                f"{100 * (result['ops_per_s'] / old['ops_per_s'] - 1):+.1f}%" if (old and old["ops_per_s"]) else "",
+            ]
+        table.add_row(*row)
+    Console(width=max(Console().width, 140)).print(table)
+
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks the enteliWEB clients against the local stand-in server.")
+    parser.add_argument("--only", nargs="*", default=None, choices=sorted(SCENARIOS), metavar="SCENARIO", help=f"Scenarios to run: {', '.join(SCENARIOS)}")
+    parser.add_argument("--latency", type=float, default=0.002, help="Seconds of server latency added to every request")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for the number of operations per scenario")
+    parser.add_argument("--output", default=None, help="JSON results path (defaults to bench/results/<commit>.json)")
+    parser.add_argument("--compare", default=None, help="JSON results of an earlier run to compare against")
+    parser.add_argument("--allocations", action="store_true", help="Trace memory allocations with tracemalloc (slows every scenario down)")
+    parser.add_argument("--task-delay", type=float, default=0.5, help="Seconds the server takes to finish a database save or copy/paste task")
+    args = parser.parse_args()
+
+    run_result = run(args.only or list(SCENARIOS), args.latency, args.scale, args.allocations, args.task_delay)
+
+    output = args.output or os.path.join(os.path.dirname(__file__), "results", f"{run_result['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(run_result, f, indent=2)
+
+    baseline = None
+    if (args.compare is not None):
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    report(run_result, baseline)
+    print(f"Results saved to {output}")
+
+
+
+
+
+if __name__ == "__main__":
+    main()
@@ -20,11 +20,24 @@ import json
 import socket
 import requests
 from rich import box
-from typing import Generator
+from requests.adapters import HTTPAdapter
+from typing import Any, Callable, Generator, Iterable
+from contextlib import contextmanager
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
 from rich.table import Table
 from rich.panel import Panel
 from rich.theme import Theme
 from rich.console import Console
+from api.cache import HierarchyCache
+from api.refs import abbreviation, type_name
+from api.response import Result, parse
+from api.limits import ConcurrencyLimits
+from api.sessions import SessionLogin, SessionPool
+from api.adaptive import AdaptiveLimit
+from api.health import NO_RESPONSE_ERRORS, DeviceHealth
+from api.singleflight import SingleFlight
+from api.deadline import DeadlineExceeded, check, remaining, request_timeout, submit
 
 
 
@@ -36,6 +49,33 @@ class EnteliWEB:
     - `username`: The username for the enteliWEB API.
     - `password`: The password for the enteliWEB API.
     - `server_ip`: The IP address of the enteliWEB server. If not provided, the local machine's IP will be used.
+    - `pool_size`: The number of keep-alive connections to keep open to the server, per session (defaults to `10`).
+    - `cache`: The cache for site, device and object listings. Defaults to a `HierarchyCache` with its default TTLs.
+    - `sessions`: The number of times to log in (defaults to `1`). The server handles the requests of one login
+    one at a time, so concurrent bulk operations (`read_properties`, `discover`, CSV imports) scale with this.
+    - `limits`: The per-device and per-network caps on requests in flight for bulk operations, e.g. with the
+    BACnet network of each device and caps for MS/TP trunks. Defaults to a `ConcurrencyLimits` that leaves devices
+    uncapped, so each call's own `in_flight` (or `concurrency`) applies, but drops a device it learns is slow from
+    its latency to one request at a time.
+    - `concurrency`: The limit on requests in flight to the server as a whole. Defaults to an `AdaptiveLimit` that
+    raises itself while latency stays steady and halves on timeouts, `5xx` responses and enteliWEB error payloads.
+    - `health`: Tracks which devices are offline, so bulk reads and writes for them fail (or are parked) at once
+    instead of each waiting for the server's timeout. Defaults to a `DeviceHealth` that marks a device offline
+    after 3 requests in a row it did not answer, and probes it by reading its device object's name every 10
+    seconds, or every second while parked writes wait for it.
+    - `flights`: Merges identical GETs and `.multi` reads in flight at the same time into one request, decoded
+    once and its `Result` shared with every caller. Defaults to a new `SingleFlight`; pass one to share it between
+    instances. Reads are only merged between instances logged in to the same server as the same user.
+
+    Requests go through a `SessionPool` of pooled `requests.Session`s, so connections are reused and the
+    session cookie and CSRF token are sent automatically once logged in. Each request uses the session with
+    the fewest requests in flight, and a session whose login has expired is logged in again and the request retried.
+    Use the instance as a context manager (or call `close()`) to release the pooled connections.
+
+    Every request has connect and read timeouts for its kind of endpoint (see `api.deadline.TIMEOUTS`).
+    Run a call inside `with api.deadline.Deadline(seconds):` to bound the whole job: every request it makes,
+    from any worker thread, is cut to the time left, and once the deadline passes or the deadline is cancelled,
+    `DeadlineExceeded` is raised and requests not yet sent are dropped, giving back their slots.
     """
     console = Console(theme=Theme({
         "info": "cyan",
@@ -47,7 +87,7 @@ class EnteliWEB:
         "trace": "bold magenta",
     }))
 
-    def __init__(self, username: str, password: str, server_ip: str = None) -> None:
+    def __init__(self, username: str, password: str, server_ip: str = None, pool_size: int = 10, cache: HierarchyCache = None, sessions: int = 1, limits: ConcurrencyLimits = None, concurrency: AdaptiveLimit = None, health: DeviceHealth = None, flights: SingleFlight = None) -> None:
         """
         """
         self.username = username
@@ -62,6 +102,24 @@ class EnteliWEB:
         self.csrf_token_key = "_csrfToken"
         self.base_url = "/enteliweb/api/.bacnet/"
 
+        self.pool_size = pool_size
+        self.pool = SessionPool(sessions, self._new_session, self._login_session)
+        self.session = self.pool.sessions[0].session
+
+        self.cache = HierarchyCache() if (cache is None) else cache
+        self.limits = ConcurrencyLimits(per_device=None) if (limits is None) else limits
+        self.concurrency = AdaptiveLimit() if (concurrency is None) else concurrency
+        if (self.concurrency.on_change is None):
+            self.concurrency.on_change = lambda limit, reason: self.console.log(f"  Concurrency limit {limit} ({reason}).")
+        self.health = DeviceHealth() if (health is None) else health
+        if (self.health.probe is None):
+            self.health.probe = self._probe
+        if (self.health.on_change is None):
+            self.health.on_change = lambda device, online: self.console.log(f"  Device {device[1]} on site {device[0]} is {'back online' if (online) else 'offline'}.")
+        self.flights = SingleFlight() if (flights is None) else flights
+        # (site, device address) -> device instance, as seen in object listings, for `_probe`
+        self._device_instances: dict[tuple[str, str], str] = {}
+
         self.console.log("Initialized EnteliWEB instance.")
         # self.console.print(Panel(f"Username:  {username}\nPassword:  {password}\nServer IP: {server_ip}\nSite name: {site_name}", border_style="cyan"))
         # info_table = Table(title="EnteliWEB Info", show_header=True, box=box.ROUNDED)
@@ -75,46 +133,231 @@ class EnteliWEB:
 
 
 
+    def __enter__(self) -> "EnteliWEB":
+        return self
+
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+
+    def close(self) -> None:
+        """
+        Closes the pooled HTTP sessions and forgets their logins.
+        """
+        self.pool.close()
+        self.health.close()
+        self.session_id = ""
+        self.csrf_token = ""
+
+
+
     def login(self) -> bool:
         """
         *Endpoint:* `/api/auth/basiclogin`
 
-        Retrieves the session ID and CSRF token and stores them for future requests.
+        Logs every session of the pool in, retrieving the session IDs and CSRF tokens for future requests.
 
         ## Returns
-        - `True` if login was successful, `False` otherwise.
+        - `True` if at least one session logged in, `False` otherwise.
         """
         self.console.log(f"Attempting to log in to {self.server} as {self.username}[white]...[/white]")
 
+        logged_in = self.pool.login()
+        self._sync_login()
+        if (logged_in == 0):
+            return False
+
+        if (logged_in < len(self.pool)):
+            self.console.log(f"  Login was successful for {logged_in} of {len(self.pool)} sessions.")
+        else:
+            self.console.log("  Login was successful.")
+        return True
+
+
+
+    def _sync_login(self) -> None:
+        """
+        Sets `session_id` and `csrf_token` to those of the first logged-in session of the pool, or clears them if none is.
+        """
+        first = next((pooled for pooled in self.pool.sessions if (pooled.session_id)), None)
+        self.session_id, self.csrf_token = ("", "") if (first is None) else (first.session_id, first.csrf_token)
+
+
+
+    def show_sessions(self) -> None:
+        """
+        Prints each session of the pool with its requests in flight, requests sent and logins.
+        """
+        table = Table(title="Sessions", show_header=True, box=box.ROUNDED)
+        for column in ("Session", "Logged in", "In flight", "Requests", "Logins"):
+            table.add_column(column, style="cyan" if (column == "Session") else "magenta", justify="right")
+        for stats in self.pool.stats():
+            table.add_row(str(stats["session"]), "yes" if (stats["logged_in"]) else "no", str(stats["in_flight"]), str(stats["requests"]), str(stats["logins"]))
+        self.console.print(table)
+
+
+
+    def show_concurrency(self) -> None:
+        """
+        Prints the history of the adaptive concurrency limit: when it changed, its new value and why.
+        """
+        table = Table(title="Concurrency limit", show_header=True, box=box.ROUNDED)
+        for column in ("Seconds", "Limit", "Reason"):
+            table.add_column(column, style="cyan" if (column == "Seconds") else "magenta", justify="left" if (column == "Reason") else "right")
+        for seconds, limit, reason in self.concurrency.history:
+            table.add_row(f"{seconds:.1f}", str(limit), reason)
+        self.console.print(table)
+
+
+
+    def show_coalescing(self) -> None:
+        """
+        Prints how many reads were asked for, how many requests were sent for them and how many were saved by sharing a request in flight.
+        """
+        stats = self.flights.stats()
+        table = Table(title="Coalesced reads", show_header=True, box=box.ROUNDED)
+        for column in ("Reads", "Sent", "Saved"):
+            table.add_column(column, style="magenta", justify="right")
+        table.add_row(str(stats["calls"]), str(stats["sent"]), str(stats["saved"]))
+        self.console.print(table)
+
+
+
+    def _new_session(self) -> requests.Session:
+        """
+        Creates an HTTP session with its own pool of `pool_size` keep-alive connections.
+        """
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({'Content-Type': 'application/json'})
+        return session
+
+
+
+    def _login_session(self) -> SessionLogin | None:
+        """
+        *Endpoint:* `/api/auth/basiclogin`
+
+        Logs in once for a session of the pool. The login is sent without any pooled session's
+        cookies, so the server issues a fresh session, and the pool swaps the new cookie and CSRF token in.
+
+        ## Returns
+        - The `SessionLogin`, or `None` if the login failed.
+        """
         try:
             r = requests.get(
                 url = f"http://{self.server}/enteliweb/api/auth/basiclogin?alt=JSON",
                 auth = (self.username, self.password),
-                headers = {'Content-Type': 'application/json'}
+                timeout = request_timeout("login"),
             )
         except Exception as e:
             self.console.log(f"  Error during login request: {e}")
-            return False
+            return None
 
         if (r.status_code != requests.codes.ok):
             self.console.log(f"  Login request failed ({r.status_code}): {r.reason}")
-            return False
+            return None
         
         if (r.text.find('Cannot Connect') > -1):
             self.console.log(f"  Login failed: {r.text}")
-            return False
+            return None
         
         if (not self.session_key in r.cookies.keys()):
             self.console.log(f"  Login failed: {r.text}")
-            return False
+            return None
         
-        result = r.json()
-        self.session_id = r.cookies[self.session_key]
-        self.csrf_token = result[self.csrf_token_key]
+        result = self._parse(r)
+        if (not isinstance(result.payload, dict) or self.csrf_token_key not in result.payload):
+            self.console.log(f"  Login failed: {r.text}")
+            return None
+
+        csrf_token = result.payload[self.csrf_token_key]
+        return SessionLogin(r.cookies[self.session_key], csrf_token, r.cookies, {self.csrf_token_key: csrf_token})
+
+
+
+    def _request(self, method: str, url: str, endpoint: str = "default", **kwargs) -> requests.Response:
+        """
+        Sends a request over the least-loaded session of the pool, once `self.concurrency` admits it.
+
+        If the server refuses it as unauthorized (`401`) or forbidden (`403`), e.g. because the login or
+        CSRF token has expired, the session logs in again and the request is sent once more.
+        Requests that fail (e.g. on a timeout) and `5xx` responses are reported to `self.concurrency` as failures.
+
+        ## Parameters
+        - `method`: The HTTP method.
+        - `url`: The URL.
+        - *(Optional)* `endpoint`: The kind of endpoint, selecting the connect and read timeouts from `api.deadline.TIMEOUTS`
+        (defaults to `"default"`). They are cut to the time left to the current `Deadline`, if any.
+        - `kwargs`: Passed on to `requests.Session.request`.
+
+        ## Returns
+        - The response.
+
+        ## Raises
+        - `DeadlineExceeded` if the current job's deadline passes or the job is cancelled before the request is sent.
+        - `requests.RequestException` if the request fails, e.g. `requests.Timeout`.
+        """
+        token = self.concurrency.acquire(timeout=remaining())
+        if (token is None):
+            raise DeadlineExceeded("Job deadline passed while waiting to send a request")
+        start = time.monotonic()
+        ok = None
+        try:
+            with self.pool.acquire() as pooled:
+                csrf_token = pooled.csrf_token
+                r = pooled.session.request(method, url, timeout=request_timeout(endpoint), **kwargs)
+                if (r.status_code in (requests.codes.unauthorized, requests.codes.forbidden)):
+                    refreshed = self.pool.refresh(pooled, csrf_token)
+                    self._sync_login()
+                    if (refreshed):
+                        self.console.log(f"  Session {pooled.index} logged in again.")
+                        start = time.monotonic()
+                        r = pooled.session.request(method, url, timeout=request_timeout(endpoint), **kwargs)
+            ok = (r.status_code < 500)
+        except requests.RequestException:
+            # A request cut short by its job's deadline says nothing about the server
+            ok = None if (remaining() == 0) else False
+            raise
+        finally:
+            self.concurrency.release(token, time.monotonic() - start, ok)
+        # Error payloads are only seen once the body is decoded, in `_parse`
+        r.concurrency_token = token
+        return r
+
+
+
+    def _get(self, url: str) -> Result:
+        """
+        Sends a `GET` with `_request` and decodes it with `_parse`, unless an identical `GET` is already in flight,
+        in which case its `Result` is shared (see `self.flights`). Either way the request is sent, decoded and
+        reported to `self.concurrency` once.
+
+        ## Parameters
+        - `url`: The URL.
+
+        ## Returns
+        - The `Result`. A shared result is the same object for every caller, and must not be modified.
+
+        ## Raises
+        - As `_request`.
+        """
+        return self.flights.do(self._flight_key("GET", url), lambda: self._parse(self._request("GET", url)))
+
+
+
+    def _flight_key(self, method: str, url: str, data: str | None = None) -> tuple[str, ...]:
+        """
+        Identifies a read for `self.flights`. It includes the server and user, so clients sharing one `SingleFlight`
+        only ever share responses to the same login; the site and device are part of the URL or `.multi` body.
+        """
+        return (self.server, self.username, method, url, data)
 
-        self.console.log("  Login was successful.")
-        return True
-    
 
 
     def create_object(self, site_name: str, device: str, object_type: str, instance: str, name: str, properties: dict = {}) -> bool:
@@ -155,21 +398,22 @@ class EnteliWEB:
         for property in properties:
             data[property] = { "$base": "String", "value": properties[property] }
 
-        r = requests.post(
-            url = f"http://{self.server}{self.base_url}{site_name}/{device}?alt=JSON&{self.csrf_token_key}={self.csrf_token}",
-            cookies = {self.session_key: self.session_id},
-            headers = {'Content-Type': 'application/json'},
+        r = self._request(
+            method = "POST",
+            url = f"http://{self.server}{self.base_url}{site_name}/{device}?alt=JSON",
             data = json.dumps(data),
         )
 
-        success, code, msg = self._check_error(r)
-        if (not success or msg != "Created"):
+        result = self._parse(r)
+        if (not result.ok or result.status != requests.codes.created):
             self.console.log(f"  Failed to create object.")
-            self.console.log(f"  Response code: {code}")
-            self.console.log(f"  Response message: {msg}")
+            self.console.log(f"  Response code: {result.code}")
+            self.console.log(f"  Response message: {result.message}")
+            self.cache.invalidate((site_name, device))
             return False
+        self.cache.add_object((site_name, device), f"{type_name(object_type)},{instance}")
         self.console.log(f"  Successfully created object.")
-        return r.reason == requests.codes.created
+        return True
     
 
 
@@ -194,17 +438,19 @@ class EnteliWEB:
 
         self.console.log(f"Attempting to delete object with ID [yellow]{object_type},{instance}[/yellow][white]...[/white]")
 
-        r = requests.delete(
-            url = f"http://{self.server}{self.base_url}{site_name}/{device}/{object_type},{instance}?alt=JSON&{self.csrf_token_key}={self.csrf_token}",
-            cookies = {self.session_key: self.session_id},
+        r = self._request(
+            method = "DELETE",
+            url = f"http://{self.server}{self.base_url}{site_name}/{device}/{object_type},{instance}?alt=JSON",
         )
 
-        success, code, msg = self._check_error(r)
-        if (r.status_code != requests.codes.non_authoritative_info):
+        result = self._parse(r)
+        if (not result.ok or result.status != requests.codes.non_authoritative_info):
             self.console.log(f"  Failed to delete object.")
-            self.console.log(f"  Response code: {code}")
-            self.console.log(f"  Response message: {msg}")
+            self.console.log(f"  Response code: {result.code}")
+            self.console.log(f"  Response message: {result.message}")
+            self.cache.invalidate((site_name, device))
             return False
+        self.cache.remove_object((site_name, device), f"{type_name(object_type)},{instance}")
         self.console.log(f"  Successfully deleted object.")
         return True
 
@@ -236,21 +482,20 @@ class EnteliWEB:
         # Detect sub-property and array index
         property_name = property_name.replace('[', '.').replace(']', '').replace('.', '/')
 
-        r = requests.put(
-            url = f"http://{self.server}{self.base_url}{site_name}/{device}/{object_type},{instance}/{property_name}?alt=JSON&{self.csrf_token_key}={self.csrf_token}",
-            cookies = {self.session_key: self.session_id},
-            headers = {'Content-Type': 'application/json'},
+        r = self._request(
+            method = "PUT",
+            url = f"http://{self.server}{self.base_url}{site_name}/{device}/{object_type},{instance}/{property_name}?alt=JSON",
             data = json.dumps({
                 "$base": "String",
                 "value": value,
             }),
         )
 
-        success, code, msg = self._check_error(r)
-        if (r.status_code != requests.codes.ok):
+        result = self._parse(r)
+        if (not result.ok):
             self.console.log(f"  Failed to write property.")
-            self.console.log(f"  Response code: {code}")
-            self.console.log(f"  Response message: {msg}")
+            self.console.log(f"  Response code: {result.code}")
+            self.console.log(f"  Response message: {result.message}")
             return False
         self.console.log(f"  Successfully wrote property.")
         return True
@@ -290,66 +535,69 @@ class EnteliWEB:
                 "value": properties[property]
             }
 
-        r = requests.post(
-            url = f"http://{self.server}/enteliweb/api/.multi?alt=json&{self.csrf_token_key}={self.csrf_token}",
-            cookies = {self.session_key: self.session_id},
-            headers = {'Content-Type': 'application/json'},
-            data = json.dumps({
-                "$base": "Struct",
-                "values": value_list,
-            }),
-        )
-
-        success, code, msg = self._check_error(r)
-        if (r.reason != requests.codes.ok):     # TODO: CHECK THIS LOGIC
+        result = self._post_multi(value_list)
+        if (not result.ok):
             self.console.log(f"  Failed to write properties.")
-            self.console.log(f"  Response code: {code}")
-            self.console.log(f"  Response message: {msg}")
+            self.console.log(f"  Response code: {result.code}")
+            self.console.log(f"  Response message: {result.message}")
+            return False
+
+        values = result.payload.get("values", {})
+        failed = [
+            property
+            for i, property in enumerate(properties, start=1)
+            if (str(values.get(str(i), {}).get("error", "-1")) != "-1")
+        ]
+        if (failed):
+            self.console.log(f"  Failed to write properties: {', '.join(failed)}")
             return False
         self.console.log(f"  Successfully wrote properties.")
         return True
 
 
 
-    def get_sites(self) -> list[str]:
+    def get_sites(self, refresh: bool = False) -> list[str]:
         """
         *Endpoint:* `/api/.bacnet`
 
         Gets all sites for the current enteliWEB server.
 
+        ## Parameters
+        - *(Optional)* `refresh`: If `True`, the cached listing is ignored and fetched again.
+
         ## Returns
         - A list of sites, or an empty list if none are found.
         """
         if (self.session_id == ""):
             self.console.log("Unable to get sites: Not logged in.")
             return False
+
+        cached = None if (refresh) else self.cache.get("sites", ())
+        if (cached is not None):
+            return cached
         
         self.console.log("Attempting to get sites[white]...[/white]")
 
-        r = requests.get(
-            url = f"http://{self.server}{self.base_url}?alt=JSON&{self.csrf_token_key}={self.csrf_token}",
-            cookies = {self.session_key: self.session_id},
-            headers = {'Content-Type': 'application/json'},
-        )
-
-        success, code, msg = self._check_error(r)
-        if (success is not True):
+        result = self._get(f"http://{self.server}{self.base_url}?alt=JSON")
+        if (not result.ok):
             self.console.log(f"  Failed to get sites.")
-            self.console.log(f"  Response code: {code}")
-            self.console.log(f"  Response message: {msg}")
+            self.console.log(f"  Response code: {result.code}")
+            self.console.log(f"  Response message: {result.message}")
             return []
         
-        result = r.json()
+        result = result.payload or {}
         self.console.log(f"  Successfully got sites.")
-        return [
+        sites = [
             key
             for key in sorted(result)
             if ("nodeType" in result[key] and result[key]["nodeType"] == "NETWORK")
         ]
+        self.cache.put("sites", (), sites)
+        return sites
 
 
 
-    def get_devices(self, site_name: str) -> list[str]:
+    def get_devices(self, site_name: str, refresh: bool = False) -> list[str]:
         """
         *Endpoint:* `/api/.bacnet/<site_name>`
 
@@ -357,6 +605,7 @@ class EnteliWEB:
 
         ## Parameters
         - `site_name`: The name of the site to get devices for.
+        - *(Optional)* `refresh`: If `True`, the cached listing is ignored and fetched again.
 
         ## Returns
         - A list of devices, or an empty list if none are found.
@@ -368,32 +617,33 @@ class EnteliWEB:
         if (self.session_id == ""):
             self.console.log("Unable to get devices: Not logged in.")
             return False
+
+        cached = None if (refresh) else self.cache.get("devices", (site_name,))
+        if (cached is not None):
+            return cached
         
         self.console.log(f"Attempting to get devices for site [yellow]{site_name}[/yellow][white]...[/white]")
 
-        r = requests.get(
-            url = f"http://{self.server}{self.base_url}{site_name}?alt=JSON&{self.csrf_token_key}={self.csrf_token}",
-            cookies = {self.session_key: self.session_id},
-            headers = {'Content-Type': 'application/json'},
-        )
-
-        if (r.status_code != requests.codes.ok):
+        result = self._get(f"http://{self.server}{self.base_url}{site_name}?alt=JSON")
+        if (not result.ok):
             self.console.log(f"  Failed to get devices.")
-            self.console.log(f"  Response code: {r.status_code}")
-            self.console.log(f"  Response message: {r.reason}")
+            self.console.log(f"  Response code: {result.code}")
+            self.console.log(f"  Response message: {result.message}")
             return []
         
-        result = r.json()
-        self.console.log(f"  Successfully got sites.")
-        return [
+        result = result.payload or {}
+        self.console.log(f"  Successfully got devices.")
+        devices = [
             f"{key} - {result[key]['displayName']}"
             for key in sorted(result, key=custom_key)
             if ("nodeType" in result[key] and result[key]["nodeType"] == "DEVICE")
         ]
+        self.cache.put("devices", (site_name,), devices)
+        return devices
 
 
 
-    def get_objects(self, site_name: str, device: str) -> list[str]:
+    def get_objects(self, site_name: str, device: str, refresh: bool = False) -> list[str]:
         """
         *Endpoint:* `/api/.bacnet/<site_name>/<device>`
 
@@ -402,6 +652,7 @@ class EnteliWEB:
         ## Parameters
         - `site_name`: The name of the site that contains the target device.
         - `device`: The device address to get objects for.
+        - *(Optional)* `refresh`: If `True`, the cached listing is ignored and fetched again.
 
         ## Returns
         - A list of BACnet objects, or an empty list if none are found.
@@ -409,44 +660,233 @@ class EnteliWEB:
         if (self.session_id == ""):
             self.console.log("Unable to get objects: Not logged in.")
             return False
+
+        cached = None if (refresh) else self.cache.get("objects", (site_name, device))
+        if (cached is not None):
+            return cached
         
         self.console.log(f"Attempting to get objects for device [yellow]{device}[/yellow] on site [yellow]{site_name}[/yellow][white]...[/white]")
 
         # TODO: check '/' following <device> in url for issue
-        r = requests.get(
-            url = f"http://{self.server}{self.base_url}{site_name}/{device}/?alt=JSON&{self.csrf_token_key}={self.csrf_token}",
-            cookies = {self.session_key: self.session_id},
-            headers = {'Content-Type': 'application/json'},
-        )
-
-        if (r.status_code != requests.codes.ok):
+        result = self._get(f"http://{self.server}{self.base_url}{site_name}/{device}/?alt=JSON")
+        if (not result.ok):
             self.console.log(f"  Failed to get objects.")
-            self.console.log(f"  Response code: {r.status_code}")
-            self.console.log(f"  Response message: {r.reason}")
+            self.console.log(f"  Response code: {result.code}")
+            self.console.log(f"  Response message: {result.message}")
             return []
         
-        result = r.json()
+        result = result.payload or {}
         self.console.log(f"  Successfully got objects.")
-        return [
+        objects = [
             key
             for key in sorted(result)
             if ("$base" in result[key] and result[key]["$base"] == "Object")
         ]
+        self.cache.put("objects", (site_name, device), objects)
+        for object_id in objects:
+            if (object_id.startswith("device,")):
+                self._device_instances[(site_name, device)] = object_id.split(",", 1)[1]
+        return objects
     
 
 
-    def write_properties_from_csv(self, csv_path: str) -> Generator[tuple[str, bool], None, None]:
+    def discover(self, site_name: str, properties: Iterable[str] = (), concurrency: int = 16, per_device: int | None = None, chunk_size: int = 500) -> Generator[tuple[str, str, dict[str, str | None]], None, None]:
         """
-        *Endpoint:* `/api/.bacnet/<site>/<device>/<object_type>,<instance>/<property_name>`
+        *Endpoints:* `/api/.bacnet/<site_name>`, `/api/.bacnet/<site_name>/<device>`, `/api/.multi`
+
+        Walks every device on a site and enumerates its objects concurrently, streaming records as they arrive.
+
+        ## Parameters
+        - `site_name`: The name of the site to crawl.
+        - *(Optional)* `properties`: Property names to read for every object (e.g. `("object-name", "present-value")`),
+        packed into `.multi` reads of up to `chunk_size` properties. By default only the object lists are fetched.
+        - *(Optional)* `concurrency`: The maximum number of requests in flight across the whole crawl (defaults to `16`).
+        - *(Optional)* `per_device`: The maximum number of requests in flight to any one device, on top of the
+        per-device and per-network caps of `limits`. By default only `limits` applies.
+        - *(Optional)* `chunk_size`: The maximum number of properties per `.multi` read (defaults to `500`).
+
+        ## Yields
+        - `(device, object_id, values)` tuples, where `object_id` is as listed by `get_objects` (e.g. `analog-input,1`)
+        and `values` maps each requested property to its value, or `None` if it could not be read.
+
+        ## Usage
+        ```python
+        for device, object_id, values in api.discover("MainSite", properties=["object-name"]):
+            console.log(f"{device}: {object_id} {values['object-name']}")
+        ```
+        """
+        if (self.session_id == ""):
+            self.console.log("Unable to discover site: Not logged in.")
+            return
+
+        properties = list(properties)
+        objects_per_chunk = max(1, chunk_size // max(1, len(properties)))
+        devices = deque(device.split(" - ", 1)[0] for device in self.get_devices(site_name))
+
+        self.console.log(f"Attempting to discover [yellow]{len(devices)}[/yellow] devices on site [yellow]{site_name}[/yellow][white]...[/white]")
+
+        chunks: dict[str, deque[list[str]]] = {}
+        in_flight: dict[str, int] = {}
+        pending: dict[Future, tuple[str, list[str] | None]] = {}
+
+        with self._executor(concurrency) as executor:
+            while (True):
+                check()
+                # Finish reading properties of listed devices before listing new ones
+                for device, queue in chunks.items():
+                    while (queue and (per_device is None or in_flight[device] < per_device) and len(pending) < concurrency and self.limits.acquire(device)):
+                        chunk = queue.popleft()
+                        refs = [(site_name, device, *object_id.split(",", 1), property_name) for object_id in chunk for property_name in properties]
+                        pending[self._submit(executor, device, len(refs), self._read_chunk, refs)] = (device, chunk)
+                        in_flight[device] += 1
+                blocked: deque[str] = deque()
+                while (devices and len(pending) < concurrency):
+                    device = devices.popleft()
+                    if (not self.limits.acquire(device)):
+                        blocked.append(device)
+                        continue
+                    # The time of a listing grows with the number of objects, so it does not count towards the device's latency
+                    pending[self._submit(executor, device, None, self.get_objects, site_name, device)] = (device, None)
+                    in_flight[device] = 1
+                blocked.extend(devices)
+                devices = blocked
+
+                if (not pending):
+                    if (not devices and not any(chunks.values())):
+                        break
+                    # Every remaining device is held at its cap by other operations sharing `limits`
+                    time.sleep(0.01)
+                    continue
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    device, chunk = pending.pop(future)
+                    in_flight[device] -= 1
+
+                    if (chunk is None):
+                        try:
+                            object_ids = future.result()
+                        except requests.RequestException as e:
+                            # A device that does not answer (e.g. a read timeout) is skipped, not the whole crawl
+                            self.console.log(f"  Failed to list the objects of device {device}: {e}")
+                            continue
+                        if (not properties):
+                            for object_id in object_ids:
+                                yield (device, object_id, {})
+                        else:
+                            chunks[device] = deque(object_ids[i:i + objects_per_chunk] for i in range(0, len(object_ids), objects_per_chunk))
+                        continue
+
+                    values = iter(future.result())
+                    for object_id in chunk:
+                        yield (device, object_id, {property_name: next(values)[1] for property_name in properties})
+
+                chunks = {device: queue for device, queue in chunks.items() if (queue or in_flight[device])}
+
+
+
+    def read_properties(self, refs: Iterable[tuple[str, str, str, str, str]], chunk_size: int = 500, in_flight: int = 4) -> Generator[tuple[tuple[str, str, str, str, str], str | None], None, None]:
+        """
+        *Endpoint:* `/api/.multi`
+
+        Reads many properties from any number of objects and devices, packed into batched `.multi` requests.
+
+        ## Parameters
+        - `refs`: An iterable of `(site_name, device, object_type, instance, property_name)` tuples. It is consumed lazily.
+        - *(Optional)* `chunk_size`: The maximum number of properties packed into a single `.multi` request (defaults to `500`).
+        - *(Optional)* `in_flight`: The maximum number of `.multi` requests sent at once (defaults to `4`).
+
+        Each request reads from one device only, and is sent when that device and its network are below
+        their caps in `limits`, so a slow MS/TP trunk never has more than its cap of requests in flight.
+        Refs of a device that `health` has marked offline are yielded as `None` without being read.
+
+        ## Yields
+        - Tuples of the requested ref and its value as a string, or `None` if it could not be read.  
+        Results are yielded chunk by chunk as each response arrives, so they are not necessarily in input order.
+
+        ## Usage
+        ```python
+        refs = ((site, dev, "analog-input", i, "present-value") for i in range(1, 2001))
+        for (site, dev, object_type, instance, property_name), value in api.read_properties(refs):
+            console.log(f"{object_type},{instance}/{property_name} = {value}")
+        ```
+        """
+        if (self.session_id == ""):
+            self.console.log("Unable to read properties: Not logged in.")
+            return
+
+        self.console.log(f"Attempting to read properties in chunks of [yellow]{chunk_size}[/yellow][white]...[/white]")
+
+        refs = iter(refs)
+        partial: dict[tuple[str, str], list[tuple[str, str, str, str, str]]] = {}
+        ready: deque[list[tuple[str, str, str, str, str]]] = deque()
+        pending: set[Future] = set()
+        exhausted = False
+        with self._executor(in_flight) as executor:
+            while True:
+                check()
+                # Pack the refs into chunks of one device of one site each, so every chunk counts against its device's caps
+                while (not exhausted and len(ready) < 2 * in_flight):
+                    ref = next(refs, None)
+                    if (ref is None):
+                        exhausted = True
+                        ready.extend(partial.values())
+                        partial = {}
+                        break
+                    chunk = partial.setdefault(ref[:2], [])
+                    chunk.append(ref)
+                    if (len(chunk) >= chunk_size):
+                        ready.append(partial.pop(ref[:2]))
+
+                blocked: deque[list[tuple[str, str, str, str, str]]] = deque()
+                while (ready and len(pending) < in_flight):
+                    chunk = ready.popleft()
+                    if (not self.health.online(chunk[0][:2])):
+                        yield from ((ref, None) for ref in chunk)
+                        continue
+                    if (not self.limits.acquire(chunk[0][1])):
+                        blocked.append(chunk)
+                        continue
+                    pending.add(self._submit(executor, chunk[0][1], len(chunk), self._read_chunk, chunk))
+                blocked.extend(ready)
+                ready = blocked
+
+                if (not pending):
+                    if (exhausted and not ready):
+                        break
+                    # Every remaining chunk is held at its cap by other operations sharing `limits`
+                    time.sleep(0.01)
+                    continue
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+
+
+
+    def write_properties_from_csv(self, csv_path: str, batch_size: int = 100, in_flight: int = 4, ordered: bool = True, park: bool = False) -> Generator[tuple[str, bool], None, None]:
+        """
+        *Endpoint:* `/api/.multi`
 
         Writes values to BACnet objects' properties from a CSV file.
 
+        Consecutive rows for the same device are grouped into one `.multi` write of up to `batch_size` rows,
+        and up to `in_flight` batches are sent at once, within the per-device and per-network caps of `limits`. The file is read as a stream, so memory use does not
+        grow with the number of rows.
+
         ## Parameters
         - `csv_path`: The file path to the CSV file containing the properties to write.  
         The CSV should have columns: `site_name`, `device`, `object_type`, `instance`, `property_name`, `value`.
+        - *(Optional)* `batch_size`: The maximum number of rows written by a single `.multi` request (defaults to `100`).
+        - *(Optional)* `in_flight`: The maximum number of batches sent at once (defaults to `4`).
+        - *(Optional)* `ordered`: If `True` (default), results are yielded in file order.
+        If `False`, they are yielded as each batch completes, which keeps more batches in flight.
+        - *(Optional)* `park`: What to do with the rows of a device that `health` has marked offline. If `False` (default),
+        they fail at once without being sent. If `True`, they are set aside and written once the device is back online,
+        after the rest of the file (so out of file order); the call then waits as long as it takes, or until the current `Deadline`.
 
         ## Yields
-        - Tuples containing the property name and a boolean indicating success or failure for each property write.
+        - Tuples containing the property path and a boolean indicating success or failure for each property write.
 
         ## Usage
         ```python
@@ -460,55 +900,378 @@ class EnteliWEB:
             return
         
         self.console.log(f"Attempting to write properties from CSV file [yellow]{csv_path}[/yellow][white]...[/white]")
-        
+
         try:
-            with open(csv_path, mode='r') as csv_file:
+            with open(csv_path, mode='r') as csv_file, self._executor(in_flight) as executor:
                 import csv
-                reader = csv.DictReader(csv_file)
-                for row in reader:
-                    site_name = row['site_name']
-                    device = row['device']
-                    object_type = row['object_type']
-                    instance = row['instance']
-                    property_name = row['property_name']
-                    value = row['value']
-
-                    success = self.write_property(site_name, device, object_type, instance, property_name, value)
-                    yield (f"{site_name}/{device}/{object_type},{instance}/{property_name}", success)
+                batches = self._group_rows(csv.DictReader(csv_file), batch_size)
+
+                parked: list[list[tuple[str, str, str, str, str, str]]] = []
+                if (ordered):
+                    queue: deque[Future] = deque()
+                    for batch in batches:
+                        check()
+                        if (not self.health.online(batch[0][:2])):
+                            if (park):
+                                parked.append(batch)
+                            else:
+                                queue.append(self._offline_batch(batch))
+                            continue
+                        # Wait for earlier batches while the batch's device or network is at its cap
+                        while (not self.limits.acquire(batch[0][1])):
+                            if (queue):
+                                yield from queue.popleft().result()
+                            else:
+                                time.sleep(0.01)
+                        queue.append(self._submit(executor, batch[0][1], len(batch), self._write_chunk, batch))
+                        if (len(queue) >= in_flight):
+                            yield from queue.popleft().result()
+                    while (queue):
+                        yield from queue.popleft().result()
+                else:
+                    pending: set[Future] = set()
+                    for batch in batches:
+                        check()
+                        if (not self.health.online(batch[0][:2])):
+                            if (park):
+                                parked.append(batch)
+                            else:
+                                pending.add(self._offline_batch(batch))
+                            continue
+                        while (not self.limits.acquire(batch[0][1])):
+                            if (pending):
+                                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                                for future in done:
+                                    yield from future.result()
+                            else:
+                                time.sleep(0.01)
+                        pending.add(self._submit(executor, batch[0][1], len(batch), self._write_chunk, batch))
+                        if (len(pending) >= in_flight):
+                            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            for future in done:
+                                yield from future.result()
+                    for future in as_completed(pending):
+                        yield from future.result()
+                yield from self._write_parked(executor, parked, in_flight)
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             self.console.log(f"  Error reading CSV file: {e}")
             return
 
 
 
-    def _check_error(self, response: requests.Response) -> tuple[bool, int, str]:
+    def _offline_batch(self, batch: list[tuple[str, str, str, str, str, str]]) -> Future:
+        """
+        Returns a completed future failing every row of a batch for an offline device, without sending it.
+        """
+        future: Future = Future()
+        future.set_result([
+            (f"{site_name}/{device}/{object_type},{instance}/{property_name}", False)
+            for site_name, device, object_type, instance, property_name, _ in batch
+        ])
+        return future
+
+
+
+    def _write_parked(self, executor: ThreadPoolExecutor, parked: list[list[tuple[str, str, str, str, str, str]]], in_flight: int) -> Generator[tuple[str, bool], None, None]:
+        """
+        Writes the batches set aside for offline devices as their devices come back online, yielding results as each batch completes.
+        """
+        pending: set[Future] = set()
+        while (parked or pending):
+            check()
+            waiting = []
+            for batch in parked:
+                if (len(pending) < in_flight and self.health.online(batch[0][:2]) and self.limits.acquire(batch[0][1])):
+                    pending.add(self._submit(executor, batch[0][1], len(batch), self._write_chunk, batch))
+                else:
+                    waiting.append(batch)
+            parked = waiting
+
+            if (pending):
+                done, pending = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+            elif (self.health.wait({batch[0][:2] for batch in parked}, timeout=1.0)):
+                # A device is back but held at its cap by other operations sharing `limits`
+                time.sleep(0.01)
+
+
+
+    @contextmanager
+    def _executor(self, workers: int) -> Generator[ThreadPoolExecutor, None, None]:
+        """
+        A thread pool for one bulk operation. However the operation ends (its deadline passing, an error, or
+        the caller closing the generator), requests not yet started are cancelled, giving their slots back at once.
+        Requests already sent finish within their timeouts.
+        """
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            yield executor
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+
+    def _submit(self, executor: ThreadPoolExecutor, device: str, items: int | None, function: Callable[..., Any], *args) -> Future:
+        """
+        Submits `function(*args)` under `_limited` for a slot already taken with `self.limits.acquire(device)`,
+        running it under the caller's current deadline. If it is cancelled before it starts, the slot is given back.
+        """
+        def released(future: Future) -> None:
+            if (future.cancelled()):
+                self.limits.release(device)
+
+        future = submit(executor, self._limited, device, items, function, *args)
+        future.add_done_callback(released)
+        return future
+
+
+
+    def _limited(self, device: str, items: int | None, function: Callable[..., Any], *args) -> Any:
+        """
+        Runs `function(*args)` for a slot taken with `self.limits.acquire(device)`, then gives the slot back
+        with the time taken per item (property read or written), so the limits learn how fast the device answers
+        whatever the chunk size. With `items` of `None`, the time is not learned from.
+        """
+        start = time.monotonic()
+        try:
+            return function(*args)
+        finally:
+            self.limits.release(device, seconds=None if (items is None) else (time.monotonic() - start) / max(1, items))
+
+
+
+    def _group_rows(self, rows: Iterable[dict], batch_size: int) -> Generator[list[tuple[str, str, str, str, str, str]], None, None]:
         """
-        Checks a response for errors.
+        Groups consecutive CSV rows for the same device into batches for `.multi` writes.
 
         ## Parameters
-        - `response`: The response object to check.
+        - `rows`: An iterable of CSV rows with `site_name`, `device`, `object_type`, `instance`, `property_name` and `value` keys.
+        - `batch_size`: The maximum number of rows in one batch.
+
+        ## Yields
+        - Lists of `(site_name, device, object_type, instance, property_name, value)` tuples, all for the same device.
+        """
+        batch = []
+        for row in rows:
+            item = (row['site_name'], row['device'], row['object_type'], row['instance'], row['property_name'], row['value'])
+            if (batch and (len(batch) >= batch_size or batch[-1][:2] != item[:2])):
+                yield batch
+                batch = []
+            batch.append(item)
+        if (batch):
+            yield batch
+
+
+
+    def _write_chunk(self, chunk: list[tuple[str, str, str, str, str, str]]) -> list[tuple[str, bool]]:
+        """
+        Writes one chunk of property values with a single `.multi` request.
+
+        ## Parameters
+        - `chunk`: A list of `(site_name, device, object_type, instance, property_name, value)` tuples.
 
         ## Returns
-        - `success`: `True` if the request was successful, `False` otherwise.
-        - `code`: The HTTP status code of the response.
-        - `msg`: The error message, if any.
+        - A list of `(path, success)` tuples in the same order as `chunk`.
         """
-        result = response.json() if (response.status_code == requests.codes.ok) else {}
+        value_list = {
+            "$base": "List",
+        }
 
-        if ("error" in result and result["error"] != "-1"):
-            code = result["error"]
-            msg	= result["errorText"]
-        else:
-            if (response.status_code == requests.codes.non_authoritative_info):
-                code = str(requests.codes.ok)
-                msg = "OK"
+        for i, (site_name, device, object_type, instance, property_name, value) in enumerate(chunk, start=1):
+            property_name = property_name.replace('[', '.').replace(']', '').replace('.', '/')
+            value_list[i] = {
+                "$base": "String",
+                "via": f"/.bacnet/{site_name}/{device}/{object_type},{instance}/{property_name}",
+                "value": value,
+            }
+
+        result = self._post_multi(value_list, device=chunk[0][:2])
+        paths = [f"{site_name}/{device}/{object_type},{instance}/{property_name}" for site_name, device, object_type, instance, property_name, _ in chunk]
+
+        if (not result.ok):
+            self.console.log(f"  Failed to write a chunk of {len(chunk)} properties.")
+            self.console.log(f"  Response code: {result.code}")
+            self.console.log(f"  Response message: {result.message}")
+            return [(path, False) for path in paths]
+
+        values = result.payload.get("values", {})
+        results = [
+            (path, str(values.get(str(i), {}).get("error", "-1")) == "-1")
+            for i, path in enumerate(paths, start=1)
+        ]
+
+        self.console.log(f"  Wrote a chunk of {len(chunk)} properties.")
+        return results
+
+
+
+    def _post_multi(self, value_list: dict, lifetime: bool = False, device: tuple[str, str] | None = None) -> Result:
+        """
+        *Endpoint:* `/api/.multi`
+
+        Sends one `.multi` request.
+
+        ## Parameters
+        - `value_list`: The `List` of `via` items to read or write.
+        - *(Optional)* `lifetime`: If `True`, a zero `lifetime` is sent, as required for reads. A read identical to one
+        already in flight is not sent: it shares that one's `Result` (see `self.flights`).
+        - *(Optional)* `device`: The `(site_name, device)` the items belong to, to record in `health` whether it answered.
+
+        The request is decoded, reported to `self.concurrency` and recorded in `health` once, however many reads share it.
+
+        ## Returns
+        - The `Result` of the request. On success its `payload` is a dictionary whose `values` are keyed by item index.
+        A shared result is the same object for every caller, and must not be modified.
+        """
+        body = {
+            "$base": "Struct",
+            "values": value_list,
+        }
+        if (lifetime):
+            body["lifetime"] = {
+                "$base": "Unsigned",
+                "value": "0"
+            }
+
+        url = f"http://{self.server}/enteliweb/api/.multi?alt=json"
+        data = json.dumps(body)
+
+        def send() -> Result:
+            try:
+                r = self._request(
+                    method = "POST",
+                    url = url,
+                    endpoint = "multi",
+                    data = data,
+                )
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                result = Result(False, 0, "", str(e))
             else:
-                code = str(response.status_code)
-                msg	= response.reason
+                result = self._parse(r)
+                if (result.ok and not isinstance(result.payload, dict)):
+                    result = Result(False, result.status, result.code, "Malformed response", result.payload)
+            if (device is not None):
+                self._record_health(device, result)
+            return result
+
+        # Reads are merged with identical reads in flight; writes are always sent
+        if (lifetime):
+            return self.flights.do(self._flight_key("POST", url, data), send)
+        return send()
+
+
+
+    def _read_chunk(self, chunk: list[tuple[str, str, str, str, str]]) -> list[tuple[tuple[str, str, str, str, str], str | None]]:
+        """
+        Reads one chunk of property refs with a single `.multi` request.
+
+        ## Parameters
+        - `chunk`: A list of `(site_name, device, object_type, instance, property_name)` tuples.
+
+        ## Returns
+        - A list of `(ref, value)` tuples in the same order as `chunk`, with `None` for any value that could not be read.
+        """
+        value_list = {
+            "$base": "List",
+        }
+
+        for i, (site_name, device, object_type, instance, property_name) in enumerate(chunk, start=1):
+            property_name = property_name.replace('[', '.').replace(']', '').replace('.', '/')
+            value_list[i] = {
+                "$base": "Any",
+                "via": f"/.bacnet/{site_name}/{device}/{object_type},{instance}/{property_name}",
+            }
+
+        result = self._post_multi(value_list, lifetime=True, device=chunk[0][:2])
+
+        if (not result.ok):
+            self.console.log(f"  Failed to read a chunk of {len(chunk)} properties.")
+            self.console.log(f"  Response code: {result.code}")
+            self.console.log(f"  Response message: {result.message}")
+            return [(ref, None) for ref in chunk]
+
+        values = result.payload.get("values", {})
+        results = []
+        for i, ref in enumerate(chunk, start=1):
+            item = values.get(str(i), {})
+            if ("value" in item and "error" not in item):
+                results.append((ref, str(item["value"])))
+            else:
+                results.append((ref, None))
+        self.console.log(f"  Successfully read a chunk of {len(chunk)} properties.")
+        return results
+
+
+
+    def _record_health(self, device: tuple[str, str], result: Result) -> None:
+        """
+        Records in `health` whether a device answered a `.multi` request.
+
+        The device answered if any item of the request succeeded. It did not if the request itself failed
+        (e.g. timed out), or if no item succeeded and some failed with "device not responding" or a timeout
+        (`NO_RESPONSE_ERRORS`). Object and property errors (e.g. a row naming an object that does not exist),
+        and requests refused by the server as a whole (a `5xx` or an error payload), say nothing about whether
+        the device is online, and are not recorded.
+        """
+        if (result.status == 0):
+            self.health.record(device, False)
+            return
+        if (not result.ok):
+            return
+        codes = [str(item.get("error", "-1")) for item in result.payload.get("values", {}).values() if (isinstance(item, dict))]
+        if ("-1" in codes):
+            self.health.record(device, True)
+        elif (any(code in NO_RESPONSE_ERRORS for code in codes)):
+            self.health.record(device, False)
+
+
+
+    def _probe(self, device: tuple[str, str]) -> bool:
+        """
+        *Endpoint:* `/api/.bacnet/<site_name>/<device>/device,<device>/object-name`
+
+        Checks whether an offline device answers again, by reading the name of its device object.
+
+        ## Parameters
+        - `device`: The `(site_name, device)` to check. Its device instance is taken from its object listing
+        (see `get_objects`), or assumed to equal its address if it has not been listed.
+
+        ## Returns
+        - `True` if the device answered.
+        """
+        site_name, address = device
+        instance = self._device_instances.get(device, address)
+        r = self._request(
+            method = "GET",
+            url = f"http://{self.server}{self.base_url}{site_name}/{address}/device,{instance}/object-name?alt=json",
+        )
+        # Parsed without `_parse`: a device that is still offline is not a sign of server overload
+        return parse(r.status_code, r.reason, r.content).ok
+
+
+
+    def _parse(self, response: requests.Response) -> Result:
+        """
+        Decodes a response once and checks it for errors (see `api.response.parse`).
+        An enteliWEB error payload in a response sent by `_request` is reported to `self.concurrency` as a failure.
+
+        ## Parameters
+        - `response`: The response object to check.
+
+        ## Returns
+        - The `Result` of the request, carrying the status, error code and decoded payload.
+        """
+        result = parse(response.status_code, response.reason, response.content)
+        token = getattr(response, "concurrency_token", None)
+        if (token is not None and not result.ok and 200 <= result.status < 300):
+            self.concurrency.failed(token, f"error {result.code}")
+        return result
 
-        success = (code == str(response.status_code))
-        return (success, code, msg)
-    
 
 
     def _find_abbreviation(self, bacnet_object_name: str) -> str:
@@ -521,47 +1284,7 @@ class EnteliWEB:
         ## Returns
         - The abbreviation of the BACnet object name if found, else an empty string.
         """
-        object_name_map = {
-            "ACC": "access-credential",         "EL": "event-log",
-            "ACD": "access-door",               "FIL": "file",
-            "ACP": "access-point",              "GGP": "global-group",
-            "ACR": "access-rights",             "GR": "group",
-            "ACU": "access-user",               "IV": "integer-value",
-            "ACZ": "access-zone",               "LAV": "large-analog-value",
-            "AC": "accumulator",                "ZP": "life-safety-point",
-            "AIC": "aic",                       "ZN": "life-safety-zone",
-            "AE": "alert-enrollment",           "LO": "lighting-output",
-            "AI": "analog-input",               "LS": "load-control",
-            "AO": "analog-output",              "CO": "loop",
-            "AV": "analog-value",               "MIC": "mic",
-            "AOC": "aoc",                       "MOC": "moc",
-            "AT": "at",                         "MT": "mt",
-            "AVG": "averaging",                 "MI": "multi-state-input",
-            "BDC": "bdc",                       "MO": "multi-state-output",
-            "BDE": "bde",                       "MV": "multi-state-value",
-            "BI": "binary-input",               "NET": "net",
-            "BO": "binary-output",              "NS": "network-security",
-            "BV": "binary-value",               "EVC": "notification-class",
-            "BSV": "bitstring-value",           "NF": "notification-forwarder",
-            "BT": "bt",                         "OSV": "octetstring-value",
-            "CAL": "calendar",                  "ORS": "ors",
-            "CNL": "channel",                   "OS": "os",
-            "CSV": "characterstring-value",     "PI": "pi",
-            "CS": "command",                    "PIV": "positive-integer-value",
-            "ACI": "credential-data-input",     "PG": "program",
-            "DPValue": "date-pattern-value",    "PC": "pulse-converter",
-            "DV": "date-value",                 "SCH": "schedule",
-            "DTP": "datetime-pattern-value",    "SV": "structured-view",
-            "DTV": "datetime-value",            "TPV": "time-pattern-value",
-            "DES": "des",                       "TV": "time-value",
-            "DEV": "device",                    "TL": "trend-log",
-            "DRT": "drt",                       "TLM": "trend-log-multiple",
-            "EV": "event-enrollment",           "Unassigned 1": "unassigned-1",
-        }
-        for object_abbreviation, mapped_bacnet_object_name in object_name_map.items():
-            if bacnet_object_name == mapped_bacnet_object_name:
-                return object_abbreviation
-        return ""
+        return abbreviation(bacnet_object_name)
 
 
 
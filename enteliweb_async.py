@@ -0,0 +1,489 @@
+"""
+`enteliweb_async.py`
+
+Asyncio wrapper for the `enteliWEB` REST API, built on `aiohttp`.
+
+Mirrors the surface of `enteliweb.EnteliWEB`, but every call is a coroutine and all requests
+share one connection pool and one global concurrency limit. This lets a single process keep
+hundreds of reads and writes in flight, and lets the Textual TUI call the API without blocking
+its event loop.
+
+## Usage
+```python
+async with AsyncEnteliWEB("admin", "password", "192.168.1.100", concurrency=100) as api:
+    await api.login()
+    devices = await api.get_devices("MainSite")
+    results = await asyncio.gather(*(
+        api.write_property("MainSite", "100", "analog-value", str(i), "present-value", "1")
+        for i in range(1, 500)
+    ))
+```
+"""
+import json
+import socket
+import asyncio
+import aiohttp
+from enteliweb import EnteliWEB
+from api.response import Result, parse
+from api.deadline import remaining, request_timeout
+from api.singleflight import SingleFlight
+
+
+
+class AsyncEnteliWEB:
+    """
+    Asynchronous class for interacting with the `enteliWEB` API.
+
+    ## Init Parameters
+    - `username`: The username for the enteliWEB API.
+    - `password`: The password for the enteliWEB API.
+    - `server_ip`: The IP address of the enteliWEB server. If not provided, the local machine's IP will be used.
+    - `concurrency`: The maximum number of requests in flight at once, across all callers (defaults to `50`).
+    - `flights`: Merges identical GETs in flight at the same time (e.g. the TUI and a background job listing the
+    same device) into one request, sharing its result. Defaults to a new `SingleFlight`; one shared between instances
+    only merges GETs sent to the same server as the same user.
+    """
+    console = EnteliWEB.console
+
+    def __init__(self, username: str, password: str, server_ip: str = None, concurrency: int = 50, flights: SingleFlight = None) -> None:
+        """
+        """
+        self.username = username
+        self.password = password
+        self.server = (
+            socket.gethostbyname(socket.gethostname())
+            if (server_ip is None) else server_ip.split("://")[-1]
+        )
+        self.session_id = ""
+        self.csrf_token = ""
+        self.session_key = "enteliWebID"
+        self.csrf_token_key = "_csrfToken"
+        self.base_url = "/enteliweb/api/.bacnet/"
+
+        self.concurrency = concurrency
+        self._limit = asyncio.Semaphore(concurrency)
+        self.flights = SingleFlight() if (flights is None) else flights
+        self._session: aiohttp.ClientSession | None = None
+
+        self.console.log("Initialized AsyncEnteliWEB instance.")
+
+
+
+    async def __aenter__(self) -> "AsyncEnteliWEB":
+        return self
+
+
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+
+
+    async def close(self) -> None:
+        """
+        Closes the pooled HTTP session and forgets the current login.
+        """
+        if (self._session is not None):
+            await self._session.close()
+            self._session = None
+        self.session_id = ""
+        self.csrf_token = ""
+
+
+
+    async def login(self) -> bool:
+        """
+        *Endpoint:* `/api/auth/basiclogin`
+
+        Retrieves the session ID and CSRF token and stores them for future requests.
+
+        ## Returns
+        - `True` if login was successful, `False` otherwise.
+        """
+        self.console.log(f"Attempting to log in to {self.server} as {self.username}[white]...[/white]")
+
+        # Drop any stale session so the server issues a fresh one
+        self._get_session().cookie_jar.clear()
+        self.csrf_token = ""
+
+        try:
+            result = await self._request(
+                "GET", "/enteliweb/api/auth/basiclogin",
+                endpoint = "login",
+                auth = aiohttp.BasicAuth(self.username, self.password),
+            )
+        except Exception as e:
+            self.console.log(f"  Error during login request: {e}")
+            return False
+
+        if (result.status != 200):
+            self.console.log(f"  Login request failed ({result.status}): {result.message}")
+            return False
+
+        # A "Cannot Connect" page or any other non-JSON body leaves the payload without a token
+        if (not isinstance(result.payload, dict) or self.csrf_token_key not in result.payload):
+            self.console.log(f"  Login failed: {result.message}")
+            return False
+
+        cookies = {cookie.key: cookie.value for cookie in self._get_session().cookie_jar}
+        if (not self.session_key in cookies):
+            self.console.log(f"  Login failed: {result.message}")
+            return False
+
+        self.session_id = cookies[self.session_key]
+        self.csrf_token = result.payload[self.csrf_token_key]
+
+        self.console.log("  Login was successful.")
+        return True
+
+
+
+    async def create_object(self, site_name: str, device: str, object_type: str, instance: str, name: str, properties: dict = {}) -> bool:
+        """
+        *Endpoint:* `/api/.bacnet/{site}/{device}`
+
+        Creates a new BACnet object for a device.
+
+        ## Parameters
+        - `site_name`: The site that contains the target device.
+        - `device`: The device address in which to create the object.
+        - `object_type`: The name of BACnet object to create (e.g., `AI`, `AO`, `AV`, etc.).
+        - `instance`: The instance number of the BACnet object.
+        - `name`: The desired name of the BACnet object.
+        - *(Optional)* `properties`:  A dictionary of additional properties to set on the BACnet object.
+
+        ## Returns
+        - `True` if the object was created successfully, `False` otherwise.
+        """
+        if (self.session_id == ""):
+            self.console.log("Unable to create object: Not logged in.")
+            return False
+
+        self.console.log(f"Attempting to create object with name [yellow]{name}[/yellow] and ID [yellow]{object_type},{instance}[/yellow][white]...[/white]")
+
+        data = {
+            "$base": "Object",
+            "object-identifier": {
+                "$base": "ObjectIdentifier",
+                "value": f"{object_type},{instance}"
+            },
+            "object-name": {
+                "$base": "String",
+                "value": name
+            },
+        }
+
+        for property in properties:
+            data[property] = { "$base": "String", "value": properties[property] }
+
+        result = await self._request("POST", f"{self.base_url}{site_name}/{device}", data=json.dumps(data))
+        if (not result.ok or result.status != 201):
+            self.console.log(f"  Failed to create object.")
+            self.console.log(f"  Response code: {result.code}")
+            self.console.log(f"  Response message: {result.message}")
+            return False
+        self.console.log(f"  Successfully created object.")
+        return True
+
+
+
+    async def delete_object(self, site_name: str, device: str, object_type: str, instance: str) -> bool:
+        """
+        *Endpoint:* `/api/.bacnet/{site}/{device}/{object_type},{instance}`
+
+        Deletes a BACnet object from a device.
+
+        ## Parameters
+        - `site_name`: The site that contains the target device.
+        - `device`: The device address from which to delete the object.
+        - `object_type`: The name of the BACnet object to delete (e.g., `AI`, `AO`, `AV`, etc.).
+        - `instance`: The instance number of the BACnet object.
+
+        ## Returns
+        - `True` if the object was deleted successfully, `False` otherwise.
+        """
+        if (self.session_id == ""):
+            self.console.log("Unable to delete object: Not logged in.")
+            return False
+
+        self.console.log(f"Attempting to delete object with ID [yellow]{object_type},{instance}[/yellow][white]...[/white]")
+
+        result = await self._request("DELETE", f"{self.base_url}{site_name}/{device}/{object_type},{instance}")
+        if (not result.ok or result.status != 203):
+            self.console.log(f"  Failed to delete object.")
+            self.console.log(f"  Response code: {result.code}")
+            self.console.log(f"  Response message: {result.message}")
+            return False
+        self.console.log(f"  Successfully deleted object.")
+        return True
+
+
+
+    async def write_property(self, site_name: str, device: str, object_type: str, instance: str, property_name: str, value: str) -> bool:
+        """
+        *Endpoint:* `/api/.bacnet/<site>/<device>/<object_type>,<instance>/<property_name>`
+
+        Writes a value to a BACnet object's property.
+
+        ## Parameters
+        - `site_name`: The site that contains the target device.
+        - `device`: The device address that contains the target object.
+        - `object_type`: The type of the BACnet object (e.g., `AI`, `AO`, `AV`, etc.).
+        - `instance`: The instance number of the BACnet object.
+        - `property_name`: The name of the property to write.
+        - `value`: The value to write to the property.
+
+        ## Returns
+        - `True` if the property was written successfully, `False` otherwise.
+        """
+        if (self.session_id == ""):
+            self.console.log("Unable to write property: Not logged in.")
+            return False
+
+        self.console.log(f"Attempting to write property [yellow]{property_name}[/yellow] with value [yellow]{value}[/yellow][white]...[/white]")
+
+        # Detect sub-property and array index
+        property_name = property_name.replace('[', '.').replace(']', '').replace('.', '/')
+
+        result = await self._request(
+            "PUT", f"{self.base_url}{site_name}/{device}/{object_type},{instance}/{property_name}",
+            data = json.dumps({
+                "$base": "String",
+                "value": value,
+            }),
+        )
+
+        if (not result.ok):
+            self.console.log(f"  Failed to write property.")
+            self.console.log(f"  Response code: {result.code}")
+            self.console.log(f"  Response message: {result.message}")
+            return False
+        self.console.log(f"  Successfully wrote property.")
+        return True
+
+
+
+    async def write_properties(self, site_name: str, device: str, object_type: str, instance: str, properties: dict) -> bool:
+        """
+        *Endpoint:* `/api/.multi`
+
+        Writes multiple properties to a BACnet object.
+
+        ## Parameters
+        - `site_name`: The site that contains the target device.
+        - `device`: The device address that contains the target object.
+        - `object_type`: The type of the BACnet object (e.g., `AI`, `AO`, `AV`, etc.).
+        - `instance`: The instance number of the BACnet object.
+        - `properties`: A dictionary of property names and values to write.
+
+        ## Returns
+        - `True` if all properties were written successfully, `False` otherwise.
+        """
+        if (self.session_id == ""):
+            self.console.log("Unable to write properties: Not logged in.")
+            return False
+
+        self.console.log(f"Attempting to write multiple properties to [yellow]{object_type},{instance}[/yellow] on device [yellow]{device}[/yellow][white]...[/white]")
+
+        value_list = {
+            "$base": "List",
+        }
+
+        for i, property in enumerate(properties, start=1):
+            value_list[i] = {
+                "$base": "String",
+                "via": f"/.bacnet/{site_name}/{device}/{object_type},{instance}/{property}",
+                "value": properties[property]
+            }
+
+        result = await self._request(
+            "POST", "/enteliweb/api/.multi",
+            endpoint = "multi",
+            data = json.dumps({
+                "$base": "Struct",
+                "values": value_list,
+            }),
+        )
+
+        if (not result.ok):
+            self.console.log(f"  Failed to write properties.")
+            self.console.log(f"  Response code: {result.code}")
+            self.console.log(f"  Response message: {result.message}")
+            return False
+
+        values = result.payload.get("values", {}) if (isinstance(result.payload, dict)) else {}
+        failed = [
+            property
+            for i, property in enumerate(properties, start=1)
+            if (str(values.get(str(i), {}).get("error", "-1")) != "-1")
+        ]
+        if (failed):
+            self.console.log(f"  Failed to write properties: {', '.join(failed)}")
+            return False
+        self.console.log(f"  Successfully wrote properties.")
+        return True
+
+
+
+    async def get_sites(self) -> list[str]:
+        """
+        *Endpoint:* `/api/.bacnet`
+
+        Gets all sites for the current enteliWEB server.
+
+        ## Returns
+        - A list of sites, or an empty list if none are found.
+        """
+        if (self.session_id == ""):
+            self.console.log("Unable to get sites: Not logged in.")
+            return []
+
+        self.console.log("Attempting to get sites[white]...[/white]")
+
+        result = await self._request("GET", self.base_url)
+        if (not result.ok):
+            self.console.log(f"  Failed to get sites.")
+            self.console.log(f"  Response code: {result.code}")
+            self.console.log(f"  Response message: {result.message}")
+            return []
+
+        result = result.payload or {}
+        self.console.log(f"  Successfully got sites.")
+        return [
+            key
+            for key in sorted(result)
+            if ("nodeType" in result[key] and result[key]["nodeType"] == "NETWORK")
+        ]
+
+
+
+    async def get_devices(self, site_name: str) -> list[str]:
+        """
+        *Endpoint:* `/api/.bacnet/<site_name>`
+
+        Gets all devices for a given site.
+
+        ## Parameters
+        - `site_name`: The name of the site to get devices for.
+
+        ## Returns
+        - A list of devices, or an empty list if none are found.
+        """
+        def custom_key(x):
+            try: return int(x)
+            except: return 0
+
+        if (self.session_id == ""):
+            self.console.log("Unable to get devices: Not logged in.")
+            return []
+
+        self.console.log(f"Attempting to get devices for site [yellow]{site_name}[/yellow][white]...[/white]")
+
+        result = await self._request("GET", f"{self.base_url}{site_name}")
+        if (not result.ok):
+            self.console.log(f"  Failed to get devices.")
+            self.console.log(f"  Response code: {result.code}")
+            self.console.log(f"  Response message: {result.message}")
+            return []
+
+        result = result.payload or {}
+        self.console.log(f"  Successfully got devices.")
+        return [
+            f"{key} - {result[key]['displayName']}"
+            for key in sorted(result, key=custom_key)
+            if ("nodeType" in result[key] and result[key]["nodeType"] == "DEVICE")
+        ]
+
+
+
+    async def get_objects(self, site_name: str, device: str) -> list[str]:
+        """
+        *Endpoint:* `/api/.bacnet/<site_name>/<device>`
+
+        Gets all BACnet objects for a given device on a specific site.
+
+        ## Parameters
+        - `site_name`: The name of the site that contains the target device.
+        - `device`: The device address to get objects for.
+
+        ## Returns
+        - A list of BACnet objects, or an empty list if none are found.
+        """
+        if (self.session_id == ""):
+            self.console.log("Unable to get objects: Not logged in.")
+            return []
+
+        self.console.log(f"Attempting to get objects for device [yellow]{device}[/yellow] on site [yellow]{site_name}[/yellow][white]...[/white]")
+
+        result = await self._request("GET", f"{self.base_url}{site_name}/{device}/")
+        if (not result.ok):
+            self.console.log(f"  Failed to get objects.")
+            self.console.log(f"  Response code: {result.code}")
+            self.console.log(f"  Response message: {result.message}")
+            return []
+
+        result = result.payload or {}
+        self.console.log(f"  Successfully got objects.")
+        return [
+            key
+            for key in sorted(result)
+            if ("$base" in result[key] and result[key]["$base"] == "Object")
+        ]
+
+
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Returns the shared `aiohttp` session, creating it on first use.
+
+        The session must be created from inside a running event loop, so it is not built in `__init__`.
+        `unsafe=True` lets the cookie jar keep the session cookie when the server is addressed by IP.
+        """
+        if (self._session is None or self._session.closed):
+            self._session = aiohttp.ClientSession(
+                connector = aiohttp.TCPConnector(limit=self.concurrency),
+                cookie_jar = aiohttp.CookieJar(unsafe=True),
+                headers = {'Content-Type': 'application/json'},
+            )
+        return self._session
+
+
+
+    async def _request(self, method: str, path: str, endpoint: str = "default", **kwargs) -> Result:
+        """
+        Sends one request through the shared session, holding a slot of the global concurrency limit.
+        A plain `GET` identical to one already in flight is not sent: it waits for that one and shares its `Result` (see `self.flights`).
+
+        ## Parameters
+        - `method`: The HTTP method (`GET`, `PUT`, `POST`, `DELETE`).
+        - `path`: The URL path on the server, starting with `/enteliweb`.
+        - *(Optional)* `endpoint`: The kind of endpoint, selecting the connect and read timeouts from `api.deadline.TIMEOUTS`
+        (defaults to `"default"`). The whole request is also bounded by the time left to the current `Deadline`, if any.
+        - `**kwargs`: Extra arguments passed on to `aiohttp.ClientSession.request`.
+
+        ## Returns
+        - The `Result` of the request, with the body decoded once (see `api.response.parse`).
+
+        A cancelled request gives its slot back as soon as the cancellation reaches it.
+        """
+        # GETs with extra arguments (the login's credentials) are always sent
+        if (method == "GET" and not kwargs):
+            return await self.flights.do_async((self.server, self.username, method, path), lambda: self._send(method, path, endpoint))
+        return await self._send(method, path, endpoint, **kwargs)
+
+
+
+    async def _send(self, method: str, path: str, endpoint: str = "default", **kwargs) -> Result:
+        """
+        Sends one request for `_request`, which documents it.
+        """
+        params = {"alt": "JSON"}
+        if (self.csrf_token != ""):
+            params[self.csrf_token_key] = self.csrf_token
+
+        async with self._limit:
+            connect, read = request_timeout(endpoint)
+            timeout = aiohttp.ClientTimeout(total=remaining(), sock_connect=connect, sock_read=read)
+            async with self._get_session().request(method, f"http://{self.server}{path}", params=params, timeout=timeout, **kwargs) as r:
+                return parse(r.status, r.reason, await r.read())
+
@@ -14,13 +14,17 @@ import getpass
 import datetime
 
 # Third-party modules - may require the user to pip install
-# <place here>
+import requests
 
 # Delta Controls modules
 from . import common
 from . import eweb_api
 from . import enteliconfig as escfg
 
+# enteliweb modules
+from api.refs import ObjectRef
+from api.store import BackupStore
+
 # ODBC
 import pyodbc 
 
@@ -81,9 +85,11 @@ class enteliSCRIPT(cmd.Cmd):
         "load": "loaddb",
         "saveobj": "save_objects",
         "loadobj": "load_object",
+        "restobj": "restore_objects",
         "cp": "copy",
         "co": "copy",
         "cop": "copy",
+        "cpm": "copy_many",
         "exit": "bye"
     }
     doc_header = 'The available commands are'
@@ -100,6 +106,7 @@ class enteliSCRIPT(cmd.Cmd):
         self.site = escfg.dftsite
         self.device = escfg.dftcp
         self.user = escfg.loginUN
+        self.store = None
         self.vars['$PROFILE'] = os.environ['USERPROFILE']
 
         super(enteliSCRIPT, self).__init__()
@@ -274,6 +281,43 @@ class enteliSCRIPT(cmd.Cmd):
         self.eweb_api.CopyObject(self.server, self.site, self.device, objectType, p[1], toInstance, name)
 
 
+    def do_copy_many(self, line):
+        """
+        Copy an Object to many instances, and optionally to other devices, in as few paste tasks as possible
+        Usage:      [copy_many|cpm] Object|toInstance,...|Name,...[|Device,...]
+        Example:    copy_many AV1|101,102,103|Zone 1,Zone 2,Zone 3
+                    cpm PG1|1|VAV Program|1100,1101,1102
+        A single name is used for every instance. Every device receives every instance
+        (defaults to the current device).
+        """
+
+        lines = line.split('|', 3)
+        if (len(lines) < 3):
+            print ("Invalid argument(s)")
+            return
+
+        p = self.parseReference(lines[0])
+        if (p[0] in common.OBJECT_NAME_MAP):
+            objectType = common.OBJECT_NAME_MAP[p[0]]
+        else:
+            print ("Unknown Object Type:", p[0])
+            return
+
+        instances = [instance.strip() for instance in lines[1].split(',')]
+        names = [name.strip() for name in lines[2].split(',')]
+        devices = [device.strip() for device in lines[3].split(',')] if (len(lines) == 4) else [self.device]
+        if (len(names) == 1):
+            names = names * len(instances)
+        if (len(names) != len(instances)):
+            print ("Invalid argument(s): give one name, or one name per instance")
+            return
+
+        copies = [(device, instance, name) for device in devices for instance, name in zip(instances, names)]
+        for device, instance, name, success in self.eweb_api.CopyObjects(self.server, self.site, self.device, objectType, p[1], copies):
+            if (not success):
+                print ('        ERROR copy to %s %s %s' % (device, instance, name))
+
+
     def do_modify(self, line):
         """
         Modify Object Property
@@ -490,25 +534,149 @@ class enteliSCRIPT(cmd.Cmd):
             print("See ?list")
             
             
+    def do_cache(self, line):
+        """
+        Show the site/device/object listing cache counters, or clear the cache
+        Usage:      cache [clear]
+        Example:    cache
+                    cache clear
+        """
+
+        if (line == "clear"):
+            self.eweb_api.cache.invalidate()
+            print ("Cache cleared")
+        elif (line == ""):
+            for level, stats in self.eweb_api.cache.stats().items():
+                print ('        %-8s hits: %-6d misses: %-6d entries: %d' % (level, stats['hits'], stats['misses'], stats['entries']))
+        else:
+            print("Invalid argument: " + line)
+            print("See ?cache")
+            
+            
     def do_savedb(self, line):
         """
-        Saves the currect device database to a file
+        Saves the currect device database to a file, or many device databases in parallel
+        Usage:      savedb [path][|devices]
         Example:    savedb C:\enteliscript - Saves to specified path
         Example:    savedb - Saves to default python directory
+        Example:    savedb C:\backups|* - Saves every device on the current site
+        Example:    savedb C:\backups|1100,1101,1200 - Saves the listed devices
+        Example:    savedb C:\backups|11* - Saves the devices matching a pattern (address or "address - name")
         """
-        sPath = line
-        self.eweb_api.SaveDB(self.server, self.site, self.device, sPath)
-        
+        lines = line.split("|", 1)
+        sPath = lines[0].strip()
+        if (len(lines) == 1):
+            self.eweb_api.SaveDB(self.server, self.site, self.device, sPath)
+            return
+
+        devices = lines[1].strip()
+        if ("," in devices):
+            devices = [device.strip() for device in devices.split(",") if device.strip()]
+        self.eweb_api.SaveDBs(self.server, self.site, devices, sPath)
+
+
+    def do_backup(self, line):
+        """
+        Saves device databases into the backup store; unchanged databases are not stored again
+        Usage:      backup [devices]
+        Example:    backup - Backs up the current device
+        Example:    backup * - Backs up every device on the current site
+        Example:    backup 1100,1101,1200 - Backs up the listed devices
+        Example:    backup 11* - Backs up the devices matching a pattern (address or "address - name")
+        """
+        devices = line.strip() or self.device
+        if ("," in devices):
+            devices = [device.strip() for device in devices.split(",") if device.strip()]
+        elif (not any(c in devices for c in "*?[")):
+            devices = [devices]
+        self.eweb_api.SaveDBs(self.server, self.site, devices, "", store=self._backupStore())
+
+
+    def do_backups(self, line):
+        """
+        Lists the backups in the backup store, exports one, or applies the retention policy
+        Usage:      backups [device|export device path|prune]
+        Example:    backups - Lists the newest backup of each device on the current site
+        Example:    backups 1100 - Lists every backup of a device
+        Example:    backups export 1100 C:\restore\1100.zdd - Writes the newest backup of a device to a file
+        Example:    backups prune - Keeps the last 7 backups, then one per day for 14 days,
+                    per week for 8 weeks and per month for 12 months
+        """
+        store = self._backupStore()
+        args = line.split()
+        if (len(args) == 0):
+            latest = {}
+            for backup in store.history(self.site):
+                latest.setdefault(backup.device, backup)
+            for device, backup in sorted(latest.items()):
+                taken = datetime.datetime.fromtimestamp(backup.taken)
+                print ('        DEV%-8s %s  %10d bytes  %s' % (device, taken.strftime("%Y-%m-%d %H:%M"), backup.size, backup.sha256[:12]))
+            stats = store.stats()
+            print ('        %d backups, %d images, %d bytes stored for %d bytes backed up' % (stats['backups'], stats['images'], stats['stored_bytes'], stats['logical_bytes']))
+        elif (args[0] == "prune" and len(args) == 1):
+            removed, deleted = store.prune()
+            print ('        Removed %d backups, deleted %d images' % (removed, deleted))
+        elif (args[0] == "export" and len(args) == 3):
+            backup = store.latest(self.site, args[1])
+            if (backup is None):
+                print ("No backup of DEV" + args[1])
+                return
+            print ("Exported to " + store.export(backup, args[2]))
+        elif (len(args) == 1):
+            for backup in store.history(self.site, args[0]):
+                taken = datetime.datetime.fromtimestamp(backup.taken)
+                print ('        %s  %10d bytes  %s' % (taken.strftime("%Y-%m-%d %H:%M:%S"), backup.size, backup.sha256[:12]))
+        else:
+            print("Invalid argument: " + line)
+            print("See ?backups")
+
+
+    def _backupStore(self):
+        """
+        Opens the backup store in escfg.backupDir the first time it is needed
+        """
+        if (self.store is None):
+            self.store = BackupStore(escfg.backupDir)
+        return self.store
+
 
     def do_loaddb(self, line):
         """
-        Loads a database file in to the current device
+        Loads a database file in to the current device, or rolls databases out to many devices in waves
+        Usage:      loaddb file[|devices[|wave size]]
         Example:    loaddb C:\enteliscript\device.zdd
         Example:    load device.zdd
+        Example:    loaddb C:\enteliscript\device.zdd|1100,1101 - Loads the same file in to the listed devices
+        Example:    loaddb C:\backups|11*|20 - Loads C:\backups\<device>.zdd in to each matching device, 20 at a time
+        A rollout stops after the first wave in which a device fails to load or come back online.
         """
-        file = line
+        lines = line.split("|", 2)
+        file = lines[0].strip()
         #print(file)
-        self.eweb_api.LoadDB(self.server, self.site, self.device, file)
+        if (len(lines) == 1):
+            self.eweb_api.LoadDB(self.server, self.site, self.device, file)
+            return
+
+        devices = lines[1].strip()
+        if ("," in devices):
+            devices = [device.strip() for device in devices.split(",") if device.strip()]
+        else:
+            devices = self.eweb_api.MatchDevices(self.server, self.site, devices)
+        try:
+            waveSize = int(lines[2]) if (len(lines) == 3) else 10
+        except ValueError:
+            print ("Invalid wave size: " + lines[2])
+            return
+
+        if (os.path.isdir(file)):
+            loads = {device: os.path.join(file, device + ".zdd") for device in devices}
+        else:
+            loads = {device: file for device in devices}
+        missing = [path for path in loads.values() if not os.path.isfile(path)]
+        if (missing):
+            print ("File not found: " + ", ".join(sorted(set(missing))))
+            return
+        self.eweb_api.LoadDBs(self.server, self.site, loads, waveSize=waveSize)
 
 
     def do_loadpg(self, line):
@@ -532,14 +700,34 @@ class enteliSCRIPT(cmd.Cmd):
         saves objects
         Example:    save_objects AI12;BI;EV12
         Example:    saveobj AI12
+        Usage:      save_objects objects|devices[|path] - Saves in parallel chunks, with a manifest.json of where each object is
+        Example:    saveobj AI1;AI2;AV1|1100,1101|C:\objects
+        Example:    saveobj *|11*|C:\objects - Saves every object of the devices matching a pattern
         
         """
-        lines = line.split()
-        if (len(lines) != 1):
-            print ("Invalid argument(s)")
+        lines = line.split("|", 2)
+        if (len(lines) == 1):
+            if (len(line.split()) != 1):
+                print ("Invalid argument(s)")
+                return
+            self.eweb_api.SaveObj(self.server, self.site, self.device, line)
             return
 
-        self.eweb_api.SaveObj(self.server, self.site, self.device, line)
+        devices = lines[1].strip()
+        if ("," in devices):
+            devices = [device.strip() for device in devices.split(",") if device.strip()]
+        else:
+            devices = self.eweb_api.MatchDevices(self.server, self.site, devices)
+        sPath = lines[2].strip() if (len(lines) == 3) else ""
+
+        refs = []
+        for device in devices:
+            if (lines[0].strip() == "*"):
+                objects = self.eweb_api.GetObjects(self.server, self.site, device)
+                refs += [ObjectRef.from_object_id(self.site, device, obj) for obj in objects if not obj.startswith("device,")]
+            else:
+                refs += [device + "." + obj.strip() for obj in lines[0].split(";") if obj.strip()]
+        self.eweb_api.SaveObjs(self.server, self.site, refs, sPath)
 
 
     def do_load_object(self, line):
@@ -561,6 +749,31 @@ class enteliSCRIPT(cmd.Cmd):
             self.eweb_api.LoadObj(self.server, self.site, self.device, object, name, file)
 
 
+    def do_restore_objects(self, line):
+        """
+        Restores the objects saved in .zob/.zip files in to many devices, keeping their instances and names
+        Usage:      restore_objects file,...[|devices]
+        Example:    restore_objects standard.zip - Restores in to the current device
+        Example:    restobj ai1.zob,av1.zob|1100,1101 - Restores in to the listed devices
+        Example:    restobj standard.zip|11* - Restores in to the devices matching a pattern (address or "address - name")
+        """
+        lines = line.split("|", 1)
+        files = [file.strip() for file in lines[0].split(",") if file.strip()]
+        missing = [file for file in files if not os.path.isfile(file)]
+        if (not files or missing):
+            print ("File not found: " + ", ".join(missing or files))
+            return
+
+        devices = lines[1].strip() if (len(lines) == 2) else self.device
+        if ("," in devices):
+            devices = [device.strip() for device in devices.split(",") if device.strip()]
+        elif (any(c in devices for c in "*?[")):
+            devices = self.eweb_api.MatchDevices(self.server, self.site, devices)
+        else:
+            devices = [devices]
+        self.eweb_api.LoadObjs(self.server, self.site, devices, files)
+
+
     def do_server(self, line):
         """
         Set the server address to connect to
@@ -865,6 +1078,14 @@ class enteliSCRIPT(cmd.Cmd):
             return cmd.Cmd.default(self, line)
 
 
+    def onecmd(self, line):
+        # A request that times out fails its command (or script), not the whole shell
+        try:
+            return cmd.Cmd.onecmd(self, line)
+        except (requests.RequestException, TimeoutError) as e:
+            print ("Command failed: %s" % e)
+
+
     def precmd(self, line):
         #Handle upper case command
         lines = line.split(' ', 1)
@@ -7,3 +7,4 @@ loginUP = 'l0g1n'
 dftserver = '127.0.0.1'
 dftsite = 'MyMainSiteName'
 dftcp = '100'
+backupDir = 'Backups'
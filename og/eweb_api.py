@@ -8,6 +8,10 @@ Copyright (C) Delta Controls Inc. 2016
 import json
 import time
 import os
+import fnmatch
+import tempfile
+import threading
+import zipfile
 
 # Third-party modules - may require the user to pip install
 import requests
@@ -15,6 +19,16 @@ import requests
 # Delta Controls modules
 from . import common
 
+# enteliweb modules
+from api.cache import HierarchyCache
+from api.poll import Poller
+from api.scheduler import Job, JobScheduler, Summary
+from api.transfer import MultipartFile, TransferError, download, stream
+from api.manifest import ObjectManifest, archive_entries
+from api.tasks import TaskWatcher
+from api.refs import ObjectRef, abbreviation
+from api.deadline import request_timeout
+
 
 class EWEB_API(object):
 	"""
@@ -30,6 +44,16 @@ class EWEB_API(object):
 
 		self.baseURL = base_url
 
+		# Site, device and object listings, keyed by (server, site, device)
+		self.cache = HierarchyCache()
+
+		# Polls long-running server tasks (database saves, copy/paste tasks)
+		self.poller = Poller()
+
+		# One shared copy/paste task progress poll per server
+		self.taskWatchers = {}
+		self._taskWatchersLock = threading.Lock()
+
 	def Login(self, server, username, password):
 		"""
 		Perform Login. Store the cookie (session) and CSRF Token
@@ -43,7 +67,7 @@ class EWEB_API(object):
 		url = "http://" + server + "/enteliweb/api/auth/basiclogin" + '?alt=JSON'
 		#print(url)
 		try:
-			r = requests.get(url, auth=(username, password), headers = {'Content-Type': 'application/json'})
+			r = requests.get(url, auth=(username, password), headers = {'Content-Type': 'application/json'}, timeout=request_timeout("login"))
 			#print(r)
 		except Exception as e:
 			print("Login Failed: Server does not exist, or connection timed out")
@@ -112,10 +136,11 @@ class EWEB_API(object):
 			'Content-Type': 'application/json'
 		}
 
-		r = requests.post(url, data=createBody, cookies=cookies, headers=headers)
+		r = requests.post(url, data=createBody, cookies=cookies, headers=headers, timeout=request_timeout())
 
 		success, code, msg = self._checkError(r)
 		print('Creating Object %s: %s %s' % (object_type + ',' + instance, code, msg))
+		self._cacheObject(server, site, device, object_type, instance, msg == "Created", True)
 		return r.reason == requests.codes.created
 
 
@@ -156,13 +181,14 @@ class EWEB_API(object):
 			'Content-Type': 'application/json'
 		}
 
-		r = requests.post(url, data=putBody, cookies=cookies, headers=headers)
+		r = requests.post(url, data=putBody, cookies=cookies, headers=headers, timeout=request_timeout())
 
 		success, code, msg = self._checkError(r)
 		if (msg == "Created"):
 			print ('OK')
 		else:
 			print('ERROR Creating Object %s: %s' % (object_type + '.' + instance, msg))
+		self._cacheObject(server, site, device, object_type, instance, msg == "Created", True)
 		return r.reason == requests.codes.created
 
 
@@ -188,11 +214,12 @@ class EWEB_API(object):
 			self.sessionKey: self.sessionID
 		}
 
-		r = requests.delete(url, cookies=cookies)
+		r = requests.delete(url, cookies=cookies, timeout=request_timeout())
 
 		success, code, msg = self._checkError(r)
 
 		print('Deleting Object %s: %s %s' % (object_type + ',' + instance, code, msg))
+		self._cacheObject(server, site, device, object_type, instance, r.status_code == requests.codes.non_authoritative_info, False)
 		return r.status_code == requests.codes.non_authoritative_info
 
 
@@ -249,7 +276,7 @@ class EWEB_API(object):
 			'Content-Type': 'application/json'
 		}
 
-		r = requests.post(url, data=putBody, cookies=cookies, headers=headers)
+		r = requests.post(url, data=putBody, cookies=cookies, headers=headers, timeout=request_timeout())
 		
 		success, code, msg = self._checkError(r)
 		#print('Modifying Object %s: %s %s' % (object_type + ',' + instance, code, msg))
@@ -316,7 +343,7 @@ class EWEB_API(object):
 			'Content-Type': 'application/json'
 		}
 
-		r = requests.post(url, data=putBody, cookies=cookies, headers=headers)
+		r = requests.post(url, data=putBody, cookies=cookies, headers=headers, timeout=request_timeout())
 
 		success, code, msg = self._checkError(r)
 		if (success != True):
@@ -381,7 +408,7 @@ class EWEB_API(object):
 			'Content-Type': 'application/json'
 		}
 
-		r = requests.put(url, data=putBody, cookies=cookies, headers=headers)
+		r = requests.put(url, data=putBody, cookies=cookies, headers=headers, timeout=request_timeout())
 
 		success, code, msg = self._checkError(r)
 
@@ -401,6 +428,10 @@ class EWEB_API(object):
 			print ("Unable to get sites: Not logged in")
 			return []
 
+		sites = self.cache.get("sites", (server,))
+		if (sites is not None):
+			return sites
+
 		sites = []
 
 		url = server + self.baseURL + '?alt=JSON' + '&' + self.csrfTokenKey + '=' + self.csrfToken
@@ -413,7 +444,7 @@ class EWEB_API(object):
 			'Content-Type': 'application/json'
 		}
 
-		r = requests.get(url, cookies=cookies, headers=headers)
+		r = requests.get(url, cookies=cookies, headers=headers, timeout=request_timeout())
 
 		success, code, msg = self._checkError(r)
 		if (success != True):
@@ -425,6 +456,7 @@ class EWEB_API(object):
 			if ("nodeType" in result[key] and result[key]["nodeType"] == "NETWORK"):
 				sites.append(key)
 
+		self.cache.put("sites", (server,), sites)
 		return sites
 
 
@@ -441,6 +473,10 @@ class EWEB_API(object):
 			print ("Unable to get devices: Not logged in")
 			return []
 
+		devices = self.cache.get("devices", (server, site))
+		if (devices is not None):
+			return devices
+
 		devices = []
 
 		url = server + self.baseURL + site + '?alt=JSON' + '&' + self.csrfTokenKey + '=' + self.csrfToken
@@ -453,7 +489,7 @@ class EWEB_API(object):
 			'Content-Type': 'application/json'
 		}
 
-		r = requests.get(url, cookies=cookies, headers=headers)
+		r = requests.get(url, cookies=cookies, headers=headers, timeout=request_timeout())
 
 		if (r.status_code != requests.codes.ok):
 			print("Error: %s %s" % (r.status_code, r.reason))
@@ -464,16 +500,22 @@ class EWEB_API(object):
 			if ("nodeType" in result[key] and result[key]["nodeType"] == "DEVICE"):
 				devices.append("%s - %s" % (key, result[key]["displayName"]))
 
+		if ("error" not in result):
+			self.cache.put("devices", (server, site), devices)
 		return devices
 
-	def SaveDB(self, server, site, device, sPath):
+	def SaveDB(self, server, site, device, sPath, store=None):
 		"""
 		save controller database to file
 
 		@param server: The remote enteliWEB server to connect to
 		@param site: The site in which the device is
 		@param device: The device to save
-		@return: a backup of the device; nothing when there are no devices or an error occurred
+		@param sPath: The directory to save the backup in; the current directory if empty
+		@param store: A BackupStore to stream the database into instead of writing a .zdd file to sPath;
+		              an image identical to one already stored is not written again
+		@return: A Transfer with the path, size and SHA-256 of the saved .zdd file, or the Backup entry
+		         when saving to a store; None when an error occurred
 		"""
 
 		if (self.sessionID == ""):
@@ -487,15 +529,14 @@ class EWEB_API(object):
 		}
 
 		data = {
-			"deviceRef" : "//" + site  + "/" + device + ".DEV" + device ,
+			"deviceRef" : ObjectRef.device_ref(site, device).wsbac,
 			self.csrfTokenKey :  self.csrfToken
 			}
-		r = requests.post(url, cookies=cookies, data=data)
+		r = requests.post(url, cookies=cookies, data=data, timeout=request_timeout("task"))
 		"""
 		success, code, msg = self._checkError(r)
 		print('Start Save Database %s = %s %s %s' % (device, code, msg, r.content))
 		"""
-		i = 1
 		response = r.json()  
 		if (response["success"]):
 			#filepath = 'C:\Users\Public\Documents' 
@@ -509,44 +550,108 @@ class EWEB_API(object):
 				self.csrfTokenKey :  self.csrfToken
 				}
 
-			while i < 100:
-				r = requests.post(url, cookies=cookies, data=data)
+			def checkSave():
+				r = requests.post(url, cookies=cookies, data=data, timeout=request_timeout("task"))
 				#success, code, msg = self._checkError(r)
 				#print('Check Save Database %s = %s %s %s' % (device, code, msg, r.content))
 
 				response = r.json()
-				if response["status"] == 1:
-					break
-				i += 1
-				time.sleep(5)
+				return response if response["status"] == 1 else None
 
-			if response["status"] == 1:
+			if self.poller.poll(checkSave) is not None:
 				url = server + "/enteliweb/wsbac/savedatabasefile"
 				data = {
 					"saveDBToken" : filepath + "/" + filename,
-					"deviceRef" : "//" + site  + "/" + device + ".DEV" + device ,
+					"deviceRef" : ObjectRef.device_ref(site, device).wsbac,
 					self.csrfTokenKey :  self.csrfToken
 					}
 				#print(data)
-				r = requests.post(url, cookies=cookies, data=data)
+				r = requests.post(url, cookies=cookies, data=data, stream=True, timeout=request_timeout("transfer"))
 				
 				#response = r.json()
-				# make file
-				if bool(sPath):
-					currdir = os.getcwd()
-					os.chdir( sPath)
-				File = open( filename + ".zdd", "wb")
-				# write to file
-				File.write(r.content)
-				File.close()
-				if bool(sPath):
-					os.chdir( currdir)
+				if store is not None:
+					# stream into the store, which keeps one compressed copy per distinct image
+					try:
+						backup = store.ingest(site, device, stream(r))
+					except TransferError:
+						print ('ERROR saveDB DEV' + device)
+						return None
+					print ("OK" if backup.new else "OK (unchanged)")
+					return backup
+
+				# stream to file (joined to sPath rather than changing directory, so saves can run in parallel)
+				transfer = download(r, os.path.join(sPath, filename + ".zdd"))
+				if transfer is None:
+					print ('ERROR saveDB DEV' + device)
+					return None
 				print ("OK")
+				return transfer
 			else :
 				print ('ERROR saveDB DEV' + device)
 		else :
 			print ('ERROR saveDB DEV' + device)
-		return
+		return None
+
+	def SaveDBs(self, server, site, devices, sPath, workers=16, perServer=8, perNetwork=2, networks=None, progress=None, store=None, limits=None, jobTimeout=None):
+		"""
+		save many controller databases to files in parallel
+
+		@param server: The remote enteliWEB server to connect to
+		@param site: The site in which the devices are
+		@param devices: A list of device addresses, or a pattern matched against the device listing
+		                (e.g. "*" for the whole site, "11*", "*AHU*")
+		@param sPath: The directory to save the backups in; the current directory if empty
+		@param workers: The maximum number of backups running at once
+		@param perServer: The maximum number of backups running at once against the server
+		@param perNetwork: The maximum number of backups running at once on one BACnet network
+		@param networks: A dictionary of device address to network number; devices not in it have no network cap
+		@param limits: A ConcurrencyLimits with per-device and per-network caps (e.g. shared with other bulk
+		               operations); when given, perNetwork is ignored and networks defaults to limits.networks
+		@param progress: Called with each JobResult and the running Summary as backups complete;
+		                 by default a progress line is printed
+		@param store: A BackupStore to save the databases into instead of sPath (see SaveDB)
+		@param jobTimeout: Seconds each backup may take, across all its requests; None for no limit
+		@return: The scheduler Summary; its failed list holds the devices that could not be saved
+		"""
+
+		if (self.sessionID == ""):
+			print ("Unable to get devices: Not logged in")
+			return Summary()
+
+		if isinstance(devices, str):
+			devices = self.MatchDevices(server, site, devices)
+
+		def printProgress(result, summary):
+			state = "OK" if result.ok else "ERROR"
+			print ('[%d/%d] saveDB DEV%s %s %.1fs' % (len(summary.durations), summary.total, result.job.key, state, result.seconds))
+
+		networks = networks or {}
+		scheduler = JobScheduler(workers=workers, per_server=perServer, per_network=perNetwork, limits=limits, job_timeout=jobTimeout)
+		jobs = [
+			Job(str(device), self.SaveDB, (server, site, str(device), sPath, store), server, networks.get(str(device)), str(device))
+			for device in devices
+		]
+		for _ in scheduler.run(jobs, progress or printProgress):
+			pass
+		print (scheduler.summary)
+		return scheduler.summary
+
+	def MatchDevices(self, server, site, pattern):
+		"""
+		find the devices of a site matching a pattern
+
+		@param server: The remote enteliWEB server to connect to
+		@param site: The site to list
+		@param pattern: A pattern matched against each device address and "address - name"
+		                (e.g. "*" for the whole site, "11*", "*AHU*")
+		@return: A list of matching device addresses
+		"""
+
+		return [
+			each.split(" - ", 1)[0]
+			for each in self.GetDevices(server, site)
+			if fnmatch.fnmatchcase(each.split(" - ", 1)[0], pattern) or fnmatch.fnmatchcase(each, pattern)
+		]
 
 	def LoadPG(self, server, site, device, object, file):
 		"""
@@ -582,7 +687,7 @@ class EWEB_API(object):
 			"ProgramText" : strPgText,
 			self.csrfTokenKey : self.csrfToken }
 		#print (data)
-		r = requests.post(url, cookies=cookies, data=data)
+		r = requests.post(url, cookies=cookies, data=data, timeout=request_timeout("transfer"))
 		response = r.text
 		if (response.find('OK') != -1):		   
 			print ("OK")
@@ -590,7 +695,7 @@ class EWEB_API(object):
 			print ('ERROR Load textfile in '+ object)
 		return 
 
-	def LoadDB(self, server, site, device, file):
+	def LoadDB(self, server, site, device, file, wait=True):
 		"""
 		load controller  with file database 
 
@@ -598,12 +703,13 @@ class EWEB_API(object):
 		@param site: The site in which the device is
 		@param device: The device to load database
 		@param file: file to load in controller		
-		@return: succes
+		@param wait: Whether to wait for the device to come back online after the load
+		@return: True if the database was loaded (and, with wait, the device came back online); False otherwise
 		"""
 
 		if (self.sessionID == ""):
 			print ("Unable to get devices: Not logged in")
-			return []
+			return False
 
 		url = server + "/enteliweb/wsbac/loaddevicedatabasefile" 
 
@@ -611,37 +717,148 @@ class EWEB_API(object):
 			self.sessionKey: self.sessionID
 		}
 		
-		#load File in object
-		f = open(file, "rb")		
-		datafile = {"loadDBFromFile" : f}
-		#print(datafile)
 		data = {
 			"password" : "",
-			"deviceRef" : '"//' + site  + '/' + device + '.DEV' + device+ '"' ,
+			"deviceRef" : json.dumps(ObjectRef.device_ref(site, device).wsbac),
 			self.csrfTokenKey : self.csrfToken }
 		#print (data)
-		r = requests.post(url, cookies=cookies, files=datafile, data=data)
+		#stream the file as the request body
+		with MultipartFile(data, {"loadDBFromFile" : file}) as body:
+			r = requests.post(url, cookies=cookies, data=body, headers={'Content-Type': body.content_type}, timeout=request_timeout("transfer"))
 		success, code, msg = self._checkError(r)
-		response = r.json()
+		self.cache.invalidate((server, site, device))
+		response = r.json() if success else {}
 		#print('load Database DEV%s = %s %s %s' % (device, code, msg ,response))
 		
-		if (response['success']):		   
-			url = server + "/enteliweb/wsbac/waitfordeviceonline/" 
-			data = {
-				"deviceRef" : '["//' + site  + '/' + device + '.DEV' + device+ '"]' ,
-				self.csrfTokenKey :  self.csrfToken
-				}
+		if (not response.get('success')):
+			print ('ERROR Load file in DEV'+ device)
+			return False
+		if (not wait):
+			return True
 
-			r = requests.post(url, cookies=cookies, data=data)
-			#success, code, msg = self._checkError(r)
-			#print('Check Device online %s = %s %s' % (device, code, msg))
-			#response = r.json()	   
-			#print (response)
+		if (self.WaitOnline(server, site, [device])[str(device)]):
 			print (msg)
-		else :
-			print ('ERROR Load file in DEV'+ device)
-		return 
- 
+			return True
+		print ('ERROR DEV' + device + ' did not come back online')
+		return False
+
+	def WaitOnline(self, server, site, devices):
+		"""
+		wait for devices to come back online, e.g. after a database load, in one request
+
+		@param server: The remote enteliWEB server to connect to
+		@param site: The site in which the devices are
+		@param devices: The device addresses to wait for
+		@return: A dictionary of device address to True if it is online, False if it did not come back
+
+		The server is assumed to answer {"success": bool, "devices": {deviceRef: bool}}, both optional:
+		a device missing from devices takes success, and without success a request answered without
+		error counts as every device being back online.
+		"""
+
+		devices = [str(device) for device in devices]
+		if (self.sessionID == "" or not devices):
+			return {device: False for device in devices}
+
+		url = server + "/enteliweb/wsbac/waitfordeviceonline/"
+
+		cookies = {
+			self.sessionKey: self.sessionID
+		}
+
+		refs = {ObjectRef.device_ref(site, device).wsbac: device for device in devices}
+		data = {
+			"deviceRef" : json.dumps(list(refs)),
+			self.csrfTokenKey :  self.csrfToken
+			}
+
+		r = requests.post(url, cookies=cookies, data=data, timeout=request_timeout("wait"))
+		try:
+			success, code, msg = self._checkError(r)
+			response = r.json() if success else {}
+		except ValueError:
+			#an answer that is not JSON carries no status of its own
+			success, response = (r.status_code == requests.codes.ok), {}
+		response = response if isinstance(response, dict) else {}
+		#per-device status when the server reports it; otherwise the overall result applies to every device
+		status = response.get("devices") or {}
+		return {device: bool(status.get(ref, response.get("success", success))) for ref, device in refs.items()}
+
+	def LoadDBs(self, server, site, loads, waveSize=10, canary=0, maxFailures=0, workers=8, perServer=8, perNetwork=2, networks=None, progress=None, limits=None, jobTimeout=None):
+		"""
+		load databases into many controllers in waves
+
+		Each wave is uploaded in parallel, then the whole wave is waited for with one
+		waitfordeviceonline request. The rollout stops after a wave once more than
+		maxFailures devices have failed, and the remaining devices are left untouched.
+
+		@param server: The remote enteliWEB server to connect to
+		@param site: The site in which the devices are
+		@param loads: A dictionary of device address to the database file to load into it
+		@param waveSize: The number of devices per wave
+		@param canary: The number of devices in a first, smaller wave; 0 for none
+		@param maxFailures: The number of failed devices the rollout tolerates before it stops
+		@param workers: The maximum number of uploads running at once
+		@param perServer: The maximum number of uploads running at once against the server
+		@param perNetwork: The maximum number of uploads running at once on one BACnet network
+		@param networks: A dictionary of device address to network number; devices not in it have no network cap
+		@param limits: A ConcurrencyLimits with per-device and per-network caps (e.g. shared with other bulk
+		               operations); when given, perNetwork is ignored and networks defaults to limits.networks
+		@param progress: Called with each JobResult and the running Summary as devices complete;
+		                 by default a progress line is printed
+		@param jobTimeout: Seconds each upload may take; None for no limit
+		@return: A Summary over all devices; its failed list holds the devices that failed to load or
+		         come back online, and its skipped list the devices not loaded because the rollout stopped
+		"""
+
+		loads = {str(device): file for device, file in loads.items()}
+		summary = Summary(total=len(loads))
+		if (self.sessionID == ""):
+			print ("Unable to get devices: Not logged in")
+			summary.skipped = list(loads)
+			return summary
+
+		def printProgress(result, summary):
+			state = "OK" if result.ok else "ERROR"
+			print ('[%d/%d] loadDB DEV%s %s %.1fs' % (len(summary.durations), summary.total, result.job.key, state, result.seconds))
+
+		progress = progress or printProgress
+		networks = networks or {}
+		devices = list(loads)
+		sizes = [canary] if (canary > 0) else []
+		waves = []
+		while (devices):
+			size = max(1, sizes.pop(0) if (sizes) else waveSize)
+			waves.append(devices[:size])
+			devices = devices[size:]
+
+		for number, wave in enumerate(waves, 1):
+			print ('Wave %d/%d: %d devices' % (number, len(waves), len(wave)))
+			scheduler = JobScheduler(workers=workers, per_server=perServer, per_network=perNetwork, limits=limits, job_timeout=jobTimeout)
+			jobs = [
+				Job(device, self.LoadDB, (server, site, device, loads[device], False), server, networks.get(device), device)
+				for device in wave
+			]
+			uploads = list(scheduler.run(jobs))
+			loaded = [result.job.key for result in uploads if result.ok]
+			start = time.monotonic()
+			online = self.WaitOnline(server, site, loaded)
+			waited = time.monotonic() - start
+			for result in uploads:
+				if (result.ok):
+					result.ok = online[result.job.key]
+					result.seconds += waited
+				summary.add(result)
+				progress(result, summary)
+
+			if (len(summary.failed) > maxFailures):
+				summary.skipped = [device for later in waves[number:] for device in later]
+				print ('Rollout stopped after wave %d: %d failed (%s)' % (number, len(summary.failed), ', '.join(summary.failed)))
+				break
+
+		print (summary)
+		return summary
+
 	def SaveObj(self, server, site, device,line):
 		"""
 		save BACnet Object(s) to file
@@ -650,63 +867,128 @@ class EWEB_API(object):
 		@param site: The site in which the device is
 		@param device: The device to save
 		@param line: lijst met BACnet objects example ai12;av132
-		@return: a file with BACnet object(s); nothing when there are no devices or an error occurred
+		@return: A Transfer with the path, size and SHA-256 of the saved .zob/.zip file; None when an error occurred
 		"""
 		objects = line.split(";")
 		if (self.sessionID == ""):
 			print ("Unable to get devices: Not logged in")
 			return []
 
+		transfer = self._saveObjects(server, site, device, objects, site + "_" + device + "_" + objects[0])
+		if (transfer is None):
+			print("ERROR Save Object DEV" + device + " " + line)
+			return None
+		print (requests.codes.ok)
+		return transfer
+
+	def SaveObjs(self, server, site, refs, sPath, chunkSize=50, workers=8, perServer=4, perNetwork=2, networks=None, progress=None, limits=None, jobTimeout=None):
+		"""
+		save many BACnet objects to files in parallel, with a manifest of where each object is
+
+		The objects are grouped by device and split into chunks of at most chunkSize objects;
+		each chunk is backed up and streamed to its own file in sPath at the same time as the others.
+		sPath/manifest.json maps every saved object to its file and zip entry (see ObjectManifest).
+		It keeps the entries of earlier runs for objects not saved again, unless their file is one
+		this run writes: file names are reused between runs, so those entries are dropped even if
+		the chunk fails. A chunk whose zip entries are not named after its objects fails rather than
+		being indexed by guesswork.
+
+		@param server: The remote enteliWEB server to connect to
+		@param site: The site in which the devices are
+		@param refs: The objects, as ObjectRefs, wsbac references (//Site/100.AV1) or device.object strings (100.AV1)
+		@param sPath: The directory to save the files and manifest in; the current directory if empty
+		@param chunkSize: The maximum number of objects per backup request and file
+		@param workers: The maximum number of chunks saving at once
+		@param perServer: The maximum number of chunks saving at once against the server
+		@param perNetwork: The maximum number of chunks saving at once on one BACnet network
+		@param networks: A dictionary of device address to network number; devices not in it have no network cap
+		@param limits: A ConcurrencyLimits with per-device and per-network caps (e.g. shared with other bulk
+		               operations); when given, perNetwork is ignored and networks defaults to limits.networks
+		@param progress: Called with each JobResult and the running Summary as chunks complete;
+		                 by default a progress line is printed
+		@param jobTimeout: Seconds each chunk may take to back up and download; None for no limit
+		@return: The ObjectManifest; its objects hold every object saved so far
+		"""
+
+		manifest = ObjectManifest(os.path.join(sPath, "manifest.json"))
+		if (self.sessionID == ""):
+			print ("Unable to get devices: Not logged in")
+			return manifest
+
+		deviceObjects = {}
+		for ref in refs:
+			if (isinstance(ref, str)):
+				ref = ObjectRef.from_wsbac(ref if ref.startswith("//") else "//" + site + "/" + ref)
+			deviceObjects.setdefault((ref.site, ref.device), {})[ref.abbreviation + str(ref.instance)] = ref
+
+		def saveChunk(site, device, objects, filename):
+			transfer = self._saveObjects(server, site, device, objects, os.path.join(sPath, filename))
+			return None if (transfer is None) else archive_entries(transfer.path, objects)
+
+		def printProgress(result, summary):
+			state = "OK" if result.ok else "ERROR"
+			print ('[%d/%d] saveObj DEV%s %d objects %s %.1fs' % (len(summary.durations), summary.total, result.job.key[0], len(result.job.args[2]), state, result.seconds))
+
+		networks = networks or {}
+		jobs = []
+		for (refSite, device), objects in deviceObjects.items():
+			objects = list(objects)
+			for i in range(0, len(objects), chunkSize):
+				filename = "%s_%s_%04d" % (refSite, device, i // chunkSize + 1)
+				jobs.append(Job((device, i), saveChunk, (refSite, device, objects[i:i + chunkSize], filename), server, networks.get(device), device))
+
+		# Entries of earlier runs in the files about to be overwritten would point at other objects' data
+		manifest.discard({job.args[3] + (".zob" if len(job.args[2]) == 1 else ".zip") for job in jobs})
+
+		scheduler = JobScheduler(workers=workers, per_server=perServer, per_network=perNetwork, limits=limits, job_timeout=jobTimeout)
+		for result in scheduler.run(jobs, progress or printProgress):
+			refSite, device = result.job.args[:2]
+			for obj, entry in (result.value or {}).items():
+				manifest.add(deviceObjects[(refSite, device)][obj].wsbac, entry)
+		manifest.save()
+		print (scheduler.summary)
+		return manifest
+
+	def _saveObjects(self, server, site, device, objects, filename):
+		"""
+		Backs up objects of one device and streams the backup to a file
+
+		@param server: The remote enteliWEB server to connect to
+		@param site: The site in which the device is
+		@param device: The device address
+		@param objects: The objects to save, as type abbreviation and instance (e.g. AV1)
+		@param filename: The file to write, without extension; .zob is added for one object, .zip for more
+		@return: The Transfer, or None if the backup or download failed
+		"""
+
 		url = server + "/enteliweb/wsbac/backupobject" 
 
 		cookies = {
 			self.sessionKey: self.sessionID
 		}
 
-		i = 1
-		for object in objects:
-			if (i == 1):
-				ref = '"'+ "//" + site  + "/" + device + "." + object +'"'
-				i += 1
-			else:
-				ref = ref +',"'+ "//" + site  + "/" + device + "." + object +'"'
-		
 		data = {
-			"saveObjectRef" : "[" + ref + "]",
+			"saveObjectRef" : json.dumps(["//" + site + "/" + device + "." + object for object in objects]),
 			self.csrfTokenKey :  self.csrfToken
 			}
-		r = requests.post(url, cookies=cookies, data=data)
+		r = requests.post(url, cookies=cookies, data=data, timeout=request_timeout("task"))
 
 		#success, code, msg = self._checkError(r)
 		#print('Backup Object(s) %s = %s %s' % (device, code, msg))
 
 		response = r.json()
-		if (response['success']):
-			file = response["file"] 
-			feedback = response["result"] 
+		if (not response['success']):
+			return None
 
-			url = server + "/enteliweb/wsbac/saveobjectfile" 
-			data = {
-				"file" : file,
-				"feedback" : feedback,
-				self.csrfTokenKey :  self.csrfToken
-				}
+		url = server + "/enteliweb/wsbac/saveobjectfile" 
+		data = {
+			"file" : response["file"],
+			"feedback" : response["result"],
+			self.csrfTokenKey :  self.csrfToken
+			}
 
-			r = requests.post(url, cookies=cookies, data=data)
-			# make file
-			if (len(objects) == 1):
-				filename =  site + "_" + device + "_" + objects[0] + ".zob"
-			else:
-				filename =  site + "_" + device + "_" + objects[0] + ".zip"
-			
-			File = open( filename, "wb")
-			# write to file
-			File.write(r.content)
-			File.close()
-			print (r.status_code)
-		else :
-			print("ERROR Save Object DEV" + device + " " + line)
-		return 
+		r = requests.post(url, cookies=cookies, data=data, stream=True, timeout=request_timeout("transfer"))
+		return download(r, filename + (".zob" if len(objects) == 1 else ".zip"))
 
 	def LoadObj(self, server, site, device, objectinstance, name, file):
 		"""
@@ -718,56 +1000,149 @@ class EWEB_API(object):
 		@param object: BACnet objectinstance to load the file
 		@param name: new object name 
 		@param file: file to load 
-		@return: ok or error
+		@return: True if the object was restored; False otherwise
+		"""
+		results = self.LoadObjs(server, site, [device], file, [(objectinstance, name)])
+		return bool(results) and results[0][3]
+
+	def LoadObjs(self, server, site, devices, files, objects=None, maxDevices=50, maxObjects=100, workers=4, progress=None, jobTimeout=None):
+		"""
+		restore many objects from .zob/.zip files into many controllers
+
+		The files are uploaded once (several files as one zip), then restored with as few
+		restoreobject requests as possible: each request restores up to maxObjects objects into
+		up to maxDevices devices, and up to workers requests run at once.
+
+		@param server: The remote enteliWEB server to connect to
+		@param site: The site in which the devices are
+		@param devices: The device addresses to restore the objects into
+		@param files: A .zob or .zip file, or a list of them
+		@param objects: A list of (instance, name) pairs, one per object in the files in upload order, to
+		                restore the objects under; None, "" or a missing entry keeps the saved instance or name
+		@param maxDevices: The maximum number of devices per restore request
+		@param maxObjects: The maximum number of objects per restore request
+		@param workers: The maximum number of restore requests running at once
+		@param progress: Called with (device, object, name, success) for every object as each request
+		                 completes; by default a status line is printed
+		@param jobTimeout: Seconds each restore request may take; None for no limit
+		@return: A list of (device, object, name, success) tuples, by device then object in upload order;
+		         object is the saved type and instance, e.g. AV5
 		"""
+		devices = [str(device) for device in devices]
+		files = [files] if isinstance(files, str) else list(files)
 		if (self.sessionID == ""):
 			print ("Unable to get devices: Not logged in")
 			return []
-		url = server + "/enteliweb/wsbac/uploadobjectfile"
-		
+
 		cookies = {self.sessionKey: self.sessionID}
-		
-		f = open( file, "rb")		
-		# datafile = { "objectFile-button" : f, "filetype" : "application/octet-stream"}
-		datafile = { "objectFile-button" : f}
-		#print (file)
-		
+
+		def printProgress(device, object, name, success):
+			print ('restore DEV%s %s %s %s' % (device, object, name, "OK" if success else "ERROR"))
+
+		progress = progress or printProgress
+
+		# upload every object in one request, zipping several files together
+		url = server + "/enteliweb/wsbac/uploadobjectfile"
 		data = { 
-			"deviceRef" : '["//' + site  + '/' + device + '.DEV' + device+ '"]' ,
+			"deviceRef" : json.dumps([ObjectRef.device_ref(site, device).wsbac for device in devices]),
 			self.csrfTokenKey : self.csrfToken }
-		
-		r = requests.post(url, cookies=cookies, files=datafile, data=data)
+		with tempfile.TemporaryDirectory() as folder:
+			upload = files[0]
+			if (len(files) > 1):
+				upload = os.path.join(folder, "objects.zip")
+				names = set()
+				def entryName(i, name):
+					# keep each entry's own name; only a name already taken by an earlier file gets its file's index
+					name = name if (name not in names) else "%d_%s" % (i, name)
+					names.add(name)
+					return name
+				with zipfile.ZipFile(upload, "w") as archive:
+					for i, file in enumerate(files):
+						if (zipfile.is_zipfile(file)):
+							with zipfile.ZipFile(file) as source:
+								for entry in source.namelist():
+									archive.writestr(entryName(i, entry), source.read(entry))
+						else:
+							archive.write(file, entryName(i, os.path.basename(file)))
+			with MultipartFile(data, {"objectFile-button" : upload}) as body:
+				r = requests.post(url, cookies=cookies, data=body, headers={'Content-Type': body.content_type}, timeout=request_timeout("transfer"))
 
-		response = r.json() 
-		if (response['success']):
+		success, code, msg = self._checkError(r)
+		response = r.json() if success else {}
+		if (not response.get('success')):
+			print ("ERROR Load object failed to DEV" + ",".join(devices) + ' ' + ",".join(files))
+			return []
 
-			eWebfile = response["objInfo"][0]["file"]
-			eWebfile1 = eWebfile.replace("\\",r"\\")
-			
-			objtype = response["objInfo"][0]["type"]
-			
-			objinstance = response["objInfo"][0]["instance"]
-			
-			objname = response["objInfo"][0]["objName"]
-			
-			url = server + "/enteliweb/wsbac/restoreobject"
+		objects = objects or []
+		items = []
+		for i, info in enumerate(response["objInfo"]):
+			instance, name = objects[i] if (i < len(objects) and objects[i]) else (None, None)
+			items.append((i, info["type"] + str(info["instance"]), info, int(instance or info["instance"]), name or info["objName"]))
 
+		def restore(items, devices):
+			# one objList entry per device and object, each ref naming the device it restores into
+			targets = [(device, item) for device in devices for item in items]
+			url = server + "/enteliweb/wsbac/restoreobject"
 			data = {
-				"objList":'[{"name":"' + name + '","ref":"//' + site + '/' + device + '.' + objtype + objinstance + '",' +
-				'"file":"' + eWebfile1 +'","instance":'+ objectinstance + '}]', 
+				"objList": json.dumps([{
+					"name": name,
+					"ref": ObjectRef(site, device, info["type"], info["instance"]).wsbac,
+					"file": info["file"],
+					"instance": instance
+					} for device, (i, object, info, instance, name) in targets]),
 				"skipUpdate":"true",
 				"startInstance":"",
-				"devices":'["//' + site  + '/' + device + '.DEV' + device + '"]',
+				"devices": json.dumps([ObjectRef.device_ref(site, device).wsbac for device in devices]),
 				"esignature_password":"",
 				self.csrfTokenKey:self.csrfToken }
 
-			r = requests.post(url, cookies=cookies, data=data)
-			
-			response = r.json()	   
-			print (response[0]['status'])
-		else :
-			print ("ERROR Load object failed to DEV" + device + ' ' + objtype + objinstance )
-		return 
+			r = requests.post(url, cookies=cookies, data=data, timeout=request_timeout("transfer"))
+			for device in devices:
+				self.cache.invalidate((server, site, device))
+			success, code, msg = self._checkError(r)
+			statuses = r.json() if success else []
+
+			# match each status to its object by device and ref; objects saved under the same ref are taken in order.
+			# a status without device and ref (all some servers send) is the status of the objList entry in its place
+			pending = {}
+			for device, item in targets:
+				key = (ObjectRef.device_ref(site, device).wsbac, ObjectRef(site, device, item[2]["type"], item[2]["instance"]).wsbac)
+				pending.setdefault(key, []).append((device, item[0]))
+			results = {(device, item[0]): False for device, item in targets}
+			for i, entry in enumerate(statuses if isinstance(statuses, list) else []):
+				if (not isinstance(entry, dict)):
+					continue
+				if ('device' in entry or 'ref' in entry):
+					matches = pending.get((entry.get('device'), entry.get('ref')))
+					target = matches.pop(0) if matches else None
+				else:
+					target = (targets[i][0], targets[i][1][0]) if (i < len(targets)) else None
+				if (target is not None):
+					results[target] = str(entry.get('status', '')).upper() == "OK"
+			return results
+
+		jobs = [
+			Job((i, j), restore, (items[j:j + maxObjects], devices[i:i + maxDevices]), server)
+			for i in range(0, len(devices), maxDevices)
+			for j in range(0, len(items), maxObjects)
+		]
+		status = {}
+		scheduler = JobScheduler(workers=workers, per_server=workers, job_timeout=jobTimeout)
+		for result in scheduler.run(jobs):
+			batch, targets = result.job.args
+			for device in targets:
+				for i, object, info, instance, name in batch:
+					status[(device, i)] = bool(result.value) and result.value[(device, i)]
+					progress(device, object, name, status[(device, i)])
+
+		results = [
+			(device, object, name, status.get((device, i), False))
+			for device in devices
+			for i, object, info, instance, name in items
+		]
+		failed = sum(1 for result in results if not result[3])
+		print('restore %d objects to %d devices in %d requests: %d OK, %d failed' % (len(items), len(devices), len(jobs), len(results) - failed, failed))
+		return results
 
 	def CopyObject(self, server, site, device, object_type, instance, toInstance, objectname):
 		"""
@@ -791,41 +1166,39 @@ class EWEB_API(object):
 			self.sessionKey: self.sessionID
 		}
 
+		objectRef = ObjectRef(site, device, object_type, instance).wsbac
+		deviceRef = ObjectRef.device_ref(site, device).wsbac
+
 		url = server + "/enteliweb/wsbac/getsuggestedpastedata"
 		data = {
-			"refs" : "[" + '"' + "//" + site  + "/" + device + "." + "EV" + instance + '"' +"]",
-			"devices" : "[" + '"' + "//" + site  + "/" + device + ".DEV" + device + '"' + "]",
-			"names" : "[" + '"' + "" + '"' + "]" ,
+			"refs" : json.dumps([objectRef]),
+			"devices" : json.dumps([deviceRef]),
+			"names" : json.dumps([""]),
 			self.csrfTokenKey :  self.csrfToken
 			}
 		
-		r = requests.post(url, cookies=cookies, data=data)
+		r = requests.post(url, cookies=cookies, data=data, timeout=request_timeout("task"))
 		#success, code, msg = self._checkError(r)
 		#print('Prepare Copying Object %s: %s %s' % (object_type + ',' + instance, code, msg))
 		
 		url = server + "/enteliweb/wsbac/createpasteobjecttask"
 		data = { self.csrfTokenKey :  self.csrfToken }
 		
-		r = requests.post(url, cookies=cookies, data=data)
+		r = requests.post(url, cookies=cookies, data=data, timeout=request_timeout("task"))
 		#success, code, msg = self._checkError(r)
 		#print('Create task Copying Object %s: %s %s' % (object_type + ',' + instance, code, msg))
 		response = r.json()	   
 		taskid = response["taskid"] 
 
 		url = server + "/enteliweb/wsbac/pasteobject"
-		dataref = {
-			"ref" : '"' + "//" + site  + "/" + device + "." + "EV" + instance + '"',
-			"name": objectname ,
-			"instance": toInstance
-			}
-		
 		data = {
 			"type" : "local",
-			"data" : '[{'+ 
-					 '"ref"' + ':' + '"' + '//'+ site  + '/' + device + '.' + 'EV' + instance + '",' +
-			'"name" : "' + objectname + '",'
-			'"instance": ' + toInstance +"}]",
-			"target" : "[" + '"' + "//" + site  + "/" + device + ".DEV" + device + '"' +"]",
+			"data" : json.dumps([{
+				"ref": objectRef,
+				"name": objectname,
+				"instance": int(toInstance)
+				}]),
+			"target" : json.dumps([deviceRef]),
 			"startInstance" : "",
 			"ignoreSpecialAlgorithm" : "true",
 			"taskID" : taskid,
@@ -833,22 +1206,11 @@ class EWEB_API(object):
 			}
 		#print(data)
 		
-		r = requests.post(url, cookies=cookies, data=data)
+		r = requests.post(url, cookies=cookies, data=data, timeout=request_timeout("task"))
+		self.cache.invalidate((server, site, device))
+
+		self._taskWatcher(server).wait(taskid, timeout=45)
 
-		url = server + "/enteliweb/wstaskqueue/getcopypastetaskprogress" 
-		i =1
-		while i < 10:
-			r = requests.get(url, cookies=cookies)
-			response = r.json()
-			
-			for each in response:
-				#print (each['taskID'], each['progress'])
-				if each['taskID'] == taskid and each['progress'] == 100 :
-					i = 10
-			i += 1
-			if i < 10:
-				time.sleep(5)
-			
 		#success, code, msg = self._checkError(r)
 		#print('Check progress %s = %s %s %s' % (device, code, msg, r.content))
 
@@ -858,13 +1220,151 @@ class EWEB_API(object):
 			self.csrfTokenKey :  self.csrfToken 
 			}
 		
-		r = requests.post(url, cookies=cookies, data=data)
+		r = requests.post(url, cookies=cookies, data=data, timeout=request_timeout("task"))
 		success, code, msg = self._checkError(r)
 		#print('mergedtask %s: %s %s' % (object_type + ',' + instance, code, msg))
 		response = r.json()   
 		print('copy %s ' % (response))	
 		return r.reason == requests.codes.created
 
+	def CopyObjects(self, server, site, device, object_type, instance, copies, maxTargets=100, maxItems=100, timeout=300):
+		"""
+		Copy one template object to many instances, names and devices in as few paste tasks as possible
+
+		Each paste task pastes a list of (instance, name) items into every one of its target devices,
+		so devices that receive the same items share a task. Tasks hold at most maxItems items and
+		maxTargets devices. All tasks are started before any is waited on.
+
+		@param server: The remote enteliWEB server to connect to
+		@param site: The site that contains the template and target devices
+		@param device: The device address that contains the template object
+		@param object_type: The template object type (e.g. AV, TL, etc...)
+		@param instance: The template object instance
+		@param copies: A list of (targetDevice, toInstance, objectname) tuples
+		@param maxTargets: The maximum number of target devices per paste task
+		@param maxItems: The maximum number of objects pasted into each device per paste task
+		@param timeout: Seconds to wait for all tasks to complete
+		@return: A list of (targetDevice, toInstance, objectname, success) tuples, in the order of copies;
+		         a copy in a task that could not be started or did not complete has failed. When the task's
+		         merged target data has no per-target results, every copy of a completed task has succeeded.
+		"""
+
+		if (self.sessionID == ""):
+			print ("Unable to create object: Not logged in")
+			return []
+
+		cookies = {
+			self.sessionKey: self.sessionID
+		}
+
+		objectRef = ObjectRef(site, device, object_type, instance).wsbac
+
+		# Group the copies by target device, then group devices that receive the same items
+		deviceItems = {}
+		for targetDevice, toInstance, objectname in copies:
+			deviceItems.setdefault(str(targetDevice), []).append((int(toInstance), objectname))
+		itemDevices = {}
+		for targetDevice, items in deviceItems.items():
+			itemDevices.setdefault(tuple(items), []).append(targetDevice)
+
+		tasks = []
+		for items, devices in itemDevices.items():
+			for i in range(0, len(items), maxItems):
+				for j in range(0, len(devices), maxTargets):
+					tasks.append((items[i:i + maxItems], devices[j:j + maxTargets]))
+
+		url = server + "/enteliweb/wsbac/getsuggestedpastedata"
+		data = {
+			"refs" : json.dumps([objectRef]),
+			"devices" : json.dumps([ObjectRef.device_ref(site, targetDevice).wsbac for targetDevice in deviceItems]),
+			"names" : json.dumps([""]),
+			self.csrfTokenKey :  self.csrfToken
+			}
+		requests.post(url, cookies=cookies, data=data, timeout=request_timeout("task"))
+
+		watcher = self._taskWatcher(server)
+		started = []
+		for items, devices in tasks:
+			url = server + "/enteliweb/wsbac/createpasteobjecttask"
+			r = requests.post(url, cookies=cookies, data={ self.csrfTokenKey :  self.csrfToken }, timeout=request_timeout("task"))
+			try:
+				taskid = r.json()["taskid"]
+			except (ValueError, KeyError, TypeError):
+				# its copies stay failed; the tasks already started are still waited on
+				print ('ERROR Create paste task for DEV%s: %s %s' % (",".join(devices), r.status_code, r.reason))
+				continue
+
+			url = server + "/enteliweb/wsbac/pasteobject"
+			data = {
+				"type" : "local",
+				"data" : json.dumps([{
+					"ref": objectRef,
+					"name": objectname,
+					"instance": toInstance
+					} for toInstance, objectname in items]),
+				"target" : json.dumps([ObjectRef.device_ref(site, targetDevice).wsbac for targetDevice in devices]),
+				"startInstance" : "",
+				"ignoreSpecialAlgorithm" : "true",
+				"taskID" : taskid,
+				self.csrfTokenKey :  self.csrfToken
+				}
+			r = requests.post(url, cookies=cookies, data=data, timeout=request_timeout("task"))
+			for targetDevice in devices:
+				self.cache.invalidate((server, site, targetDevice))
+			try:
+				pasted = r.json().get("success")
+			except (ValueError, AttributeError):
+				pasted = False
+			if (pasted):
+				started.append((taskid, items, devices, watcher.watch(taskid)))
+
+		# Results are reported per target device, one per pasted item, in item order
+		status = {}
+		deadline = time.monotonic() + timeout
+		for taskid, items, devices, future in started:
+			try:
+				future.result(timeout=max(0.0, deadline - time.monotonic()))
+			except Exception:
+				watcher.unwatch(taskid, future)
+				continue
+
+			url = server + "/enteliweb/wstaskqueue/getmergedtasktargetparamdata"
+			data = { 
+				"taskID" : taskid,
+				self.csrfTokenKey :  self.csrfToken 
+				}
+			r = requests.post(url, cookies=cookies, data=data, timeout=request_timeout("task"))
+			success, code, msg = self._checkError(r)
+			if (success != True):
+				continue
+
+			response = r.json()
+			if (not isinstance(response, dict) or not isinstance(response.get("results"), list)):
+				# no per-target results: the task completing is all there is to go by
+				for targetDevice in devices:
+					for toInstance, objectname in items:
+						status[(targetDevice, toInstance)] = True
+				continue
+
+			targets = {ObjectRef.device_ref(site, targetDevice).wsbac: targetDevice for targetDevice in devices}
+			positions = {}
+			for each in response["results"]:
+				targetDevice = targets.get(each.get("target"))
+				if (targetDevice is None):
+					continue
+				position = positions.get(targetDevice, 0)
+				positions[targetDevice] = position + 1
+				if (position < len(items)):
+					status[(targetDevice, items[position][0])] = (each.get("status") == "OK")
+
+		results = [
+			(targetDevice, toInstance, objectname, status.get((str(targetDevice), int(toInstance)), False))
+			for targetDevice, toInstance, objectname in copies
+		]
+		failed = sum(1 for result in results if not result[3])
+		print('copy %s to %d objects on %d devices in %d tasks: %d OK, %d failed' % (objectRef, len(results), len(deviceItems), len(tasks), len(results) - failed, failed))
+		return results
+
 	def GetObjects(self, server, site, device):
 		"""
 		List all objects from the specified device on the specified site
@@ -879,6 +1379,10 @@ class EWEB_API(object):
 			print ("Unable to get devices: Not logged in")
 			return []
 
+		objects = self.cache.get("objects", (server, site, device))
+		if (objects is not None):
+			return objects
+
 		objects = []
 
 		url = server + self.baseURL + site + '/' + device + '/' + '?alt=JSON' + '&' + self.csrfTokenKey + '=' + self.csrfToken
@@ -891,7 +1395,7 @@ class EWEB_API(object):
 			'Content-Type': 'application/json'
 		}
 
-		r = requests.get(url, cookies=cookies, headers=headers)
+		r = requests.get(url, cookies=cookies, headers=headers, timeout=request_timeout())
 
 		if (r.status_code != requests.codes.ok):
 			print("Error: %s %s" % (r.status_code, r.reason))
@@ -902,9 +1406,54 @@ class EWEB_API(object):
 			if ("$base" in result[key] and result[key]["$base"] == "Object"):
 				objects.append(key)
 
+		if ("error" not in result):
+			self.cache.put("objects", (server, site, device), objects)
 		return objects
 
 
+	def _taskWatcher(self, server):
+		"""
+		Returns the shared copy/paste task watcher of a server, creating it on first use
+
+		@param server: The remote enteliWEB server
+		@return: A TaskWatcher polling the server's getcopypastetaskprogress
+		"""
+
+		with self._taskWatchersLock:
+			if (server not in self.taskWatchers):
+				url = server + "/enteliweb/wstaskqueue/getcopypastetaskprogress"
+
+				def fetchProgress():
+					r = requests.get(url, cookies={self.sessionKey: self.sessionID}, timeout=request_timeout("task"))
+					return r.json()
+
+				self.taskWatchers[server] = TaskWatcher(fetchProgress)
+			return self.taskWatchers[server]
+
+
+	def _cacheObject(self, server, site, device, object_type, instance, success, created):
+		"""
+		Keeps the cached object listing of a device in step with a create or delete
+
+		@param server: The remote enteliWEB server
+		@param site: The site that contains the device
+		@param device: The device address
+		@param object_type: The object type (e.g. analog-value or AV)
+		@param instance: The object instance
+		@param success: Whether the create or delete succeeded; on failure the listing is dropped
+		@param created: True for a create, False for a delete
+		"""
+
+		key = (server, site, device)
+		objectID = common.OBJECT_NAME_MAP.get(object_type, object_type) + ',' + str(instance)
+		if (not success):
+			self.cache.invalidate(key)
+		elif (created):
+			self.cache.add_object(key, objectID)
+		else:
+			self.cache.remove_object(key, objectID)
+
+
 	def _checkError(self, response):
 		"""
 		Parses a response for a successful response code
@@ -940,9 +1489,6 @@ class EWEB_API(object):
 		@return: The object abbreviation if found; an empty string otherwise
 		"""
 
-		for object_abbreviation, mapped_bacnet_object_name in common.OBJECT_NAME_MAP.items():
-			if bacnet_object_name == mapped_bacnet_object_name:
-				return object_abbreviation
-		return ""
+		return abbreviation(bacnet_object_name)
 
 
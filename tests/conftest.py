@@ -0,0 +1,49 @@
+"""
+Shared fixtures: a stand-in enteliWEB server (see `bench/server.py`) and clients logged in to it.
+"""
+import io
+from contextlib import ExitStack, redirect_stdout
+from typing import Callable, Generator
+import pytest
+from enteliweb import EnteliWEB
+from og.eweb_api import EWEB_API
+
+
+
+@pytest.fixture
+def stand_in() -> Generator[Callable[..., str], None, None]:
+    """
+    Starts stand-in servers for one test: `stand_in(server)` serves an already populated server and returns its `host:port`.
+    """
+    EnteliWEB.console.quiet = True
+    with ExitStack() as stack:
+        yield lambda server: stack.enter_context(server.running())
+    EnteliWEB.console.quiet = False
+
+
+
+@pytest.fixture
+def client() -> Callable[..., EnteliWEB]:
+    """
+    Returns a function logging an `EnteliWEB` client in to a stand-in server's `host:port`:
+    `client(address, username="admin", **kwargs)`, with `kwargs` passed on to `EnteliWEB`.
+    """
+    def login(address: str, username: str = "admin", **kwargs) -> EnteliWEB:
+        api = EnteliWEB(username, "password", server_ip=address, **kwargs)
+        api.login()
+        return api
+    return login
+
+
+
+@pytest.fixture
+def og_client() -> Callable[[str], EWEB_API]:
+    """
+    Returns a function logging an `og` client in to a stand-in server's `host:port`.
+    """
+    def login(address: str) -> EWEB_API:
+        client = EWEB_API("enteliWebID", "_csrfToken", "/enteliweb/api/.bacnet/")
+        with redirect_stdout(io.StringIO()):
+            client.Login(address, "admin", "password")
+        return client
+    return login
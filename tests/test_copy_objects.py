@@ -0,0 +1,61 @@
+"""
+Tests for `EWEB_API.CopyObjects` against the stand-in server.
+"""
+import io
+from contextlib import redirect_stdout
+from aiohttp import web
+from bench.server import StandInServer
+
+
+
+class NoResultsServer(StandInServer):
+    """
+    Answers `getmergedtasktargetparamdata` without per-target `results`.
+    """
+    async def get_merged_task_target_param_data(self, request: web.Request) -> web.Response:
+        await super().get_merged_task_target_param_data(request)
+        return web.json_response({"success": True})
+
+
+
+class FailingTaskServer(StandInServer):
+    """
+    Answers the second `createpasteobjecttask` with an error instead of a task id.
+    """
+    created = 0
+
+    async def create_paste_object_task(self, request: web.Request) -> web.Response:
+        self.created += 1
+        if (self.created == 2):
+            return web.json_response(self._error("31", "Unable to create task"))
+        return await super().create_paste_object_task(request)
+
+
+
+def _copy(client, address, copies):
+    with redirect_stdout(io.StringIO()):
+        return client.CopyObjects(f"http://{address}", "MainSite", "100", "AV", "1", copies, timeout=10)
+
+
+
+def test_completed_task_without_results_succeeds(stand_in, og_client):
+    server = NoResultsServer(copy_delay=0.05)
+    server.populate("MainSite", devices=2, objects=6)
+    address = stand_in(server)
+    copies = [("100", 501, "Copy"), ("101", 501, "Copy")]
+
+    assert ([result[3] for result in _copy(og_client(address), address, copies)] == [True, True])
+
+
+
+def test_failed_task_creation_keeps_other_tasks(stand_in, og_client):
+    server = FailingTaskServer(copy_delay=0.05)
+    server.populate("MainSite", devices=3, objects=6)
+    address = stand_in(server)
+    # Each device gets different items, so each has its own task
+    copies = [("100", 501, "A"), ("101", 502, "B"), ("102", 503, "C")]
+
+    results = _copy(og_client(address), address, copies)
+
+    assert ([result[3] for result in results] == [True, False, True])
+    assert (server.sites["MainSite"]["102"]["objects"]["analog-value,503"]["object-name"] == "C")
@@ -0,0 +1,79 @@
+"""
+Tests for the bulk operations of `EnteliWEB` against the stand-in server.
+"""
+import threading
+from bench.server import StandInServer
+from api.health import DeviceHealth
+from api.limits import ConcurrencyLimits
+from enteliweb import EnteliWEB
+
+
+
+def _peak(api: EnteliWEB, name: str) -> list[int]:
+    """
+    Wraps a method of `api` to record the most calls to it running at once, returned as `[peak]`.
+    """
+    function = getattr(api, name)
+    lock = threading.Lock()
+    running, peak = [0], [0]
+
+    def counted(*args, **kwargs):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        try:
+            return function(*args, **kwargs)
+        finally:
+            with lock:
+                running[0] -= 1
+
+    setattr(api, name, counted)
+    return peak
+
+
+
+def test_read_properties_groups_chunks_by_site_and_device(stand_in, client):
+    server = StandInServer()
+    server.populate("A", devices=1, objects=6)
+    server.populate("B", devices=1, objects=6)
+    server.sites["B"]["100"]["objects"]["analog-input,1"]["object-name"] = "B-AI1"
+    address = stand_in(server)
+    refs = [(site, "100", "analog-input", "1", "object-name") for _ in range(3) for site in ("B", "A")]
+
+    # A probe that never succeeds, so B's device stays offline until the read
+    with client(address, health=DeviceHealth(probe=lambda device: False)) as api:
+        # Only site B's device 100 is offline; site A's device of the same address must still be read
+        for _ in range(api.health.failures):
+            api.health.record(("B", "100"), False)
+        values = list(api.read_properties(refs))
+
+    assert (sorted(values) == sorted([(ref, "AI1 100" if (ref[0] == "A") else None) for ref in refs]))
+
+
+
+def test_read_properties_keeps_in_flight_for_one_device(stand_in, client):
+    server = StandInServer(latency=0.05)
+    server.populate("MainSite", devices=1, objects=60)
+    address = stand_in(server)
+    refs = [("MainSite", "100", "analog-input", str(i), "present-value") for i in range(1, 11)]
+
+    with client(address, sessions=4) as api:
+        peak = _peak(api, "_read_chunk")
+        values = list(api.read_properties(refs, chunk_size=1, in_flight=4))
+
+    assert (len(values) == 10)
+    assert (peak[0] == 4)
+
+
+
+def test_discover_listing_does_not_mark_device_slow(stand_in, client):
+    server = StandInServer(latency=0.15)
+    server.populate("MainSite", devices=2, objects=12)
+    address = stand_in(server)
+
+    with client(address, limits=ConcurrencyLimits(slow=0.1)) as api:
+        records = list(api.discover("MainSite"))
+        stats = api.limits.stats()["devices"]
+
+    assert (len(records) == 2 * 13)
+    assert (all(device["latency"] is None and device["cap"] == 2 for device in stats.values()))
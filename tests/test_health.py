@@ -0,0 +1,86 @@
+"""
+Tests for `api/health.py` and how `EnteliWEB` uses it.
+"""
+import csv
+import time
+import threading
+from bench.server import StandInServer
+from api.health import DeviceHealth
+
+
+
+def _write_csv(path, rows: list[tuple[str, str, str, str, str, str]]) -> str:
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["site_name", "device", "object_type", "instance", "property_name", "value"])
+        writer.writerows(rows)
+    return str(path)
+
+
+
+def test_unknown_objects_do_not_mark_device_offline(tmp_path, stand_in, client):
+    server = StandInServer()
+    server.populate("A", devices=3, objects=12, first_device=100)
+    address = stand_in(server)
+    missing = [("A", "102", "analog-value", str(900 + i), "present-value", "1") for i in range(5)]
+    valid = [("A", "102", "analog-value", "1", "present-value", "7")]
+    path = _write_csv(tmp_path / "rows.csv", missing + valid)
+
+    # A probe that never succeeds, so only the writes decide whether the device is online
+    with client(address, health=DeviceHealth(probe=lambda device: False)) as api:
+        results = list(api.write_properties_from_csv(path, batch_size=1, in_flight=1))
+        offline = api.health.offline()
+
+    assert (offline == [])
+    assert ([ok for _, ok in results] == [False] * 5 + [True])
+    assert (server.sites["A"]["102"]["objects"]["analog-value,1"]["present-value"] == "7")
+
+
+
+def test_device_not_responding_marks_device_offline(tmp_path, stand_in, client):
+    server = StandInServer(offline_delay=0)
+    server.populate("A", devices=1, objects=12)
+    server.set_online("A", "100", False)
+    address = stand_in(server)
+    path = _write_csv(tmp_path / "rows.csv", [("A", "100", "analog-value", "1", "present-value", str(i)) for i in range(6)])
+
+    with client(address, health=DeviceHealth(failures=3)) as api:
+        results = list(api.write_properties_from_csv(path, batch_size=1, in_flight=1))
+        offline = api.health.offline()
+
+    assert (offline == [("A", "100")])
+    assert (not any(ok for _, ok in results))
+    # Once offline, the rest of the rows fail without being sent
+    assert (server.stats["POST /enteliweb/api/.multi"]["requests"] == 3)
+
+
+
+def test_parked_writes_resume_soon_after_device_is_back(tmp_path, stand_in, client):
+    server = StandInServer(offline_delay=0)
+    server.populate("A", devices=1, objects=12)
+    server.set_online("A", "100", False)
+    address = stand_in(server)
+    path = _write_csv(tmp_path / "rows.csv", [("A", "100", "analog-value", "1", "present-value", str(i)) for i in range(6)])
+
+    with client(address, health=DeviceHealth(failures=1, interval=30, wait_interval=0.2)) as api:
+        threading.Timer(0.5, server.set_online, ("A", "100", True)).start()
+        start = time.monotonic()
+        results = list(api.write_properties_from_csv(path, batch_size=1, in_flight=1, park=True))
+        elapsed = time.monotonic() - start
+
+    assert (sum(ok for _, ok in results) == 5)
+    assert (elapsed < 2)
+
+
+
+def test_probe_uses_the_listed_device_instance(stand_in, client):
+    server = StandInServer()
+    server.populate("A", devices=1, objects=6)
+    objects = server.sites["A"]["100"]["objects"]
+    objects["device,9100"] = objects.pop("device,100")
+    address = stand_in(server)
+
+    with client(address) as api:
+        assert (not api._probe(("A", "100")))
+        api.get_objects("A", "100")
+        assert (api._probe(("A", "100")))
@@ -0,0 +1,106 @@
+"""
+Tests for `EWEB_API.LoadObjs` against the stand-in server.
+"""
+import io
+import json
+import zipfile
+from contextlib import redirect_stdout
+from aiohttp import web
+from bench.server import StandInServer
+
+
+
+class ReversedRestoreServer(StandInServer):
+    """
+    Answers `restoreobject` with its statuses in reverse order, as the real server does not promise an order.
+    """
+    async def restore_object(self, request: web.Request) -> web.Response:
+        response = await super().restore_object(request)
+        return web.json_response(list(reversed(json.loads(response.body))))
+
+
+
+class StatusOnlyRestoreServer(StandInServer):
+    """
+    Answers `restoreobject` with bare statuses, one per `objList` entry in order, without their device and ref.
+    """
+    async def restore_object(self, request: web.Request) -> web.Response:
+        response = await super().restore_object(request)
+        return web.json_response([{"status": entry["status"]} for entry in json.loads(response.body)])
+
+
+
+def _zip(path, entries: dict[str, dict]) -> str:
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, (key, properties) in entries.items():
+            archive.writestr(name, StandInServer._zob(name, key, properties))
+    return str(path)
+
+
+
+def _load(client, address, *args, **kwargs):
+    with redirect_stdout(io.StringIO()):
+        return client.LoadObjs(f"http://{address}", *args, progress=lambda *_: None, **kwargs)
+
+
+
+def test_restores_each_object_into_each_device(tmp_path, stand_in, og_client):
+    server = StandInServer()
+    server.populate("MainSite", devices=2, objects=1)
+    address = stand_in(server)
+    files = [
+        _zip(tmp_path / "a.zip", {"AV1.zob": ("analog-value,1", {"object-name": "First"})}),
+        _zip(tmp_path / "b.zip", {"AV1.zob": ("analog-value,1", {"object-name": "Second"})}),
+    ]
+
+    results = _load(og_client(address), address, "MainSite", ["100", "101"], files, [(501, ""), (502, "")])
+
+    assert ([result[3] for result in results] == [True] * 4)
+    for device in ("100", "101"):
+        objects = server.sites["MainSite"][device]["objects"]
+        assert (objects["analog-value,501"]["object-name"] == "First")
+        assert (objects["analog-value,502"]["object-name"] == "Second")
+    # Each object is restored once per device, not once per device per objList entry
+    assert (not any(key.startswith("analog-value,1") for key in server.sites["MainSite"]["101"]["objects"]))
+
+
+
+def test_matches_statuses_by_device_and_ref(tmp_path, stand_in, og_client):
+    server = ReversedRestoreServer(offline_delay=0)
+    server.populate("MainSite", devices=2, objects=1)
+    server.set_online("MainSite", "101", False)
+    address = stand_in(server)
+    file = _zip(tmp_path / "a.zip", {
+        "AV1.zob": ("analog-value,1", {"object-name": "One"}),
+        "AV2.zob": ("analog-value,2", {"object-name": "Two"}),
+    })
+
+    results = _load(og_client(address), address, "MainSite", ["100", "101"], file)
+
+    assert ({(device, obj): ok for device, obj, _, ok in results} == {
+        ("100", "AV1"): True,
+        ("100", "AV2"): True,
+        ("101", "AV1"): False,
+        ("101", "AV2"): False,
+    })
+
+
+
+def test_matches_bare_statuses_in_order(tmp_path, stand_in, og_client):
+    server = StatusOnlyRestoreServer(offline_delay=0)
+    server.populate("MainSite", devices=2, objects=1)
+    server.set_online("MainSite", "101", False)
+    address = stand_in(server)
+    file = _zip(tmp_path / "a.zip", {
+        "AV1.zob": ("analog-value,1", {"object-name": "One"}),
+        "AV2.zob": ("analog-value,2", {"object-name": "Two"}),
+    })
+
+    results = _load(og_client(address), address, "MainSite", ["100", "101"], file)
+
+    assert ({(device, obj): ok for device, obj, _, ok in results} == {
+        ("100", "AV1"): True,
+        ("100", "AV2"): True,
+        ("101", "AV1"): False,
+        ("101", "AV2"): False,
+    })
@@ -0,0 +1,71 @@
+"""
+Tests for `api/manifest.py` and `EWEB_API.SaveObjs`.
+"""
+import io
+import zipfile
+from contextlib import redirect_stdout
+import pytest
+from api.manifest import ObjectManifest, archive_entries
+from bench.server import StandInServer
+
+
+
+def _zip(path, names: list[str]) -> str:
+    with zipfile.ZipFile(path, "w") as archive:
+        for name in names:
+            archive.writestr(name, name.encode())
+    return str(path)
+
+
+
+def test_archive_entries_match_by_name(tmp_path):
+    path = _zip(tmp_path / "chunk.zip", ["av2.zob", "AV1.zob"])
+    found = archive_entries(path, ["AV1", "AV2"])
+    assert (found["AV1"].entry == "AV1.zob")
+    assert (found["AV2"].entry == "av2.zob")
+
+
+
+def test_archive_entries_raise_on_mismatch(tmp_path):
+    # Same number of entries as objects, but one name differs: no positional guess
+    path = _zip(tmp_path / "chunk.zip", ["AV1.zob", "object.zob"])
+    with pytest.raises(ValueError, match="no entry for AV2.*object.zob"):
+        archive_entries(path, ["AV1", "AV2"])
+
+
+
+def test_save_objs_manifest_extracts_each_object(tmp_path, stand_in, og_client):
+    server = StandInServer()
+    server.populate("MainSite", devices=2, objects=18)
+    address = stand_in(server)
+    refs = [f"{device}.AI{instance}" for device in (100, 101) for instance in (1, 2, 3)]
+
+    with redirect_stdout(io.StringIO()):
+        manifest = og_client(address).SaveObjs(f"http://{address}", "MainSite", refs, str(tmp_path), chunkSize=2, progress=lambda *_: None)
+
+    assert (len(ObjectManifest(str(tmp_path / "manifest.json"))) == 6)
+    for ref in refs:
+        path = manifest.extract(f"//MainSite/{ref}", str(tmp_path / "out.zob"))
+        with open(path, "rb") as f:
+            assert (f'"key": "analog-input,{ref[-1]}"' in f.read().decode())
+
+
+
+def test_save_objs_drops_entries_in_rewritten_files(tmp_path, stand_in, og_client):
+    server = StandInServer()
+    server.populate("MainSite", devices=1, objects=30)
+    address = stand_in(server)
+    client = og_client(address)
+
+    with redirect_stdout(io.StringIO()):
+        for instances in ((1, 2, 3, 4), (4, 5)):
+            refs = [f"100.AI{instance}" for instance in instances]
+            manifest = client.SaveObjs(f"http://{address}", "MainSite", refs, str(tmp_path), chunkSize=2, progress=lambda *_: None)
+
+    # The second run rewrote the file of AI1 and AI2 with AI4 and AI5; AI3 is still in the first run's second file
+    assert (sorted(ObjectManifest(str(tmp_path / "manifest.json")).objects) == ["//MainSite/100.AI3", "//MainSite/100.AI4", "//MainSite/100.AI5"])
+    assert (manifest.extract("//MainSite/100.AI1", str(tmp_path / "out.zob")) is None)
+    for instance in (3, 4, 5):
+        path = manifest.extract(f"//MainSite/100.AI{instance}", str(tmp_path / "out.zob"))
+        with open(path, "rb") as f:
+            assert (f'"key": "analog-input,{instance}"' in f.read().decode())
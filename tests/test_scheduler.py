@@ -0,0 +1,50 @@
+"""
+Tests for `api/scheduler.py`.
+"""
+import threading
+import api.scheduler
+from api.limits import ConcurrencyLimits
+from api.scheduler import Job, JobScheduler
+
+
+
+def test_waits_without_spinning_while_limits_block_every_job(monkeypatch):
+    limits = ConcurrencyLimits(device_caps={"100": 1})
+    assert (limits.acquire("100"))
+    threading.Timer(0.2, limits.release, ("100",)).start()
+
+    loops = []
+    wait = api.scheduler.wait
+    monkeypatch.setattr(api.scheduler, "wait", lambda *args, **kwargs: loops.append(1) or wait(*args, **kwargs))
+    checks = []
+    check = api.scheduler.check
+    monkeypatch.setattr(api.scheduler, "check", lambda: checks.append(1) or check())
+
+    results = list(JobScheduler(limits=limits).run([Job("a", lambda: True, (), device="100")]))
+
+    assert ([result.ok for result in results] == [True])
+    assert (len(loops) == 1)
+    # About one pass per 10 ms while blocked, not a busy loop
+    assert (len(checks) < 40)
+
+
+
+def test_jobs_of_one_device_stay_within_its_cap():
+    limits = ConcurrencyLimits(device_caps={"100": 2})
+    lock = threading.Lock()
+    running, peak = [0], [0]
+
+    def job():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        threading.Event().wait(0.02)
+        with lock:
+            running[0] -= 1
+        return True
+
+    results = list(JobScheduler(workers=8, limits=limits).run([Job(i, job, (), device="100") for i in range(8)]))
+
+    assert (all(result.ok for result in results))
+    assert (peak[0] == 2)
+    assert (limits.stats()["devices"]["100"]["in_flight"] == 0)
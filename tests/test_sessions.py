@@ -0,0 +1,26 @@
+"""
+Tests for `api/sessions.py` and the session pool of `EnteliWEB`.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from bench.server import StandInServer
+from enteliweb import EnteliWEB
+
+
+
+def test_expired_login_is_refreshed_while_requests_run(stand_in):
+    server = StandInServer(session_ttl=0.2, latency=0.01)
+    server.populate("MainSite", devices=4, objects=6)
+    address = stand_in(server)
+    with EnteliWEB("admin", "password", server_ip=address, sessions=2) as api:
+        api.login()
+        first = api.session_id
+        time.sleep(0.3)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            listings = list(executor.map(lambda device: api.get_objects("MainSite", str(device), refresh=True), [100, 101, 102, 103] * 4))
+
+        assert (all(len(objects) == 7 for objects in listings))
+        assert (api.session_id != first)
+        assert (api.session_id in {pooled.session_id for pooled in api.pool.sessions})
+        assert (api.csrf_token == next(pooled for pooled in api.pool.sessions if (pooled.session_id == api.session_id)).csrf_token)
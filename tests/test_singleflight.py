@@ -0,0 +1,92 @@
+"""
+Tests for the coalescing of identical reads in flight (see `api/singleflight.py`) by `EnteliWEB`.
+"""
+import threading
+from bench.server import StandInServer
+from api.singleflight import SingleFlight
+from enteliweb import EnteliWEB
+
+
+
+def _count(api: EnteliWEB, name: str) -> list[int]:
+    """
+    Wraps a method of `api` to count the calls to it, returned as `[count]`.
+    """
+    function = getattr(api, name)
+    lock = threading.Lock()
+    count = [0]
+
+    def counted(*args, **kwargs):
+        with lock:
+            count[0] += 1
+        return function(*args, **kwargs)
+
+    setattr(api, name, counted)
+    return count
+
+
+
+def _together(*calls) -> list:
+    """
+    Runs each call in its own thread, all started at once, and returns their results in order.
+    """
+    barrier = threading.Barrier(len(calls))
+    results = [None] * len(calls)
+
+    def run(i, call):
+        barrier.wait()
+        results[i] = call()
+
+    threads = [threading.Thread(target=run, args=(i, call)) for i, call in enumerate(calls)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+
+def test_shared_get_is_parsed_once(stand_in, client):
+    server = StandInServer(latency=0.2)
+    server.populate("MainSite", devices=1, objects=6)
+    address = stand_in(server)
+
+    with client(address, sessions=2) as api:
+        parsed = _count(api, "_parse")
+        first, second = _together(*[lambda: api.get_objects("MainSite", "100")] * 2)
+        stats = api.flights.stats()
+
+    assert (first == second and len(first) == 7)
+    assert (stats["saved"] == 1)
+    assert (parsed[0] == 1)
+
+
+
+def test_shared_read_records_health_once(stand_in, client):
+    server = StandInServer(latency=0.2)
+    server.populate("MainSite", devices=1, objects=6)
+    server.set_online("MainSite", "100", False)
+    address = stand_in(server)
+    ref = ("MainSite", "100", "analog-input", "1", "present-value")
+
+    with client(address, sessions=2) as api:
+        recorded = _count(api, "_record_health")
+        _together(*[lambda: list(api.read_properties([ref]))] * 2)
+        stats = api.flights.stats()
+
+    assert (stats["saved"] == 1)
+    assert (recorded[0] == 1)
+    assert (api.health.stats()["failing"] == {("MainSite", "100"): 1})
+
+
+
+def test_flights_are_not_shared_between_logins(stand_in, client):
+    server = StandInServer(latency=0.2)
+    server.populate("MainSite", devices=1, objects=6)
+    address = stand_in(server)
+    flights = SingleFlight()
+
+    with client(address, "admin", flights=flights) as admin, client(address, "operator", flights=flights) as operator:
+        _together(lambda: admin.get_objects("MainSite", "100"), lambda: operator.get_objects("MainSite", "100"))
+
+    assert (flights.stats() == {"calls": 2, "sent": 2, "saved": 0})
@@ -0,0 +1,38 @@
+"""
+Tests for `api/store.py`.
+"""
+import os
+import shutil
+from api.store import BackupStore
+
+
+
+def _images(root: str) -> list[str]:
+    return [name for _, _, names in os.walk(os.path.join(root, "objects")) for name in names]
+
+
+
+def test_ingest_duplicate_writes_nothing(tmp_path, monkeypatch):
+    with BackupStore(str(tmp_path)) as store:
+        first = store.ingest("MainSite", "100", [b"image" * 1000, b"tail"])
+        assert (first.new)
+
+        def write(*args, **kwargs):
+            raise AssertionError("duplicate image written to disk")
+        monkeypatch.setattr(shutil, "copyfileobj", write)
+
+        second = store.ingest("MainSite", "101", [b"image" * 1000, b"tail"])
+        assert (not second.new)
+        assert (second.sha256 == first.sha256)
+        assert (_images(str(tmp_path)) == [first.sha256[2:]])
+        assert (len(store.history()) == 2)
+
+
+
+def test_ingest_new_content_round_trips(tmp_path):
+    with BackupStore(str(tmp_path)) as store:
+        store.ingest("MainSite", "100", [b"one"])
+        backup = store.ingest("MainSite", "100", [b"two", b"three"])
+        assert (backup.new)
+        assert (b"".join(store.read(backup.sha256)) == b"twothree")
+        assert (len(_images(str(tmp_path))) == 2)
@@ -0,0 +1,36 @@
+"""
+Tests for `api/tasks.py`.
+"""
+import time
+import pytest
+from api.poll import Poller
+from api.tasks import TaskWatcher
+
+
+
+def _fetches(*responses):
+    """
+    Returns a `fetch` giving each of `responses` in turn, then the last one for ever.
+    """
+    responses = list(responses)
+    return lambda: responses.pop(0) if (len(responses) > 1) else responses[0]
+
+
+
+def test_malformed_progress_counts_as_error():
+    watcher = TaskWatcher(_fetches({"error": "Not logged in"}, ["task"], [{"taskID": 7, "progress": 100}]), Poller(initial=0.01, maximum=0.01, jitter=0))
+
+    assert (watcher.wait(7, timeout=2) == {"taskID": 7, "progress": 100})
+    assert (watcher.stats() == {"fetches": 3, "errors": 2, "completed": 1, "watching": 0})
+
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_watch_restarts_after_thread_dies():
+    # A progress the thread cannot compare kills it outside the fetch's error handling
+    watcher = TaskWatcher(_fetches([{"taskID": 7, "progress": None}], [{"taskID": 7, "progress": 100}]), Poller(initial=0.01, maximum=0.01, jitter=0))
+
+    assert (watcher.wait(7, timeout=0.2) is None)
+    time.sleep(0.05)
+    assert (watcher._thread is None)
+    assert (watcher.wait(7, timeout=2) == {"taskID": 7, "progress": 100})
@@ -0,0 +1,34 @@
+"""
+Tests for `EWEB_API.WaitOnline` against the stand-in server.
+"""
+import pytest
+from aiohttp import web
+from bench.server import StandInServer
+
+
+
+class FixedWaitServer(StandInServer):
+    """
+    Answers `waitfordeviceonline` with `body`, a JSON object or plain text, instead of the devices' states.
+    """
+    body = {}
+
+    async def wait_for_device_online(self, request: web.Request) -> web.Response:
+        return web.json_response(self.body) if (isinstance(self.body, dict)) else web.Response(text=self.body)
+
+
+
+@pytest.mark.parametrize(("body", "online"), [
+    # Without a per-device or overall flag, an answer without error means every device is back
+    ({}, {"100": True, "101": True}),
+    ("OK", {"100": True, "101": True}),
+    ({"success": False}, {"100": False, "101": False}),
+    ({"success": False, "devices": {"//MainSite/100.DEV100": True}}, {"100": True, "101": False}),
+])
+def test_status_defaults(stand_in, og_client, body, online):
+    server = FixedWaitServer()
+    server.body = body
+    server.populate("MainSite", devices=2, objects=1)
+    address = stand_in(server)
+
+    assert (og_client(address).WaitOnline(f"http://{address}", "MainSite", ["100", "101"]) == online)
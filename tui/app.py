@@ -4,7 +4,9 @@ tui/app.py
 Main code for the TUI.
 """
 import shlex
+import inspect
 from typing import List
+from tui.objs import CommandResult
 from tui.cmd import CommandHandler
 from textual.binding import Binding
 from textual.containers import Vertical
@@ -81,6 +83,49 @@ class TUI(App):
 
 
 
+    def _report(self, result: CommandResult) -> None:
+        """
+        Writes a command result to the output log, in red if the command failed.
+
+        ### Parameters
+            - `result` ( *CommandResult* ) -- Outcome returned by a command handler.
+        """
+        if result.message:
+            if result.ok:
+                self._log(result.message)
+            else:
+                self._log(f"[red]{result.message}[/red]")
+
+
+
+    async def _await_command(self, pending) -> None:
+        """
+        Awaits an async command handler in a worker and logs its result.
+
+        Network-bound commands (e.g. `connect`, `sites`) run here so the
+        event loop keeps redrawing and accepting input while they are in flight.
+
+        ### Parameters
+            - `pending` ( *Awaitable* ) -- Coroutine returned by an async command handler.
+        """
+        try:
+            result = await pending
+        except Exception as e:
+            self._log(f"[red]Command crashed:[/red] {type(e).__name__}: {e}")
+            return
+        self._report(result)
+
+
+
+    async def on_unmount(self) -> None:
+        """
+        Closes the enteliWEB connection, if any, when the app shuts down.
+        """
+        if self.handler.api is not None:
+            await self.handler.api.close()
+
+
+
     def on_input_submitted(self, event: Input.Submitted) -> None:
         """
         Handles command submission from the input widget.
@@ -92,7 +137,7 @@ class TUI(App):
             4. Parse arguments using shell-like tokenization (`shlex.split`).
             5. Support shorthand help syntax (`<command>?`).
             6. Dispatch to the matched command handler.
-            7. Log success/error output from the command result.
+            7. Log success/error output from the command result (async handlers run in a worker).
 
         ### Parameters
             - `event` ( *Input* ) -- Textual `Input.Submitted` event carrying the submitted text.
@@ -144,8 +189,8 @@ class TUI(App):
             self._log(f"[red]Command crashed:[/red] {type(e).__name__}: {e}")
             return
 
-        if result.message:
-            if result.ok:
-                self._log(result.message)
-            else:
-                self._log(f"[red]{result.message}[/red]")
+        if inspect.isawaitable(result):
+            self.run_worker(self._await_command(result))
+            return
+
+        self._report(result)
@@ -4,6 +4,7 @@ tui/cmd.py
 Command handling logic for the TUI.
 """
 from tui.objs import CommandResult, CommandSpec
+from enteliweb_async import AsyncEnteliWEB
 from typing import Callable, Dict, Iterable, Optional
 
 
@@ -76,6 +77,7 @@ class CommandHandler:
         Initializes handler state and precomputes command specifications.
         """
         self.name = "anonymous"
+        self.api: Optional[AsyncEnteliWEB] = None
         self._spec_by_name = self._build_specs()
 
 
@@ -208,6 +210,96 @@ class CommandHandler:
 
 
 
+    @command(
+        name    = "connect",
+        usage   = "connect <server> <username> <password>",
+        summary = "Log in to an enteliWEB server."
+    )
+    async def cmd_connect(self, server: str, username: str, password: str) -> CommandResult:
+        """
+        Logs in to an enteliWEB server, replacing any previous connection.
+
+        ### Parameters
+            - `server` ( *string* ) -- Address of the enteliWEB server.
+            - `username` ( *string* ) -- enteliWEB username.
+            - `password` ( *string* ) -- enteliWEB password.
+
+        ### Returns
+            - `CommandResult` indicating whether the login succeeded.
+        """
+        if self.api is not None:
+            await self.api.close()
+        self.api = AsyncEnteliWEB(username, password, server_ip=server)
+        if not await self.api.login():
+            return CommandResult(False, f"Login to {server!r} as {username!r} failed")
+        self.name = username
+        return CommandResult(True, f"Connected to {self.api.server!r} as {username!r}")
+
+
+
+    @command(
+        name    = "sites",
+        summary = "List the sites on the connected server."
+    )
+    async def cmd_sites(self) -> CommandResult:
+        """
+        Lists all sites on the connected enteliWEB server.
+
+        ### Returns
+            - `CommandResult` with one site per line, or failure if not connected.
+        """
+        if self.api is None:
+            return CommandResult(False, "Not connected (try 'connect')")
+        sites = await self.api.get_sites()
+        return CommandResult(True, "\n".join(sites) or "No sites found")
+
+
+
+    @command(
+        name    = "devices",
+        usage   = "devices <site>",
+        summary = "List the devices on a site."
+    )
+    async def cmd_devices(self, site: str) -> CommandResult:
+        """
+        Lists all devices on a site.
+
+        ### Parameters
+            - `site` ( *string* ) -- Site name.
+
+        ### Returns
+            - `CommandResult` with one device per line, or failure if not connected.
+        """
+        if self.api is None:
+            return CommandResult(False, "Not connected (try 'connect')")
+        devices = await self.api.get_devices(site)
+        return CommandResult(True, "\n".join(devices) or "No devices found")
+
+
+
+    @command(
+        name    = "objects",
+        usage   = "objects <site> <device>",
+        summary = "List the objects in a device."
+    )
+    async def cmd_objects(self, site: str, device: str) -> CommandResult:
+        """
+        Lists all objects in a device.
+
+        ### Parameters
+            - `site` ( *string* ) -- Site name.
+            - `device` ( *string* ) -- Device address.
+
+        ### Returns
+            - `CommandResult` with one object per line, or failure if not connected.
+        """
+        if self.api is None:
+            return CommandResult(False, "Not connected (try 'connect')")
+        objects = await self.api.get_objects(site, device)
+        return CommandResult(True, "\n".join(objects) or "No objects found")
+
+
+
 
     def _build_specs(self) -> Dict[str, CommandSpec]:
         """